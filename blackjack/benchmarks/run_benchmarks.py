@@ -0,0 +1,209 @@
+# Benchmarks of the game engine and interface hot paths
+#
+# Run from the blackjack folder (GraphicInterface loads its assets from there):
+#   python benchmarks/run_benchmarks.py              compare with the baseline
+#   python benchmarks/run_benchmarks.py -save        store results as the new baseline
+# Every benchmark reports the best time of one operation over REPEATS repeats,
+# in each of RUNS runs of the suite. Its time is the median of the runs' best
+# times and its noise margin their interquartile range relative to it, capped
+# at MAX_NOISE (no margin from a single run): a benchmark is a regression when
+# it is slower than the baseline by more than the threshold plus the baseline's
+# margin. Save a baseline on a quiet machine, with -runs raised if the margins
+# come out near the cap.
+# micro.graphic_update_card_view needs a display, it is skipped without one
+# and is then missing from the results and from a baseline saved there.
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import timeit
+from contextlib import redirect_stdout
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCH_DIR, '..', 'src'))
+
+from blackjack_batch import BatchEngine, strategyTable
+from blackjack_game import BlackjackApp
+from blackjack_misc import Actions
+from blackjack_interface import HeadlessInterface, TextInterface, GraphicInterface
+from cards import Card, BlackjackCardSet, SUITS, RANKS
+
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_THRESHOLD = 0.15
+REPEATS = 7
+RUNS = 5
+# largest noise margin, so the threshold keeps flagging regressions on a noisy machine
+MAX_NOISE = 0.1
+
+BENCHMARKS = {}
+
+
+def benchmark(name, number):
+    # registers a setup function returning the operation to time (or None to skip)
+    def register(setup):
+        BENCHMARKS[name] = (setup, number)
+        return setup
+    return register
+
+
+def _hand(ranks):
+    hand = BlackjackCardSet()
+    for i, rank in enumerate(ranks):
+        hand.addCard(Card(SUITS[i % len(SUITS)], rank))
+    return hand
+
+
+@benchmark('micro.card_construction', number=100000)
+def benchCardConstruction():
+    suit, rank = SUITS[2], RANKS[7][0]
+    return lambda: Card(suit, rank)
+
+
+@benchmark('micro.cardset_add_cards', number=20000)
+def benchCardSetAddCards():
+    cards = [Card(SUITS[i % len(SUITS)], RANKS[i][0]) for i in (1, 4, 0, 2, 5)]
+    def addCards():
+        hand = BlackjackCardSet()
+        for c in cards:
+            hand.addCard(c)
+    return addCards
+
+
+@benchmark('micro.cardset_update_total', number=100000)
+def benchCardSetUpdateTotal():
+    hand = _hand(['two', 'five', 'ace', 'three', 'six'])
+    return hand._updateTotal
+
+
+@benchmark('micro.text_update_card_view', number=5000)
+def benchTextUpdateCardView():
+    inter = TextInterface()
+    hand = _hand(['ten', 'five', 'ace'])
+    hand.hideCard(0)
+    out = io.StringIO()
+    def render():
+        out.seek(0)
+        with redirect_stdout(out):
+            inter.updateCardView(hand, is_dealer=True)
+    return render
+
+
+@benchmark('micro.graphic_update_card_view', number=200)
+def benchGraphicUpdateCardView():
+    try:
+        inter = GraphicInterface()
+    except Exception:  # no display available
+        return None
+    inter.initializeView()
+    hands = [_hand(['ten', 'five', 'ace']), _hand(['two', 'king', 'four', 'queen'])]
+    state = [0]
+    def render():
+        state[0] = 1 - state[0]
+        inter.updateCardView(hands[state[0]])
+    return render
+
+
+@benchmark('macro.headless_start_round', number=5000)
+def benchHeadlessStartRound():
+    app = BlackjackApp(HeadlessInterface())
+    app.balance = 10 ** 9
+    def playRound():
+        app.setBet(10)
+        app.startRound()
+        app.resetCards()
+    return playRound
+
+
+@benchmark('macro.headless_run_game_1000_rounds', number=5)
+def benchHeadlessRunGame():
+    def runGame():
+        app = BlackjackApp(HeadlessInterface(rounds=1000))
+        app.balance = 10 ** 9
+        app.runGame()
+    return runGame
+
+
+@benchmark('macro.batch_engine_100000_rounds', number=3)
+def benchBatchEngine():
+    table = strategyTable(lambda total, soft, upcard: Actions.STAND if total >= 17 else Actions.HIT)
+    engine = BatchEngine(table, seed=0)
+    return lambda: engine.playRounds(100000)
+
+
+def summarize(runs):
+    # time and noise margin of the repeat times of every run
+    bests = [min(times) for times in runs]
+    time = statistics.median(bests)
+    noise = 0.0
+    if len(bests) > 1:
+        q1, median, q3 = statistics.quantiles(bests, n=4, method='inclusive')
+        noise = min((q3 - q1) / time, MAX_NOISE)
+    return {'time': time, 'noise': noise}
+
+
+def runBenchmarks(names=None, runs=RUNS):
+    times = {}
+    for run in range(runs):
+        for name, (setup, number) in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            operation = setup()
+            if operation is None:
+                if run == 0:
+                    print(f"{name:<40} skipped")
+                continue
+            repeats = timeit.repeat(operation, number=number, repeat=REPEATS)
+            times.setdefault(name, []).append([t / number for t in repeats])
+    results = {name: summarize(name_runs) for name, name_runs in times.items()}
+    for name, result in results.items():
+        print(f"{name:<40} {result['time'] * 1e6:>12.3f} us  noise {result['noise']:>6.1%}")
+    return results
+
+
+def compareResults(results, baseline, threshold=DEFAULT_THRESHOLD):
+    # returns the names of benchmarks slower than the baseline by more than
+    # threshold plus the baseline's noise margin; a baseline entry may also be
+    # a bare time, with no margin
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline us':>12} {'current us':>12} {'change':>8} {'allowed':>8}")
+    for name, result in results.items():
+        current = result['time'] if isinstance(result, dict) else result
+        if name not in baseline:
+            print(f"{name:<40} {'-':>12} {current * 1e6:>12.3f} {'new':>8}")
+            continue
+        entry = baseline[name]
+        time, noise = (entry['time'], entry['noise']) if isinstance(entry, dict) else (entry, 0.0)
+        change = current / time - 1
+        allowed = threshold + noise
+        flag = ""
+        if change > allowed:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<40} {time * 1e6:>12.3f} {current * 1e6:>12.3f} {change:>+8.1%} {allowed:>+8.1%}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-save', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('-baseline', default=BASELINE_FILE)
+    parser.add_argument('-threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('-only', nargs='+', default=None, choices=list(BENCHMARKS))
+    parser.add_argument('-runs', type=int, default=RUNS,
+                        help='runs of the suite, the median of their best times is kept')
+    args = parser.parse_args()
+
+    results = runBenchmarks(args.only, args.runs)
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compareResults(results, baseline, args.threshold):
+            sys.exit(1)
+    else:
+        print(f"\nNo baseline at {args.baseline}, run with -save to create one")
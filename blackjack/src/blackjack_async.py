@@ -0,0 +1,94 @@
+# Module for playing games on an asyncio event loop
+#
+# AsyncBlackjackApp runs the same steps as BlackjackApp (gameSteps, roundSteps
+# and handSteps hold every rule) but awaits the answers of its interface, so
+# runGame, startRound, playPlayerHands and playHand are coroutines and one
+# event loop can play many games while their players think.
+#
+# An async interface has the display methods of a sync interface, which never
+# wait, and getAction, getBet and wantsToPlay as coroutines. AsyncAdapter
+# turns any sync interface (HeadlessInterface, StrategyInterface) into one, so
+# bots and remote players can sit on the same loop.
+import argparse
+import asyncio
+import random
+from time import perf_counter
+from blackjack_game import BlackjackApp
+from blackjack_interface import StrategyInterface
+from blackjack_timing import NULL_TIMER, PhaseTimer
+from cards import Shoe
+
+# interface methods an async interface implements as coroutines
+ASYNC_METHODS = ('getAction', 'getBet', 'wantsToPlay')
+
+
+class AsyncAdapter(object):
+    # forwards everything to a sync interface, its decisions returned as coroutines;
+    # gives the event loop a turn before every round so games never starve each other
+    def __init__(self, interface):
+        self.__dict__['_interface'] = interface
+
+    def __getattr__(self, name):
+        return getattr(self._interface, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._interface, name, value)
+
+    async def getAction(self, actions):
+        return self._interface.getAction(actions)
+
+    async def getBet(self, balance):
+        return self._interface.getBet(balance)
+
+    async def wantsToPlay(self):
+        await asyncio.sleep(0)
+        return self._interface.wantsToPlay()
+
+
+class AsyncBlackjackApp(BlackjackApp):
+    # BlackjackApp awaiting every request of its steps
+    async def answerSteps(self, steps):
+        try:
+            request = next(steps)
+            while True:
+                name, args = request
+                if name == 'startRound':
+                    answer = await self.startRound()
+                else:
+                    answer = await getattr(self.interface, name)(*args)
+                request = steps.send(answer)
+        except StopIteration as stop:
+            return stop.value
+
+
+async def playGames(apps):
+    # runs the games of several apps on the running event loop
+    await asyncio.gather(*(app.runGame() for app in apps))
+
+
+if __name__ == "__main__":
+    from blackjack_tournament import STRATEGIES
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-games', type=int, default=1000, help='number of games played at the same time')
+    parser.add_argument('-rounds', type=int, default=100)
+    parser.add_argument('-strategy', default='basic', choices=list(STRATEGIES))
+    parser.add_argument('-decks', type=int, default=6, help='number of decks in the shoe, 0 for an infinite deck')
+    parser.add_argument('-seed', type=int, default=None)
+    parser.add_argument('-timing', action='store_true', help='print the time spent in each phase')
+    args = parser.parse_args()
+    master = random.Random(args.seed)
+    timer = PhaseTimer() if args.timing else NULL_TIMER
+    apps = []
+    for i in range(args.games):
+        rng = random.Random(master.getrandbits(64))
+        shoe = Shoe(args.decks, rng=rng) if args.decks > 0 else None
+        interface = AsyncAdapter(StrategyInterface(STRATEGIES[args.strategy](), rounds=args.rounds))
+        apps.append(AsyncBlackjackApp(interface, rng=rng, shoe=shoe, timer=timer))
+    start = perf_counter()
+    asyncio.run(playGames(apps))
+    elapsed = perf_counter() - start
+    rounds = sum(app.interface.rounds_played for app in apps)
+    print(f"{args.games} games, {rounds} rounds in {elapsed:.2f} s ({rounds / elapsed:.0f} rounds/s)")
+    print(f"mean balance: {sum(app.balance for app in apps) / args.games:.2f}")
+    if args.timing:
+        print(timer.report())
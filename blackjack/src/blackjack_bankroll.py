@@ -0,0 +1,177 @@
+# Module for simulating many bankrolls at once until ruin or a horizon of rounds
+#
+# A player starts with the balance of BlackjackApp and is ruined when the balance
+# drops below MIN_BALANCE, the condition that ends BlackjackApp.runGame. Every
+# round is worth a whole number of bets between -2 (lost double) and +2 (won
+# double or blackjack), drawn from the distribution measured with BatchEngine
+# for the strategy table, with or without doubling as BlackjackApp.startRound
+# allows it (balance left after the bet >= bet). Splitting is not modelled.
+#
+# All players advance in lockstep. A player whose balance is high enough that
+# the bet is fixed and ruin is impossible for k more rounds (every round loses
+# at most 2 bets) jumps k rounds at once with one multinomial draw of how many
+# rounds ended with each result; the others play one round per step.
+import argparse
+import numpy as np
+from blackjack_batch import BatchEngine, DOUBLE, HIT, strategyTable
+from blackjack_game import MIN_BALANCE
+from blackjack_misc import Actions, ACCEPTED_BETS
+
+START_BALANCE = 100
+UNIT_RESULTS = np.array([-2, -1, 0, 1, 2], dtype=np.int64)
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_BETS = np.array(ACCEPTED_BETS, dtype=np.int64)
+
+
+def acceptedBets(amounts):
+    # largest accepted bet not above every amount, at least the smallest accepted bet
+    idx = np.searchsorted(_BETS, amounts, side='right') - 1
+    return _BETS[np.maximum(idx, 0)]
+
+
+class FlatBet(object):
+    # the same bet every round, or the largest accepted bet the balance covers
+    def __init__(self, bet=ACCEPTED_BETS[0]):
+        self.bet = bet
+        self.constant_from = 2 * bet
+
+    def bets(self, balance):
+        return acceptedBets(np.minimum(balance, self.bet))
+
+
+class ProportionalBet(object):
+    # the largest accepted bet not above a fraction of the balance
+    def __init__(self, fraction=0.1):
+        self.fraction = fraction
+        self.constant_from = max(_BETS[-1] / fraction, 2 * _BETS[-1])
+
+    def bets(self, balance):
+        return acceptedBets(np.minimum(balance, balance * self.fraction))
+
+
+class ProgressiveBet(object):
+    # the largest accepted bet while ahead of the start balance, as ProgressiveBasicPlayer
+    def __init__(self, start_balance=START_BALANCE):
+        self.start_balance = start_balance
+        self.constant_from = max(start_balance + 1, 2 * _BETS[-1])
+
+    def bets(self, balance):
+        return np.where(balance > self.start_balance, acceptedBets(balance), _BETS[0])
+
+
+BET_POLICIES = {'flat': FlatBet, 'proportional': ProportionalBet, 'progressive': ProgressiveBet}
+
+
+def unitDistribution(table, rounds=2 * 10 ** 6, seed=None):
+    # probabilities of UNIT_RESULTS per round with doubling allowed and without
+    table = np.asarray(table, dtype=np.int8)
+    no_double = np.where(table == DOUBLE, HIT, table)
+    probs = []
+    for t, s in zip((table, no_double), np.random.SeedSequence(seed).spawn(2)):
+        net = BatchEngine(t, bet=1, seed=s).playRounds(rounds)[1]
+        counts = np.bincount(net - UNIT_RESULTS[0], minlength=UNIT_RESULTS.size)
+        probs.append(counts / rounds)
+    return probs[0], probs[1]
+
+
+class BankrollSimulator(object):
+    def __init__(self, double_probs, no_double_probs, policy=None, players=10000,
+                 start_balance=START_BALANCE, seed=None):
+        self.double_probs = np.asarray(double_probs, dtype=np.float64)
+        self.no_double_probs = np.asarray(no_double_probs, dtype=np.float64)
+        self.policy = policy if policy is not None else FlatBet()
+        self.players = players
+        self.start_balance = start_balance
+        self.rng = np.random.default_rng(seed)
+
+    def _playRound(self, balance, bets):
+        u = self.rng.random(balance.size)
+        double_idx = np.searchsorted(np.cumsum(self.double_probs), u, side='right')
+        no_double_idx = np.searchsorted(np.cumsum(self.no_double_probs), u, side='right')
+        idx = np.where(balance >= 2 * bets, double_idx, no_double_idx)
+        return UNIT_RESULTS[np.minimum(idx, UNIT_RESULTS.size - 1)] * bets
+
+    def run(self, horizon):
+        # play every player until ruin or horizon rounds, returns the final
+        # balances and the round of ruin (-1 for players not ruined)
+        balance = np.full(self.players, self.start_balance, dtype=np.int64)
+        played = np.zeros(self.players, dtype=np.int64)
+        ruined_at = np.full(self.players, -1, dtype=np.int64)
+        active = np.flatnonzero(balance >= MIN_BALANCE)
+        safe_from = self.policy.constant_from
+        while active.size > 0:
+            current = balance[active]
+            bets = self.policy.bets(current)
+            # only players past safe_from jump, safe_from is infinite for policies that never stop changing bets
+            jumps = np.zeros(current.size, dtype=np.int64)
+            safe = current >= safe_from
+            if safe.any():
+                jumps[safe] = (current[safe] - safe_from) // (2 * bets[safe])
+            jumps = np.minimum(jumps, horizon - played[active])
+
+            jumping = jumps > 0
+            if jumping.any():
+                idx = active[jumping]
+                counts = self.rng.multinomial(jumps[jumping], self.double_probs)
+                balance[idx] += bets[jumping] * (counts @ UNIT_RESULTS)
+                played[idx] += jumps[jumping]
+
+            idx = active[~jumping]
+            if idx.size > 0:
+                balance[idx] += self._playRound(current[~jumping], bets[~jumping])
+                played[idx] += 1
+                ruined = idx[balance[idx] < MIN_BALANCE]
+                ruined_at[ruined] = played[ruined]
+
+            active = active[(played[active] < horizon) & (balance[active] >= MIN_BALANCE)]
+        return balance, ruined_at
+
+
+def report(balance, ruined_at, horizon):
+    ruin_times = ruined_at[ruined_at >= 0]
+    return {
+        'players': balance.size,
+        'horizon': horizon,
+        'ruin_probability': ruin_times.size / balance.size,
+        'ruin_time_percentiles': dict(zip(PERCENTILES, np.percentile(ruin_times, PERCENTILES).tolist()))
+                                 if ruin_times.size else {},
+        'balance_percentiles': dict(zip(PERCENTILES, np.percentile(balance, PERCENTILES).tolist())),
+        'mean_balance': float(balance.mean())
+    }
+
+
+def ruinCurve(ruined_at, rounds):
+    # share of players ruined within each number of rounds
+    ruin_times = np.sort(ruined_at[ruined_at >= 0])
+    return np.searchsorted(ruin_times, rounds, side='right') / ruined_at.size
+
+
+def _standOnSeventeen(total, soft, upcard):
+    return Actions.STAND if total >= 17 else Actions.HIT
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-players', type=int, default=10000)
+    parser.add_argument('-horizon', type=int, default=10 ** 6)
+    parser.add_argument('-policy', default='flat', choices=list(BET_POLICIES))
+    parser.add_argument('-strategy', default='basic', choices=['basic', 'stand17'])
+    parser.add_argument('-seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.strategy == 'basic':
+        from blackjack_tables import basicStrategy
+        table = basicStrategy().first
+    else:
+        table = strategyTable(_standOnSeventeen)
+    probs = unitDistribution(table, seed=args.seed)
+    simulator = BankrollSimulator(*probs, policy=BET_POLICIES[args.policy](), players=args.players, seed=args.seed)
+    balance, ruined_at = simulator.run(args.horizon)
+    stats = report(balance, ruined_at, args.horizon)
+    print(f"ruin probability within {args.horizon} rounds: {stats['ruin_probability']:.4f}")
+    for q, rounds in stats['ruin_time_percentiles'].items():
+        print(f"  {q}% of ruins within {rounds:.0f} rounds")
+    print(f"mean final balance: {stats['mean_balance']:.1f}")
+    for q, value in stats['balance_percentiles'].items():
+        print(f"  {q}th percentile of final balance: {value:.0f}")
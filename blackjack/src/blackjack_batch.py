@@ -0,0 +1,148 @@
+# Module for playing many Blackjack rounds at once with NumPy arrays
+#
+# Each row of the arrays is an independent round that follows the same rules
+# as BlackjackApp.startRound: natural blackjacks are checked for the player first
+# and then for the dealer, the player plays the hand by a strategy table
+# (doubling allowed on the first decision only), the dealer draws to 17 as in
+# BlackjackApp.canPlay and bets are paid as in BlackjackApp.adjustBalance.
+# Splitting is not modelled, pairs are played as regular hands.
+from functools import partial
+import numpy as np
+from blackjack_misc import Actions, Outcome, ACCEPTED_BETS
+
+# action codes stored in strategy tables
+HIT, STAND, DOUBLE = 0, 1, 2
+ACTION_CODES = {Actions.HIT: HIT, Actions.STAND: STAND, Actions.DOUBLE: DOUBLE}
+# outcome codes stored in result arrays
+OUTCOMES = (Outcome.WIN, Outcome.BLACKJACK, Outcome.LOSS, Outcome.TIE)
+WIN, BLACKJACK, LOSS, TIE = range(len(OUTCOMES))
+# card values by rank index, same order as cards.RANKS (ace counted as 1)
+RANK_VALUES = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10], dtype=np.int8)
+# strategy table shape: [soft][player total][dealer up card value]
+TABLE_SHAPE = (2, 22, 11)
+
+
+def strategyTable(decide):
+    # build a table from decide(total, soft, upcard) -> Actions
+    table = np.full(TABLE_SHAPE, STAND, dtype=np.int8)
+    for soft in range(TABLE_SHAPE[0]):
+        for total in range(TABLE_SHAPE[1]):
+            for upcard in range(1, TABLE_SHAPE[2]):
+                table[soft, total, upcard] = ACTION_CODES[decide(total, bool(soft), upcard)]
+    return table
+
+
+def handKey(hand):
+    # (total, soft) of a BlackjackCardSet as used to index a strategy table
+    low, high = hand.getScore()
+    if 0 < high <= 21:
+        return high, True
+    return low, False
+
+
+def _playByTable(table, hand, dealer_hand, actions):
+    total, soft = handKey(hand)
+    upcard = dealer_hand.getCard(1).getValue()[0]
+    action = table[int(soft), total, upcard]
+    if action == DOUBLE and Actions.DOUBLE in actions:
+        return Actions.DOUBLE
+    return Actions.STAND if action == STAND else Actions.HIT
+
+
+def tableStrategy(table):
+    # strategy callable for HeadlessInterface that plays by a strategy table,
+    # built with partial so it can be sent to worker processes
+    return partial(_playByTable, table)
+
+
+def _highScore(low, has_ace):
+    high = low + 10
+    return np.where(has_ace & (high <= 21), high, low)
+
+
+class BatchEngine(object):
+    def __init__(self, table, bet=ACCEPTED_BETS[0], seed=None):
+        self.table = np.asarray(table, dtype=np.int8)
+        self.bet = bet
+        self.rng = np.random.default_rng(seed)
+
+    def _drawValues(self, size, rows=None):
+        # values of size new cards, rows tells which rounds they are drawn for
+        ranks = self.rng.integers(0, len(RANK_VALUES), size=size, dtype=np.int8)
+        return RANK_VALUES[ranks]
+
+    def playRounds(self, n):
+        # play n rounds, returns arrays of outcome codes and net win per round
+        dealt = self._drawValues((n, 4))
+        # player gets the 1st and 3rd card, dealer the 2nd and 4th (2nd is hidden)
+        player = dealt[:, 0].astype(np.int16) + dealt[:, 2]
+        player_ace = (dealt[:, 0] == 1) | (dealt[:, 2] == 1)
+        dealer = dealt[:, 1].astype(np.int16) + dealt[:, 3]
+        dealer_ace = (dealt[:, 1] == 1) | (dealt[:, 3] == 1)
+        upcard = dealt[:, 3]
+
+        player_bj = player_ace & (player == 11)
+        dealer_bj = dealer_ace & (dealer == 11)
+        outcome = np.full(n, LOSS, dtype=np.int8)
+        outcome[player_bj & dealer_bj] = TIE
+        outcome[player_bj & ~dealer_bj] = BLACKJACK
+        doubled = np.zeros(n, dtype=bool)
+
+        # player plays every hand that was not settled on naturals
+        playing = np.flatnonzero(~(player_bj | dealer_bj))
+        settled = playing
+        first_decision = True
+        while playing.size > 0:
+            low, has_ace = player[playing], player_ace[playing]
+            can_play = (low < 21) & ~(has_ace & (low == 11))
+            playing = playing[can_play]
+            low, has_ace = low[can_play], has_ace[can_play]
+            soft = has_ace & (low + 10 <= 21)
+            total = np.where(soft, low + 10, low)
+            action = self.table[soft.astype(np.intp), total, upcard[playing]]
+            if not first_decision:
+                action = np.where(action == DOUBLE, HIT, action)
+            doubled[playing[action == DOUBLE]] = True
+            playing = playing[action != STAND]
+            values = self._drawValues(playing.size, playing)
+            player[playing] += values
+            player_ace[playing] |= values == 1
+            playing = playing[~doubled[playing]]
+            first_decision = False
+
+        # dealer draws until 17, ace counted as 11 whenever the set has one
+        drawing = settled
+        while drawing.size > 0:
+            low = dealer[drawing]
+            can_play = np.where(dealer_ace[drawing], low + 10 < 17, low < 17)
+            drawing = drawing[can_play]
+            values = self._drawValues(drawing.size, drawing)
+            dealer[drawing] += values
+            dealer_ace[drawing] |= values == 1
+
+        player_high = _highScore(player[settled], player_ace[settled])
+        dealer_high = _highScore(dealer[settled], dealer_ace[settled])
+        result = np.full(settled.size, LOSS, dtype=np.int8)
+        not_bust = player[settled] <= 21
+        result[not_bust & ((dealer_high > 21) | (player_high > dealer_high))] = WIN
+        result[not_bust & (player_high == dealer_high)] = TIE
+        outcome[settled] = result
+
+        stake = self.bet * (1 + doubled)
+        net = np.zeros(n, dtype=np.int64)
+        net[outcome == WIN] = stake[outcome == WIN]
+        net[outcome == BLACKJACK] = 2 * self.bet
+        net[outcome == LOSS] = -stake[outcome == LOSS]
+        return outcome, net
+
+    def simulate(self, rounds, chunk_size=10 ** 6):
+        # play rounds in chunks, returns counts per Outcome and the total net win
+        counts = {o: 0 for o in OUTCOMES}
+        total_net = 0
+        while rounds > 0:
+            outcome, net = self.playRounds(min(rounds, chunk_size))
+            for code, occurrences in enumerate(np.bincount(outcome, minlength=len(OUTCOMES))):
+                counts[OUTCOMES[code]] += int(occurrences)
+            total_net += int(net.sum())
+            rounds -= outcome.size
+        return counts, total_net
@@ -0,0 +1,203 @@
+# Module for columnar export of simulated rounds
+#
+# ColumnsApp is a BlackjackApp writing one row per round to a column writer:
+#   first_card, second_card  player's initial cards (card index)
+#   upcard                   dealer's up card (card index)
+#   actions                  bitmask of the actions taken, bit i for list(Actions)[i]
+#   hands                    number of hands played, splits included
+#   player_total             final score of the first hand (low total once bust)
+#   dealer_total             dealer's final score
+#   outcome                  index in list(Outcome) of the first hand, -1 if not settled
+#   net                      net win of the round
+# Rows are kept in fixed size NumPy buffers and appended to the files every
+# chunk_rows rows, so memory stays flat however long the run.
+#
+# NpyColumnWriter writes one .npy file per column, the header rewritten after
+# every chunk so the files can be loaded with np.load(mmap_mode='r') at any
+# time. ArrowColumnWriter writes an Arrow IPC file with a record batch per
+# chunk, it needs pyarrow.
+import argparse
+import os
+import random
+import struct
+from abc import ABC, abstractmethod
+import numpy as np
+from blackjack_game import BlackjackApp, STD_BET
+from blackjack_interface import HeadlessInterface, standOnSeventeen
+from blackjack_log import ACTION_LIST, OUTCOME_LIST
+from blackjack_timing import NULL_TIMER
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+COLUMNS = (
+    ('first_card', np.int8),
+    ('second_card', np.int8),
+    ('upcard', np.int8),
+    ('actions', np.uint8),
+    ('hands', np.int8),
+    ('player_total', np.int8),
+    ('dealer_total', np.int8),
+    ('outcome', np.int8),
+    ('net', np.int32),
+)
+CHUNK_ROWS = 1 << 16
+BANKROLL = 10 ** 9
+# fixed size of the .npy headers, so they can be rewritten in place
+HEADER_BYTES = 128
+ACTION_BITS = {a: 1 << i for i, a in enumerate(ACTION_LIST)}
+
+
+def npyHeader(dtype, rows):
+    # .npy version 1.0 header of a 1-d array, padded to HEADER_BYTES
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.dtype(dtype).str, rows)
+    header = header.ljust(HEADER_BYTES - 11) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+class _ColumnBuffer(ABC):
+    # rows buffered per chunk, writers define how a chunk is written and the output closed
+    def __init__(self, chunk_rows=CHUNK_ROWS, columns=COLUMNS):
+        self.chunk_rows = chunk_rows
+        self.columns = columns
+        self.buffers = [np.empty(chunk_rows, dtype=dtype) for name, dtype in columns]
+        self.pending = 0
+        self.rows = 0
+
+    def addRow(self, row):
+        # row: a value for every column, in order
+        i = self.pending
+        for buffer, value in zip(self.buffers, row):
+            buffer[i] = value
+        self.pending = i + 1
+        if self.pending == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self._writeChunk([buffer[:self.pending] for buffer in self.buffers])
+            self.rows += self.pending
+            self.pending = 0
+
+    def close(self):
+        # writes the rows left, then closes the output
+        self.flush()
+        self._closeOutput()
+
+    @abstractmethod
+    def _writeChunk(self, arrays):
+        pass
+
+    @abstractmethod
+    def _closeOutput(self):
+        pass
+
+
+class NpyColumnWriter(_ColumnBuffer):
+    def __init__(self, directory, chunk_rows=CHUNK_ROWS, columns=COLUMNS):
+        super().__init__(chunk_rows, columns)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.files = []
+        for name, dtype in columns:
+            f = open(os.path.join(directory, name + '.npy'), 'w+b')
+            f.write(npyHeader(dtype, 0))
+            self.files.append(f)
+
+    def _writeChunk(self, arrays):
+        rows = self.rows + len(arrays[0])
+        for f, array, (name, dtype) in zip(self.files, arrays, self.columns):
+            f.seek(0, os.SEEK_END)
+            f.write(array.tobytes())
+            f.seek(0)
+            f.write(npyHeader(dtype, rows))
+            f.flush()
+
+    def _closeOutput(self):
+        for f in self.files:
+            f.close()
+        self.files = []
+
+
+class ArrowColumnWriter(_ColumnBuffer):
+    def __init__(self, path, chunk_rows=CHUNK_ROWS, columns=COLUMNS):
+        if pa is None:
+            raise ImportError("Arrow export needs pyarrow, install it or use NpyColumnWriter")
+        super().__init__(chunk_rows, columns)
+        self.path = path
+        self.schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in columns])
+        self.sink = pa.OSFile(path, 'wb')
+        self.writer = pa.ipc.new_file(self.sink, self.schema)
+
+    def _writeChunk(self, arrays):
+        self.writer.write_batch(pa.record_batch([pa.array(a) for a in arrays], schema=self.schema))
+
+    def _closeOutput(self):
+        self.writer.close()
+        self.sink.close()
+
+
+def readColumns(directory, columns=COLUMNS):
+    # memory-mapped arrays of an NpyColumnWriter directory, by column name
+    return {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r') for name, dtype in columns}
+
+
+def readArrow(path):
+    # the Arrow table of an ArrowColumnWriter file, memory-mapped
+    if pa is None:
+        raise ImportError("Reading Arrow files needs pyarrow")
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+class ColumnsApp(BlackjackApp):
+    # BlackjackApp writing a row of COLUMNS for every round
+    def __init__(self, interface, writer: _ColumnBuffer, rng=random, shoe=None, timer=NULL_TIMER):
+        super().__init__(interface, rng, shoe, timer)
+        self.writer = writer
+        self.actions = 0
+        self.outcome = -1
+
+    def adjustBalance(self, outcome, hand: int):
+        if hand == 0:
+            self.outcome = OUTCOME_LIST.index(outcome)
+        super().adjustBalance(outcome, hand)
+
+    def onAction(self, hand: int, action):
+        self.actions |= ACTION_BITS[action]
+
+    def startRound(self):
+        before = self.balance
+        self.actions = 0
+        self.outcome = -1
+        super().startRound()
+        player, dealer = self.player_hand, self.dealer_hand
+        if len(player[0].getCards()) < 2 or len(dealer.getCards()) < 2:
+            return
+        # a split hand keeps the first card, its second card went to the next hand
+        second = player[1].getCard(0) if len(player) > 1 else player[0].getCard(1)
+        self.writer.addRow((player[0].getCard(0).index, second.index, dealer.getCard(1).index, self.actions,
+                            len(player), self.getHighScore(player[0]), self.getHighScore(dealer), self.outcome,
+                            self.balance - before))
+
+
+def exportSimulation(writer, rounds, seed=None, strategy=standOnSeventeen, bet=STD_BET):
+    # plays rounds with a bankroll that cannot run out, a row per round to writer, then closes it
+    app = ColumnsApp(HeadlessInterface(strategy=strategy, bet=bet, rounds=rounds), writer, rng=random.Random(seed))
+    app.balance = BANKROLL
+    app.runGame()
+    writer.close()
+    return writer.rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('output', help='directory of the .npy files, or the Arrow file with -arrow')
+    parser.add_argument('-rounds', type=int, default=10 ** 6)
+    parser.add_argument('-seed', type=int, default=None)
+    parser.add_argument('-chunk_rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('-arrow', action='store_true', help='write an Arrow IPC file (needs pyarrow)')
+    args = parser.parse_args()
+    writer_class = ArrowColumnWriter if args.arrow else NpyColumnWriter
+    rows = exportSimulation(writer_class(args.output, args.chunk_rows), args.rounds, args.seed)
+    print(f"{rows} rounds written to {args.output}")
@@ -0,0 +1,230 @@
+# Module for composition-dependent expected values over a finite shoe
+#
+# A composition is the number of cards left of every value, ace (1) to ten
+# (10, pictures included), the cards the player has not seen, so the dealer's
+# hole card is part of it. Expected values are per unit of the initial bet
+# with the rules of BlackjackApp.startRound, as in blackjack_strategy, but
+# every card drawn is removed from the composition. Decisions face a dealer
+# without blackjack: the hole card never completes a natural. Split hands are
+# valued as independent hands drawing from the composition left after the
+# pair, without resplitting.
+#
+# Results are kept in an LRU cache keyed by the composition (packed into
+# bytes), the packed state of the hand (BlackjackCardSet.getState) and the up
+# card, so repeated queries within a shoe are dictionary lookups. The cache is
+# bounded by a number of entries, max_entries; an entry took about 500 bytes
+# when measured with tracemalloc (key, value and OrderedDict link), but the
+# size depends on the mix of entries, so the bound is not a byte limit.
+import argparse
+from collections import OrderedDict
+from blackjack_misc import Actions
+from blackjack_game import BLACKJACK
+from cards import BlackjackCardSet, Shoe, DECK, handOf
+
+DEALER_STAND = 17
+BUST = BLACKJACK + 1
+VALUES = tuple(range(1, 11))
+DECK_COMPOSITION = (4,) * 9 + (16,)
+# about 50 MB of entries
+DEFAULT_MAX_ENTRIES = 100000
+
+# kinds of cache entries
+_DEALER, _STAND, _HIT_STAND, _DOUBLE, _SPLIT, _ACTIONS = range(6)
+# value (minus 1) of every card index, to count a shoe with bytes.translate
+_VALUE_OF_INDEX = bytes(card.getValue()[0] - 1 for card in DECK) + bytes(256 - len(DECK))
+
+
+def shoeComposition(shoe: Shoe):
+    # cards left in a shoe by value
+    left = bytes(shoe.cards[shoe.cursor:]).translate(_VALUE_OF_INDEX)
+    return tuple(left.count(v - 1) for v in VALUES)
+
+
+def _high(low, has_ace):
+    return low + 10 if has_ace and low + 10 <= BLACKJACK else low
+
+
+class CompositionSolver(object):
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key):
+        value = self.cache.get(key)
+        if value is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return value
+
+    def _put(self, key, value):
+        self.cache[key] = value
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+        return value
+
+    def cacheInfo(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.cache),
+            'max_entries': self.max_entries
+        }
+
+    def clear(self):
+        self.cache.clear()
+
+    def dealerOutcome(self, comp, upcard):
+        # probabilities of the dealer's final score (index 0..21, BUST) for an up
+        # card, the hole card drawn from comp without completing a natural
+        key = (bytes(comp), _DEALER, upcard)
+        final = self._get(key)
+        if final is None:
+            final = self._put(key, tuple(self._dealerDraw(list(comp), upcard, upcard == 1, 1, {})))
+        return final
+
+    def _dealerDraw(self, comp, low, has_ace, count, memo):
+        # same stopping rule as BlackjackApp.canPlay for the dealer
+        high = low + 10 if has_ace else low
+        final = [0.0] * (BUST + 1)
+        if count >= 2 and (high if has_ace else low) >= DEALER_STAND:
+            score = high if high <= BLACKJACK else low
+            final[min(score, BUST)] = 1.0
+            return final
+        key = (bytes(comp), low, has_ace, count == 1)
+        if key in memo:
+            return memo[key]
+        total = sum(comp)
+        excluded = 0
+        if count == 1:
+            # the hole card cannot complete a natural blackjack
+            excluded = 10 if low == 1 else 1 if low == 10 else 0
+            total -= comp[excluded - 1] if excluded else 0
+        for value in VALUES:
+            n = comp[value - 1]
+            if n == 0 or value == excluded:
+                continue
+            comp[value - 1] -= 1
+            drawn = self._dealerDraw(comp, low + value, has_ace or value == 1, count + 1, memo)
+            comp[value - 1] += 1
+            p = n / total
+            for i in range(BUST + 1):
+                final[i] += p * drawn[i]
+        memo[key] = final
+        return final
+
+    def standEV(self, comp, score, upcard):
+        if score > BLACKJACK:
+            return -1.0
+        key = (bytes(comp), _STAND, score, upcard)
+        ev = self._get(key)
+        if ev is None:
+            final = self.dealerOutcome(comp, upcard)
+            ev = final[BUST] + sum(final[:score]) - sum(final[score + 1:BUST])
+            self._put(key, ev)
+        return ev
+
+    def hitStandEV(self, comp, low, has_ace, upcard):
+        # (ev, action) of the best play when only hitting or standing is allowed
+        high = _high(low, has_ace)
+        if low > BLACKJACK:
+            return -1.0, Actions.STAND
+        if low >= BLACKJACK or high == BLACKJACK:  # BlackjackApp.canPlay stops the hand
+            return self.standEV(comp, high, upcard), Actions.STAND
+        key = (bytes(comp), _HIT_STAND, low, has_ace, upcard)
+        result = self._get(key)
+        if result is None:
+            stand = self.standEV(comp, high, upcard)
+            hit = self.hitEV(comp, low, has_ace, upcard)
+            result = self._put(key, (hit, Actions.HIT) if hit > stand else (stand, Actions.STAND))
+        return result
+
+    def _eachCard(self, comp):
+        # (value, probability, composition left) of the next card
+        total = sum(comp)
+        comp = list(comp)
+        for value in VALUES:
+            n = comp[value - 1]
+            if n == 0:
+                continue
+            comp[value - 1] -= 1
+            yield value, n / total, tuple(comp)
+            comp[value - 1] += 1
+
+    def hitEV(self, comp, low, has_ace, upcard):
+        return sum(p * self.hitStandEV(left, low + value, has_ace or value == 1, upcard)[0]
+                   for value, p, left in self._eachCard(comp))
+
+    def doubleEV(self, comp, low, has_ace, upcard):
+        key = (bytes(comp), _DOUBLE, low, has_ace, upcard)
+        ev = self._get(key)
+        if ev is None:
+            ev = self._put(key, 2 * sum(p * self.standEV(left, _high(low + value, has_ace or value == 1), upcard)
+                                        for value, p, left in self._eachCard(comp)))
+        return ev
+
+    def splitEV(self, comp, value, upcard):
+        # two hands of one card each, split aces get one card and stand
+        key = (bytes(comp), _SPLIT, value, upcard)
+        ev = self._get(key)
+        if ev is None:
+            hand = 0.0
+            for drawn, p, left in self._eachCard(comp):
+                low, has_ace = value + drawn, value == 1 or drawn == 1
+                if value == 1:
+                    hand += p * self.standEV(left, _high(low, has_ace), upcard)
+                else:
+                    hand += p * self.hitStandEV(left, low, has_ace, upcard)[0]
+            ev = self._put(key, 2 * hand)
+        return ev
+
+    def actionEVs(self, hand: BlackjackCardSet, upcard, comp, actions=None):
+        # expected value of every action for a card set against the dealer's up
+        # card value, comp being the unseen cards by value
+        if len(comp) != len(VALUES) or min(comp) < 0 or sum(comp) == 0:
+            raise ValueError("A composition has a non-negative count for each of the 10 card values")
+        if actions is None:
+            actions = [Actions.HIT, Actions.STAND]
+            if len(hand.getCards()) == 2:
+                actions.append(Actions.DOUBLE)
+            if hand.canSplit():
+                actions.append(Actions.SPLIT)
+        mask = sum(1 << i for i, a in enumerate(Actions) if a in actions)
+        key = (bytes(comp), _ACTIONS, hand.getState(), upcard, mask)
+        evs = self._get(key)
+        if evs is not None:
+            return evs
+        low, has_ace = hand.getScore()[0], hand.hasAce()
+        high = _high(low, has_ace)
+        evs = {Actions.STAND: self.standEV(comp, high, upcard)}
+        if hand.isSplitFromAce():
+            return self._put(key, evs)
+        if Actions.HIT in actions and low < BLACKJACK and high != BLACKJACK:
+            evs[Actions.HIT] = self.hitEV(comp, low, has_ace, upcard)
+        if Actions.DOUBLE in actions and low < BLACKJACK and high != BLACKJACK:
+            evs[Actions.DOUBLE] = self.doubleEV(comp, low, has_ace, upcard)
+        if Actions.SPLIT in actions and hand.canSplit():
+            evs[Actions.SPLIT] = self.splitEV(comp, hand.getCard(0).getValue()[0], upcard)
+        return self._put(key, evs)
+
+    def bestAction(self, hand: BlackjackCardSet, upcard, comp, actions=None):
+        evs = self.actionEVs(hand, upcard, comp, actions)
+        return max(evs, key=evs.get)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('cards', type=int, nargs='+', help="values of the player's cards (1 for an ace)")
+    parser.add_argument('-upcard', type=int, required=True, help="value of the dealer's up card")
+    parser.add_argument('-decks', type=int, default=6)
+    parser.add_argument('-removed', type=int, nargs='*', default=[], help='values of other cards already dealt')
+    args = parser.parse_args()
+    comp = [n * args.decks for n in DECK_COMPOSITION]
+    for value in args.cards + [args.upcard] + args.removed:
+        comp[value - 1] -= 1
+    solver = CompositionSolver()
+    for action, ev in sorted(solver.actionEVs(handOf(args.cards), args.upcard, comp).items(), key=lambda a: -a[1]):
+        print(f"{action.value:<8}{ev:+.4f}")
@@ -0,0 +1,277 @@
+# Module for card counting over a finite shoe
+#
+# Every count system gives a tag to each card value (ace counted as 1, tens and
+# faces share the value 10). CountTracker keeps the running count of several
+# systems, updated from a per card index table, and the true count: running
+# count per deck left in the shoe. For unbalanced systems (KO) the expected
+# drift of the running count is taken out first, so every true count is
+# centred on 0. CountingShoe is a Shoe that feeds a tracker with every card
+# it deals and resets it when reshuffled; BlackjackApp hands the tracker to
+# its interface before every bet. The dealer's hole card is dealt face down:
+# the game takes it back from the count with hide() and counts it again with
+# reveal() when it is turned over, so a strategy never counts a card the
+# player cannot see.
+#
+# The analysis mode samples shoe compositions after a random number of dealt
+# cards, plays a round (or a pair of playing decisions) from each remaining
+# composition with NumPy and estimates the effect of removal of every card
+# value by least squares. A system's betting correlation is the correlation
+# of its tags with the effects of removal on the round result, its playing
+# efficiency the mean correlation with the effects of removal on the gain of
+# a set of playing decisions.
+import argparse
+import random
+import numpy as np
+from blackjack_batch import BatchEngine
+from cards import Shoe, DECK, DECK_SIZE
+
+# tags by card value 1 (ace) .. 10
+COUNT_SYSTEMS = {
+    'hi-lo': (-1, 1, 1, 1, 1, 1, 0, 0, 0, -1),
+    'ko': (-1, 1, 1, 1, 1, 1, 1, 0, 0, -1),
+    'omega-ii': (0, 1, 1, 2, 2, 2, 1, 0, -1, -2),
+    'zen': (-1, 1, 1, 2, 2, 2, 1, 0, 0, -2),
+}
+# number of cards of every value in a deck
+VALUE_COUNTS = np.array([4] * 9 + [16], dtype=np.int64)
+
+
+def tagTable(systems):
+    # tags of every card index, one tuple with a tag per system
+    return tuple(tuple(COUNT_SYSTEMS[s][card.getValue()[0] - 1] for s in systems) for card in DECK)
+
+
+def deckImbalance(system):
+    # sum of the tags of a whole deck, 0 for balanced systems
+    return int(np.dot(COUNT_SYSTEMS[system], VALUE_COUNTS))
+
+
+class CountTracker(object):
+    def __init__(self, decks, systems=tuple(COUNT_SYSTEMS)):
+        self.decks = decks
+        self.systems = tuple(systems)
+        self.tags = tagTable(self.systems)
+        self.imbalance = tuple(deckImbalance(s) / DECK_SIZE for s in self.systems)
+        self.positions = {s: i for i, s in enumerate(self.systems)}
+        self.reset()
+
+    def reset(self):
+        self.running = [0] * len(self.systems)
+        self.seen = 0
+        self.hidden = []
+
+    def see(self, card):
+        tags = self.tags[card.index]
+        running = self.running
+        for i in range(len(tags)):
+            running[i] += tags[i]
+        self.seen += 1
+
+    def hide(self, card):
+        # takes a card seen when dealt back out of the count, until reveal()
+        tags = self.tags[card.index]
+        running = self.running
+        for i in range(len(tags)):
+            running[i] -= tags[i]
+        self.seen -= 1
+        self.hidden.append(card)
+
+    def reveal(self):
+        # counts the hidden cards, now face up
+        for card in self.hidden:
+            self.see(card)
+        self.hidden = []
+
+    def decksRemaining(self):
+        return (self.decks * DECK_SIZE - self.seen) / DECK_SIZE
+
+    def runningCount(self, system='hi-lo'):
+        return self.running[self.positions[system]]
+
+    def trueCount(self, system='hi-lo'):
+        i = self.positions[system]
+        left = max(self.decksRemaining(), 1 / DECK_SIZE)
+        return (self.running[i] - self.imbalance[i] * self.seen) / left
+
+    def snapshot(self):
+        return {s: {'running': self.runningCount(s), 'true': self.trueCount(s)} for s in self.systems}
+
+
+class CountingShoe(Shoe):
+    def __init__(self, decks=6, penetration=0.75, rng=random, systems=tuple(COUNT_SYSTEMS)):
+        self.tracker = CountTracker(decks, systems)
+        super().__init__(decks, penetration, rng)
+
+    def draw(self):
+        card = super().draw()
+        self.tracker.see(card)
+        return card
+
+    def shuffle(self):
+        super().shuffle()
+        self.tracker.reset()
+
+    def _reshuffleDiscards(self):
+        # the count restarts with the cards of the round, a hole card still hidden
+        if self.round_start == 0:
+            return super()._reshuffleDiscards()
+        in_play = [DECK[idx] for idx in self.cards[self.round_start:]]
+        hidden = self.tracker.hidden
+        super()._reshuffleDiscards()
+        self.tracker.reset()
+        for card in in_play:
+            self.tracker.see(card)
+        for card in hidden:
+            self.tracker.hide(card)
+
+
+# playing decisions of the analysis: (player hard total, dealer up card,
+# action gaining with a high count, action gaining with a low count)
+PLAYING_DECISIONS = (
+    (16, 10, 'stand', 'hit'), (15, 10, 'stand', 'hit'), (12, 2, 'stand', 'hit'), (12, 3, 'stand', 'hit'),
+    (13, 2, 'stand', 'hit'), (9, 2, 'double', 'hit'), (10, 10, 'double', 'hit'), (11, 1, 'double', 'hit'),
+)
+_DRAWS = 12
+
+
+def sampleCompositions(decks, samples, penetration=0.75, rng=None):
+    # number of dealt cards of every value for samples shoes dealt to a random depth
+    rng = rng if rng is not None else np.random.default_rng()
+    depth = rng.integers(1, int(decks * DECK_SIZE * penetration) + 1, size=samples)
+    dealt = np.empty((samples, VALUE_COUNTS.size), dtype=np.int64)
+    for d in np.unique(depth):
+        rows = np.flatnonzero(depth == d)
+        dealt[rows] = rng.multivariate_hypergeometric(VALUE_COUNTS * decks, d, size=rows.size)
+    return dealt
+
+
+def trueCounts(dealt, decks, system):
+    # true counts of dealt compositions, from vectorised tag sums
+    seen = dealt.sum(axis=1)
+    running = dealt @ np.array(COUNT_SYSTEMS[system])
+    left = (decks * DECK_SIZE - seen) / DECK_SIZE
+    return (running - deckImbalance(system) / DECK_SIZE * seen) / left
+
+
+class _CompositionEngine(BatchEngine):
+    # every round draws from the remaining composition of its own shoe
+    def __init__(self, table, cdf, seed=None):
+        super().__init__(table, bet=1, seed=seed)
+        self.cdf = cdf
+
+    def _drawValues(self, size, rows=None):
+        u = self.rng.random(size)
+        cdf = self.cdf if rows is None else self.cdf[rows]
+        if u.ndim > 1:
+            return (u[..., None] >= cdf[:, None, :]).sum(axis=-1).astype(np.int8) + 1
+        return (u[:, None] >= cdf).sum(axis=1).astype(np.int8) + 1
+
+
+def _draw(cdf, u):
+    return np.minimum((u[:, None] >= cdf).sum(axis=1), 9) + 1
+
+
+def _high(low, has_ace):
+    return np.where(has_ace & (low + 10 <= 21), low + 10, low)
+
+
+def _decisionResult(total, upcard, action, cdf, u_player, u_dealer):
+    # result in bets of playing a hard total against the up card, the player's
+    # and the dealer's cards coming from their own random streams
+    n = cdf.shape[0]
+    low = np.full(n, total)
+    has_ace = np.zeros(n, dtype=bool)
+    if action != 'stand':
+        for j in range(_DRAWS if action == 'hit' else 1):
+            drawing = _high(low, has_ace) < 17 if action == 'hit' else np.ones(n, dtype=bool)
+            values = _draw(cdf, u_player[:, j])
+            low = np.where(drawing, low + values, low)
+            has_ace |= drawing & (values == 1)
+    player = _high(low, has_ace)
+
+    dealer = np.full(n, upcard)
+    dealer_ace = np.full(n, upcard == 1)
+    for j in range(_DRAWS):
+        drawing = np.where(dealer_ace, dealer + 10 < 17, dealer < 17) if j else np.ones(n, dtype=bool)
+        values = _draw(cdf, u_dealer[:, j])
+        dealer = np.where(drawing, dealer + values, dealer)
+        dealer_ace |= drawing & (values == 1)
+        if j == 0:
+            dealer_bj = dealer_ace & (dealer == 11)
+    dealer_high = _high(dealer, dealer_ace)
+
+    result = np.where(low > 21, -1, np.where((dealer_high > 21) | (player > dealer_high), 1,
+                                             np.where(player == dealer_high, 0, -1)))
+    return result * (2 if action == 'double' else 1), dealer_bj
+
+
+def _removalEffects(dealt, decks, results):
+    # least squares effect on results of removing one card of every value
+    remaining = VALUE_COUNTS * decks - dealt
+    share = remaining / remaining.sum(axis=1, keepdims=True)
+    beta = np.linalg.lstsq(share, results.astype(np.float64), rcond=None)[0]
+    return -beta
+
+
+def _correlation(tags, effects):
+    # correlation of tags and effects of removal weighted by card frequency
+    w = VALUE_COUNTS / VALUE_COUNTS.sum()
+    tags = np.asarray(tags, dtype=np.float64)
+    t, e = tags - w @ tags, effects - w @ effects
+    return float((w * t * e).sum() / np.sqrt((w * t * t).sum() * (w * e * e).sum()))
+
+
+def analyseSystems(table, decks=6, samples=10 ** 6, penetration=0.75, seed=None, chunk_size=200000):
+    # betting correlation and playing efficiency of every count system, and
+    # the correlation of its true count with the round result
+    rng = np.random.default_rng(seed)
+    dealt_chunks, round_chunks, gain_chunks, true_chunks = [], [], [], {s: [] for s in COUNT_SYSTEMS}
+    while samples > 0:
+        n = min(samples, chunk_size)
+        dealt = sampleCompositions(decks, n, penetration, rng)
+        remaining = VALUE_COUNTS * decks - dealt
+        cdf = np.cumsum(remaining / remaining.sum(axis=1, keepdims=True), axis=1)
+        cdf[:, -1] = 2.0  # guard against rounding, every u < 1 falls in a value
+        engine = _CompositionEngine(table, cdf, seed=rng.integers(2 ** 63))
+        round_chunks.append(engine.playRounds(n)[1])
+        gains = []
+        for total, upcard, high_action, low_action in PLAYING_DECISIONS:
+            u_player, u_dealer = rng.random((n, _DRAWS)), rng.random((n, _DRAWS))
+            high, dealer_bj = _decisionResult(total, upcard, high_action, cdf, u_player, u_dealer)
+            low = _decisionResult(total, upcard, low_action, cdf, u_player, u_dealer)[0]
+            gains.append(np.where(dealer_bj, 0, high - low))
+        gain_chunks.append(np.stack(gains, axis=1))
+        dealt_chunks.append(dealt)
+        for s in COUNT_SYSTEMS:
+            true_chunks[s].append(trueCounts(dealt, decks, s))
+        samples -= n
+
+    dealt = np.concatenate(dealt_chunks)
+    rounds = np.concatenate(round_chunks)
+    gains = np.concatenate(gain_chunks)
+    round_effects = _removalEffects(dealt, decks, rounds)
+    decision_effects = [_removalEffects(dealt, decks, gains[:, i]) for i in range(len(PLAYING_DECISIONS))]
+    report = {}
+    for s, tags in COUNT_SYSTEMS.items():
+        true = np.concatenate(true_chunks[s])
+        report[s] = {
+            'betting_correlation': _correlation(tags, round_effects),
+            'playing_efficiency': float(np.mean([_correlation(tags, e) for e in decision_effects])),
+            'result_correlation': float(np.corrcoef(true, rounds)[0, 1])
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-decks', type=int, default=6)
+    parser.add_argument('-samples', type=int, default=10 ** 6)
+    parser.add_argument('-penetration', type=float, default=0.75)
+    parser.add_argument('-seed', type=int, default=None)
+    args = parser.parse_args()
+    from blackjack_tables import basicStrategy
+    report = analyseSystems(basicStrategy().first, args.decks, args.samples, args.penetration, args.seed)
+    print(f"{'system':<10}{'BC':>8}{'PE':>8}{'TC/result':>11}")
+    for name, stats in report.items():
+        print(f"{name:<10}{stats['betting_correlation']:>8.3f}{stats['playing_efficiency']:>8.3f}"
+              f"{stats['result_correlation']:>11.4f}")
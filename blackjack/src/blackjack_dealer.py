@@ -0,0 +1,63 @@
+# Module for exact probabilities of the dealer's final score
+#
+# BlackjackApp.drawCard picks every rank with the same chance (an infinite deck),
+# so the dealer's final score only depends on the low total, whether the set has
+# an ace and how many cards it holds. Dealer stops by the same rule as
+# BlackjackApp.canPlay: with an ace, once the total counting it as 11 reaches 17
+# (even if that total is over 21, so the dealer can stand below 17), otherwise
+# once the total reaches 17. Final scores are counted as in getHighScore.
+from functools import lru_cache
+from cards import BlackjackCardSet, RANKS
+
+BLACKJACK = 21
+DEALER_STAND = 17
+# indices of the outcome vector: 0..21 final score, then bust and blackjack
+BUST = 22
+NATURAL = 23
+OUTCOME_SIZE = 24
+# probability of drawing each card value (ace counted as 1)
+VALUE_PROBS = tuple(
+    (value, sum(1 for rec in RANKS if rec[1][0] == value) / len(RANKS)) for value in range(1, 11)
+)
+
+
+@lru_cache(maxsize=None)
+def dealerFinal(low, has_ace=False, count=1):
+    # outcome vector of the dealer's final score, from a set with the given low total
+    count = min(count, 3)  # card count only matters for a natural blackjack
+    final = [0.0] * OUTCOME_SIZE
+    high = low + 10 if has_ace else low
+    if count == 2 and has_ace and high == BLACKJACK:
+        final[NATURAL] = 1.0
+    elif count >= 2 and high >= DEALER_STAND:
+        score = high if high <= BLACKJACK else low
+        final[min(score, BUST)] = 1.0
+    else:
+        for value, prob in VALUE_PROBS:
+            drawn = dealerFinal(low + value, has_ace or value == 1, count + 1)
+            for i in range(OUTCOME_SIZE):
+                final[i] += prob * drawn[i]
+    return tuple(final)
+
+
+def _asDict(final, no_blackjack):
+    scale = 1.0
+    if no_blackjack:
+        scale = 1.0 / (1.0 - final[NATURAL])
+    probs = {score: final[score] * scale for score in range(BLACKJACK + 1) if final[score] > 0}
+    probs['bust'] = final[BUST] * scale
+    probs['blackjack'] = 0.0 if no_blackjack else final[NATURAL]
+    return probs
+
+
+def dealerProbabilities(upcard, no_blackjack=False):
+    # final score probabilities for an up card value (1 for an ace, 10 for pictures);
+    # no_blackjack conditions on the dealer not having a natural blackjack
+    return _asDict(dealerFinal(upcard, upcard == 1, 1), no_blackjack)
+
+
+def cardSetProbabilities(hand: BlackjackCardSet, no_blackjack=False):
+    # final score probabilities for a partially dealt dealer card set, hidden cards included
+    cards = hand.getCards()
+    low = sum(c.getValue()[0] for c in cards)
+    return _asDict(dealerFinal(low, hand.hasAce(), len(cards)), no_blackjack)
@@ -1,18 +1,36 @@
 # Game of Blackjack
 import argparse
-from random import randint
+import random
 import blackjack_interface
 from blackjack_misc import Actions, Outcome
-from cards import Card, BlackjackCardSet, SUITS, RANKS
+from cards import BlackjackCardSet, Shoe
+from card_sources import cardSource
+from blackjack_timing import NULL_TIMER, PhaseTimer, TimedInterface
 
 BLACKJACK = 21
 MAX_HANDS = 4
 STD_BET = 10
+# a game ends once the balance is below the smallest bet
+MIN_BALANCE = 10
+MESSAGES = {
+    'win': "You won!\n",
+    'blackjack': "Blackjack! You won!\n",
+    'loss': "You lost!\n",
+    'tie': "It's a tie!\n"
+}
 
 class BlackjackApp(object):
-    def __init__(self, interface):
+    def __init__(self, interface, rng=random, shoe: Shoe = None, timer=NULL_TIMER):
+        # rng: random module, random.Random, NumPy Generator or any card source
+        # timer: a PhaseTimer to record the time of round phases and interface calls
         self.name = "Blackjack Game"
-        self.interface = interface
+        self.timer = timer
+        self.interface = TimedInterface(interface, timer) if timer.enabled else interface
+        self.rng = rng
+        self.shoe = shoe
+        # card counts of a CountingShoe, shown to the interface before every bet
+        self.tracker = getattr(shoe, 'tracker', None)
+        self.card_source = shoe if shoe is not None else cardSource(rng)
         self.balance = 100
         self.bet = STD_BET
         self.bets = [STD_BET]
@@ -28,11 +46,7 @@ class BlackjackApp(object):
             self.balance = self.balance + self.bets[hand]
 
     def drawCard(self):
-        # generate a random suit out of 4 possible
-        suit = SUITS[randint(0, 3)]
-        # generate a random card out of 13 possible
-        rank = RANKS[randint(0, 12)][0]
-        return Card(suit, rank)
+        return self.card_source.draw()
 
     def canPlay(self, hand: BlackjackCardSet, is_dealer=False):
         can_play = True
@@ -51,12 +65,30 @@ class BlackjackApp(object):
             return False
         return True
 
+    def answerSteps(self, steps):
+        # runs the steps of the game, a round, a hand or the player's hands,
+        # answering every request they yield, (method name, arguments), with the
+        # interface, or with the app for a whole round
+        try:
+            request = next(steps)
+            while True:
+                name, args = request
+                target = self if name == 'startRound' else self.interface
+                request = steps.send(getattr(target, name)(*args))
+        except StopIteration as stop:
+            return stop.value
+
     def playHand(self, hand_idx, is_dealer=False, actions=[]):
+        return self.answerSteps(self.handSteps(hand_idx, is_dealer, actions))
+
+    def handSteps(self, hand_idx, is_dealer=False, actions=[]):
+        start = self.timer.now()
         hand = self.dealer_hand if is_dealer else self.player_hand[hand_idx]
         action = Actions.HIT
         while self.canPlay(hand, is_dealer):
             if not is_dealer:
-                action = self.interface.getAction(actions)
+                action = yield 'getAction', (actions,)
+                self.onAction(hand_idx, action)
             
             if action == Actions.STAND:
                 break
@@ -79,6 +111,7 @@ class BlackjackApp(object):
                 hand.addCard(self.drawCard())
                 self.interface.updateCardView(hand, is_dealer=is_dealer)
             actions = [Actions.HIT, Actions.STAND]  # limit available actions after the first hit
+        self.timer.record('playHand.dealer' if is_dealer else 'playHand.player', start)
 
     def getHighScore(self, hand: BlackjackCardSet):
         score = hand.getScore()[1] if (0 < hand.getScore()[1] <= 21) \
@@ -88,15 +121,19 @@ class BlackjackApp(object):
     def placeBet(self, hand: int):
         self.balance = self.balance - self.bets[hand]
 
+    def onAction(self, hand: int, action):
+        # called with every decision of the player, before it is played
+        pass
+
     def startRound(self):
+        return self.answerSteps(self.roundSteps())
+
+    def roundSteps(self):
+        # rules of a round, the player's decisions are requested from the caller
+        timer = self.timer
+        t = timer.now()
         hidden_idx = 0
-        tie_msg, win_msg, loss_msg = "It's a tie!\n", "You won!\n", "You lost!\n"
-        messages = {
-            'win': win_msg,
-            'blackjack' : "Blackjack! " + win_msg,
-            'loss': loss_msg,
-            'tie':tie_msg
-        }
+        self.prepareShoe()
         self.placeBet(0)
         self.interface.updateBalanceDisplay(self.balance)
         # deal 2 initial cards for both
@@ -104,34 +141,57 @@ class BlackjackApp(object):
             self.player_hand[0].addCard(self.drawCard())
             self.dealer_hand.addCard(self.drawCard())
         # hide the 1st card
-        self.dealer_hand.hideCard(hidden_idx)
+        self.hideHoleCard(hidden_idx)
 
         self.interface.updateCardView(self.player_hand[0])
         self.interface.updateCardView(self.dealer_hand, is_dealer=True)
+        t = timer.record('round.deal', t)
 
         # analyse player's cards for a NATURAL Blackjack
         if self.player_hand[0].hasBlackjack():
             # compare to dealer's cards if NATURAL Blackjack
-            self.dealer_hand.revealCard(hidden_idx)
+            self.revealHoleCard(hidden_idx)
             self.interface.updateCardView(self.dealer_hand, is_dealer=True)
             if self.dealer_hand.hasBlackjack():
-                self.interface.showOutcomeMessage(messages[Outcome.TIE.value])
+                self.interface.showOutcomeMessage(MESSAGES[Outcome.TIE.value])
                 self.adjustBalance(Outcome.TIE, 0)
             else:
-                self.interface.showOutcomeMessage(messages[Outcome.BLACKJACK.value])
+                self.interface.showOutcomeMessage(MESSAGES[Outcome.BLACKJACK.value])
                 self.adjustBalance(Outcome.BLACKJACK, 0)
+            timer.record('round.settle', t)
             return
 
         # analyse dealer's cards for a NATURAL Blackjack (if up card is 11 or 10)
         if self.dealer_hand.hasBlackjack():
-            self.dealer_hand.revealCard(hidden_idx)
+            self.revealHoleCard(hidden_idx)
             self.interface.updateCardView(self.dealer_hand, is_dealer=True)
-            self.interface.showOutcomeMessage("Dealer's got Blackjack! " + messages[Outcome.LOSS.value])
+            self.interface.showOutcomeMessage("Dealer's got Blackjack! " + MESSAGES[Outcome.LOSS.value])
+            self.adjustBalance(Outcome.LOSS, 0)
+            timer.record('round.settle', t)
             return
 
         # allow splitting 2 same value cards, up to 4 hands allowed
         # doubling allowed on initial 2 cards, cannot combine with splitting
         # player Hits or Stands
+        not_bust_indices = yield from self.playerHandsSteps()
+        if not_bust_indices is None:
+            return
+        t = timer.record('round.player', t)
+
+        # dealer Hits until result >= 17
+        self.revealHoleCard(hidden_idx)
+        self.interface.updateCardView(self.dealer_hand, is_dealer=True)
+        yield from self.handSteps(None, is_dealer=True)
+        t = timer.record('round.dealer', t)
+        self.settleHands(not_bust_indices, self.getHighScore(self.dealer_hand))
+        timer.record('round.settle', t)
+
+    def playPlayerHands(self):
+        return self.answerSteps(self.playerHandsSteps())
+
+    def playerHandsSteps(self):
+        # plays every hand of the player, split hands included, and returns the
+        # indices of the hands not bust (last first), None if the interface closed
         valid_hands = []
         for i in range(MAX_HANDS):
             if len(self.player_hand[i].getCards()) < 2:
@@ -144,12 +204,13 @@ class BlackjackApp(object):
             if i < MAX_HANDS - 1 and self.player_hand[i].canSplit() and self.balance >= self.bet:
                 actions_opt.append(Actions.SPLIT)
 
-            self.playHand(i, actions=actions_opt)
+            yield from self.handSteps(i, actions=actions_opt)
             if not self.interface.isAlive():
-                return
+                return None
             success = self.isSuccessful(self.player_hand[i])
             valid_hands.append(success)
             if not success:
+                self.adjustBalance(Outcome.LOSS, i)
                 if len(self.player_hand) > i + 1 or valid_hands.count(True) == 0:
                     self.interface.showOutcomeMessage("Bust!\n", no_button=True)
                 else:
@@ -162,17 +223,14 @@ class BlackjackApp(object):
 
         not_bust_indices = [i for i in range(len(valid_hands)) if valid_hands[i]]
         not_bust_indices.reverse()
+        return not_bust_indices
 
-        # dealer Hits until result >= 17
-        self.dealer_hand.revealCard(hidden_idx)
-        self.interface.updateCardView(self.dealer_hand, is_dealer=True)
-        self.playHand(None, is_dealer=True)
+    def settleHands(self, not_bust_indices, dealer_high):
+        # compare the hands not bust to the dealer's final score
         if len(not_bust_indices) == 0:
-            self.interface.showOutcomeMessage(messages[Outcome.LOSS.value])
+            self.interface.showOutcomeMessage(MESSAGES[Outcome.LOSS.value])
             return
 
-        # compare results to player
-        dealer_high = self.getHighScore(self.dealer_hand)
         extra_msg = "" if dealer_high < 22 else "Dealer bust! "
         for v in not_bust_indices:
             player_high = self.getHighScore(self.player_hand[v])
@@ -185,31 +243,59 @@ class BlackjackApp(object):
                 outcome = Outcome.LOSS
             self.interface.showSettledCardView(self.player_hand[v], v)
             msg_btn_text = 'back' if v == not_bust_indices[-1] else 'next result'
-            self.interface.showOutcomeMessage(extra_msg + messages[outcome.value], button_text=msg_btn_text)
+            self.interface.showOutcomeMessage(extra_msg + MESSAGES[outcome.value], button_text=msg_btn_text)
             self.adjustBalance(outcome, v)
             if not outcome == Outcome.LOSS:
                 self.interface.updateBalanceDisplay(self.balance)
 
+    def prepareShoe(self):
+        # reshuffle the shoe between rounds once the cut card is reached, the
+        # cards dealt before the round are its discards
+        if self.shoe is not None:
+            if self.shoe.needsShuffle():
+                self.shoe.shuffle()
+            self.shoe.newRound()
+
+    def hideHoleCard(self, idx):
+        # the hole card is only counted once revealed
+        self.dealer_hand.hideCard(idx)
+        if self.tracker is not None:
+            self.tracker.hide(self.dealer_hand.getCard(idx))
+
+    def revealHoleCard(self, idx):
+        self.dealer_hand.revealCard(idx)
+        if self.tracker is not None:
+            self.tracker.reveal()
+
     def resetCards(self):
+        # a hole card the round ended without revealing is shown with the discards
+        if self.tracker is not None:
+            self.tracker.reveal()
         self.player_hand = [BlackjackCardSet()]
         self.dealer_hand = BlackjackCardSet()
 
     def runGame(self):
+        return self.answerSteps(self.gameSteps())
+
+    def gameSteps(self):
         # welcome message
         self.interface.greet()
         self.interface.updateBalanceDisplay(self.balance)
         # start round or exit game
-        while self.interface.isAlive() and self.balance >= 10 and self.interface.wantsToPlay():
-            self.setBet(self.interface.getBet(self.balance))
+        while self.interface.isAlive() and self.balance >= MIN_BALANCE and (yield 'wantsToPlay', ()):
+            if self.tracker is not None:
+                self.prepareShoe()
+                self.interface.updateCountDisplay(self.tracker)
+            self.setBet((yield 'getBet', (self.balance,)))
             if not self.interface.isAlive():
                 break
             self.interface.initializeView()
-            self.startRound()
+            yield 'startRound', ()
             self.resetCards()
             self.interface.clear()
             self.interface.updateBalanceDisplay(self.balance)
 
-        if self.balance < 10:
+        if self.balance < MIN_BALANCE:
             self.interface.close()
         
     def setBet(self, bet):
@@ -219,8 +305,18 @@ class BlackjackApp(object):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('-interface', default='GraphicInterface', choices=['TextInterface', 'GraphicInterface'])
+    parser.add_argument('-decks', type=int, default=0, help='number of decks in the shoe, 0 for an infinite deck')
+    parser.add_argument('-count', action='store_true', help='show the card counts of the shoe before every bet')
+    parser.add_argument('-timing', action='store_true', help='print the time spent in each phase on exit')
     args = parser.parse_args()
     interface_class = getattr(blackjack_interface, args.interface)
     interface = interface_class()
-    app = BlackjackApp(interface)
+    shoe = Shoe(args.decks) if args.decks > 0 else None
+    if args.count and args.decks > 0:
+        from blackjack_counting import CountingShoe
+        shoe = CountingShoe(args.decks)
+    timer = PhaseTimer() if args.timing else NULL_TIMER
+    app = BlackjackApp(interface, shoe=shoe, timer=timer)
     app.runGame()
+    if args.timing:
+        print(timer.report())
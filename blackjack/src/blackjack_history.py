@@ -0,0 +1,190 @@
+# Module for a SQLite store of played hands
+#
+# HistoryApp is a BlackjackApp keeping the history of every round in a
+# HandHistory: the bet, the cards of every hand (splits included) and of the
+# dealer, the decisions taken and the Outcome and net win of every hand.
+# Cards are stored as blobs of card indices, actions and outcomes as their
+# index in Actions and Outcome (the codes of blackjack_log).
+#
+# The database runs in WAL mode and rounds are inserted in one transaction
+# per batch_rounds rounds. Every decision is a row of the decisions table with
+# the player's total (soft or hard) and the dealer's up card when it was taken
+# and the net win of its hand, a split credited with the net of every hand it
+# made (the split hand and the hands split from it), indexed by (total, soft, upcard, action, net) so
+# that the results of a play, e.g. hard 16 against a 10, are read from the
+# index alone.
+import argparse
+import random
+import sqlite3
+from blackjack_game import BlackjackApp
+from blackjack_interface import HeadlessInterface
+from blackjack_log import ACTION_LIST, OUTCOME_LIST
+from blackjack_misc import Actions, Outcome
+from blackjack_timing import NULL_TIMER
+
+BATCH_ROUNDS = 1000
+# net win of a hand in bets, per outcome
+OUTCOME_UNITS = {Outcome.BLACKJACK: 2, Outcome.WIN: 1, Outcome.TIE: 0, Outcome.LOSS: -1}
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS rounds (
+        id INTEGER PRIMARY KEY,
+        bet INTEGER NOT NULL,
+        dealer_cards BLOB NOT NULL,
+        net INTEGER NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS hands (
+        round_id INTEGER NOT NULL,
+        hand INTEGER NOT NULL,
+        cards BLOB NOT NULL,
+        bet INTEGER NOT NULL,
+        outcome INTEGER,
+        net INTEGER,
+        PRIMARY KEY (round_id, hand)
+    ) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS decisions (
+        round_id INTEGER NOT NULL,
+        hand INTEGER NOT NULL,
+        step INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        soft INTEGER NOT NULL,
+        upcard INTEGER NOT NULL,
+        action INTEGER NOT NULL,
+        net INTEGER,
+        PRIMARY KEY (round_id, hand, step)
+    ) WITHOUT ROWID''',
+    'CREATE INDEX IF NOT EXISTS decisions_by_play ON decisions (total, soft, upcard, action, net)',
+)
+
+
+class HandHistory(object):
+    def __init__(self, path=':memory:', batch_rounds=BATCH_ROUNDS):
+        self.path = path
+        self.batch_rounds = batch_rounds
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+        self.next_id = self.conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM rounds').fetchone()[0]
+        self.rounds, self.hands, self.decisions = [], [], []
+
+    def addRound(self, bet, dealer_cards, hands, decisions, net):
+        # hands: (cards, bet, outcome, net) per hand, outcome and net None if not settled
+        # decisions: (hand, total, soft, upcard, action, credited) in the order taken,
+        # credited the hands whose net wins make the result of the decision
+        round_id = self.next_id
+        self.next_id += 1
+        self.rounds.append((round_id, bet, bytes(c.index for c in dealer_cards), net))
+        for i, (cards, hand_bet, outcome, hand_net) in enumerate(hands):
+            code = None if outcome is None else OUTCOME_LIST.index(outcome)
+            self.hands.append((round_id, i, bytes(c.index for c in cards), hand_bet, code, hand_net))
+        for step, (hand, total, soft, upcard, action, credited) in enumerate(decisions):
+            nets = [hands[i][3] for i in credited]
+            net = None if None in nets else sum(nets)
+            self.decisions.append((round_id, hand, step, total, soft, upcard, ACTION_LIST.index(action), net))
+        if len(self.rounds) >= self.batch_rounds:
+            self.flush()
+        return round_id
+
+    def flush(self):
+        # writes the pending rounds in one transaction
+        if not self.rounds:
+            return
+        with self.conn:
+            self.conn.executemany('INSERT INTO rounds VALUES (?, ?, ?, ?)', self.rounds)
+            self.conn.executemany('INSERT INTO hands VALUES (?, ?, ?, ?, ?, ?)', self.hands)
+            self.conn.executemany('INSERT INTO decisions VALUES (?, ?, ?, ?, ?, ?, ?, ?)', self.decisions)
+        self.rounds, self.hands, self.decisions = [], [], []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def roundCount(self):
+        self.flush()
+        return self.conn.execute('SELECT COUNT(*) FROM rounds').fetchone()[0]
+
+    def playResults(self, total, upcard, soft=False):
+        # per action taken with the total against the up card value: number of
+        # decisions, net win of their hands and mean net win
+        self.flush()
+        rows = self.conn.execute(
+            'SELECT action, COUNT(*), SUM(net) FROM decisions '
+            'WHERE total = ? AND soft = ? AND upcard = ? AND net IS NOT NULL GROUP BY action',
+            (total, int(soft), upcard))
+        return {ACTION_LIST[action]: {'count': n, 'net': net, 'mean': net / n} for action, n, net in rows}
+
+
+class HistoryApp(BlackjackApp):
+    # BlackjackApp keeping every round in a HandHistory
+    def __init__(self, interface, history: HandHistory, rng=random, shoe=None, timer=NULL_TIMER):
+        super().__init__(interface, rng, shoe, timer)
+        self.history = history
+        self.decisions = []
+        self.outcomes = {}
+        self.splits = {}
+
+    def adjustBalance(self, outcome, hand: int):
+        self.outcomes[hand] = outcome
+        super().adjustBalance(outcome, hand)
+
+    def onAction(self, hand: int, action):
+        # records the player's total and the up card with every decision
+        low, high = self.player_hand[hand].getScore()
+        soft = 0 < high <= 21
+        upcard = self.dealer_hand.getCard(1).getValue()[0]
+        self.decisions.append((hand, high if soft else low, soft, upcard, action))
+        if action == Actions.SPLIT:
+            # the hand split off is appended to the player's hands
+            self.splits.setdefault(hand, []).append(len(self.player_hand))
+
+    def startRound(self):
+        before = self.balance
+        self.decisions = []
+        self.outcomes = {}
+        self.splits = {}
+        super().startRound()
+        self.recordRound(before)
+
+    def recordRound(self, before):
+        hands = []
+        for i, hand in enumerate(self.player_hand):
+            outcome = self.outcomes.get(i)
+            net = None if outcome is None else OUTCOME_UNITS[outcome] * self.bets[i]
+            hands.append((hand.getCards(), self.bets[i], outcome, net))
+        decisions = []
+        for hand, total, soft, upcard, action in self.decisions:
+            credited = self.splitHands(hand) if action == Actions.SPLIT else [hand]
+            decisions.append((hand, total, soft, upcard, action, credited))
+        self.history.addRound(self.bet, self.dealer_hand.getCards(), hands, decisions, self.balance - before)
+
+    def splitHands(self, hand):
+        # the hand and every hand split from it, directly or not
+        hands = [hand]
+        for child in self.splits.get(hand, []):
+            hands.extend(self.splitHands(child))
+        return hands
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('database', help='SQLite database file, created if missing')
+    parser.add_argument('-play', type=int, default=0, help='headless rounds to play and store first')
+    parser.add_argument('-seed', type=int, default=None)
+    parser.add_argument('-total', type=int, default=16, help="player's total of the play to query")
+    parser.add_argument('-upcard', type=int, default=10, help="dealer's up card value of the play to query")
+    parser.add_argument('-soft', action='store_true')
+    args = parser.parse_args()
+    history = HandHistory(args.database)
+    if args.play:
+        app = HistoryApp(HeadlessInterface(rounds=args.play), history, rng=random.Random(args.seed))
+        app.balance = 10 ** 9
+        app.runGame()
+    print(f"{history.roundCount()} rounds stored")
+    kind = 'soft' if args.soft else 'hard'
+    for action, stats in history.playResults(args.total, args.upcard, args.soft).items():
+        print(f"{kind} {args.total} vs {args.upcard}, {action.value:<7}{stats['count']:>10} hands"
+              f"{stats['mean']:>+9.3f} per hand")
+    history.close()
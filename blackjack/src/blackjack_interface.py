@@ -1,5 +1,6 @@
 # Module for Blackjack inteface class and methods
 import os
+from abc import ABC, abstractmethod
 from tkinter import *
 from PIL import ImageTk, Image
 from tkinter import font as tkFont
@@ -62,10 +63,10 @@ class TextInterface(object):
         self.alive = False
         print("Game closed. Thank you for playing!\n")
 
-    def _displayCards(self, cards):
+    def _displayCards(self, hand: BlackjackCardSet):
         card_display = ""
-        for c in cards:
-            if not c.isHidden():
+        for i, c in enumerate(hand.getCards()):
+            if not hand.isHidden(i):
                 card_name = (c.getRank() + " of " + c.getSuit()).title()
                 card_display += "| " + card_name.center(self.MARGIN) + " |\n"
             else:
@@ -132,12 +133,16 @@ class TextInterface(object):
     def updateBalanceDisplay(self, balance):
         print('Your balance: ', balance)
 
+    def updateCountDisplay(self, tracker):
+        counts = ", ".join(f"{s} {c['running']:+d} ({c['true']:+.1f})" for s, c in tracker.snapshot().items())
+        print(f"Card count, running (true): {counts}")
+
     def updateCardView(self, hand: BlackjackCardSet, is_dealer=False):
         whose = "Dealer's" if is_dealer else "Your"
         title = (whose + " cards:").center(self.MARGIN)
         self._addBorder()
         print("| " + title + " |\n| " + " " * self.MARGIN + " |")
-        self._displayCards(hand.getCards())
+        self._displayCards(hand)
         self._displayScore(hand)
 
     def wantsToPlay(self):
@@ -147,6 +152,120 @@ class TextInterface(object):
         return btn == 'start'
 
 
+def standOnSeventeen(hand: BlackjackCardSet, dealer_hand: BlackjackCardSet, actions):
+    # default headless strategy, plays the hand the same way the dealer does
+    score = hand.getScore()[1] if 0 < hand.getScore()[1] <= 21 else hand.getScore()[0]
+    return Actions.HIT if score < 17 else Actions.STAND
+
+
+class HeadlessInterface(object):
+    # Interface without any display or user input, decisions are made by a strategy
+    # callable: strategy(player_hand, dealer_hand, actions) -> Actions
+    def __init__(self, strategy=standOnSeventeen, bet=ACCEPTED_BETS[0], rounds=None):
+        self.name = "Headless Interface"
+        self.alive = True
+        self.strategy = strategy
+        self.bet = bet
+        self.rounds = rounds
+        self.rounds_played = 0
+        self.player_hand = None
+        self.dealer_hand = None
+        self.tracker = None
+
+    def clear(self):
+        self.player_hand = None
+        self.dealer_hand = None
+
+    def close(self):
+        self.alive = False
+
+    def getAction(self, actions):
+        return self.strategy(self.player_hand, self.dealer_hand, actions)
+
+    def getBet(self, balance):
+        return self.bet(balance) if callable(self.bet) else self.bet
+
+    def greet(self):
+        return
+
+    def initializeView(self):
+        return
+
+    def isAlive(self):
+        return self.alive
+
+    def moveSplitCard(self, action='hold'):
+        return
+
+    def setAsideCardSet(self, idx, bust=None):
+        return
+
+    def showOutcomeMessage(self, outcome, button_text='back', no_button=False):
+        return
+
+    def showSettledCardView(self, hand, idx=-1):
+        return
+
+    def updateBalanceDisplay(self, balance):
+        return
+
+    def updateCountDisplay(self, tracker):
+        self.tracker = tracker
+
+    def updateCardView(self, hand: BlackjackCardSet, is_dealer=False):
+        # keep track of the hands in play, the strategy decides based on them
+        if is_dealer:
+            self.dealer_hand = hand
+        else:
+            self.player_hand = hand
+
+    def wantsToPlay(self):
+        if self.rounds is not None and self.rounds_played >= self.rounds:
+            return False
+        self.rounds_played += 1
+        return True
+
+
+class Strategy(ABC):
+    # Base class for automated players, subclasses decide on the action to take
+    # and may change the bet size, a counting shoe's tracker is given to them
+    # through observeCounts before every bet
+    name = "Strategy"
+    tracker = None
+
+    @abstractmethod
+    def getAction(self, hand: BlackjackCardSet, upcard, actions, balance):
+        pass
+
+    def getBet(self, balance):
+        return ACCEPTED_BETS[0]
+
+    def observeCounts(self, tracker):
+        self.tracker = tracker
+
+
+class StrategyInterface(HeadlessInterface):
+    # Headless interface driven by a Strategy object, which is also told the
+    # dealer's up card and the player's balance
+    def __init__(self, strategy: Strategy, rounds=None):
+        super().__init__(strategy=strategy, rounds=rounds)
+        self.name = "Strategy Interface"
+        self.balance = 0
+
+    def getAction(self, actions):
+        return self.strategy.getAction(self.player_hand, self.dealer_hand.getCard(1), actions, self.balance)
+
+    def getBet(self, balance):
+        return self.strategy.getBet(balance)
+
+    def updateBalanceDisplay(self, balance):
+        self.balance = balance
+
+    def updateCountDisplay(self, tracker):
+        super().updateCountDisplay(tracker)
+        self.strategy.observeCounts(tracker)
+
+
 class GraphicInterface(object):
     def __init__(self):
         self.name = "Graphic Interface"
@@ -412,6 +531,23 @@ class GraphicInterface(object):
             }
             game_win.create_text((bal_x, bal_y - disp_bottom_shape), **text_config, tags=('money'))
 
+    def updateCountDisplay(self, tracker):
+        if not self.isAlive():
+            return
+        game_win = self._getGameCanvas()
+        text = "\n".join(f"{s}: {c['running']:+d} ({c['true']:+.1f})" for s, c in tracker.snapshot().items())
+        count_text = game_win.find_withtag('count')
+        if count_text:
+            game_win.itemconfig(count_text, text=text)
+        else:
+            text_config = {
+                'text': text,
+                'font': tkFont.Font(family=self.fontname[2], size=14),
+                'fill': COLOR['white'],
+                'anchor': 'nw'
+            }
+            game_win.create_text((20, 20), **text_config, tags=('count'))
+
     def _createBets(self, available):
         game_win = self._getGameCanvas()
         half_h, half_w = self.HEIGHT // 2, self.WIDTH // 2
@@ -532,7 +668,7 @@ class GraphicInterface(object):
         for i in range(card_num):
             suit, rank = cards[i].getSuit(), cards[i].getRank()
             fl_name = rank + '_' + suit
-            if cards[i].isHidden():
+            if hand.isHidden(i):
                 fl_name = 'hidden'
             if i <= len(self.cardview[owner]) - 1:
                 card_img = self.cardview[owner][i]
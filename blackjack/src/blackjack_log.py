@@ -0,0 +1,295 @@
+# Module for the binary log of rounds and its replay
+#
+# Event encoding, one byte per card, action and outcome:
+#   0x00-0x33  card dealt, the card index (6 bits)
+#   0x40-0x43  action chosen by the player, index in Actions
+#   0x50-0x5f  outcome settled, 0x50 | outcome index in Outcome << 2 | hand index
+#   0x80 n     bet of a round, n as an unsigned LEB128 varint
+#   0x81 n     end of a round, balance after it
+#   0x82 n     start of a session, balance before its first round
+# Balances can go negative and are zigzag encoded (0, -1, 1, -2... as 0, 1, 2,
+# 3...) before the varint; bets and balances are logged as integers, whatever
+# number type the interface returned, a value with a fraction is a ValueError
+# as it could not be replayed.
+# A log file is the concatenation of sessions and is only ever appended to.
+import argparse
+import random
+from blackjack_game import BlackjackApp, MAX_HANDS
+from blackjack_interface import HeadlessInterface
+from blackjack_misc import Actions, Outcome
+from blackjack_timing import NULL_TIMER
+from card_sources import RecordedCards
+
+CARD_MAX = 0x3f
+ACTION = 0x40
+OUTCOME = 0x50
+BET = 0x80
+ROUND_END = 0x81
+SESSION = 0x82
+
+ACTION_LIST = list(Actions)
+OUTCOME_LIST = list(Outcome)
+ACTION_CODES = {a: ACTION | i for i, a in enumerate(ACTION_LIST)}
+FLUSH_SIZE = 1 << 16
+
+
+class LogFormatError(ValueError):
+    pass
+
+
+class ReplayError(Exception):
+    pass
+
+
+def _varint(n, out):
+    if n < 0:
+        raise ValueError("Only non-negative values can be logged")
+    while n > 0x7f:
+        out.append(n & 0x7f | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _integral(n):
+    if n != int(n):
+        raise ValueError(f"Only whole amounts can be logged, not {n}")
+    return int(n)
+
+
+def _zigzag(n):
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def _unzigzag(n):
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+class EventLog(object):
+    # events are encoded into a buffer, appended to the file at path (if any)
+    # whenever flush_size bytes are pending and on close()
+    def __init__(self, path=None, flush_size=FLUSH_SIZE):
+        self.path = path
+        self.flush_size = flush_size
+        self.buffer = bytearray()
+        self.file = open(path, 'ab') if path is not None else None
+
+    def card(self, card):
+        self.buffer.append(card.index)
+
+    def action(self, action):
+        self.buffer.append(ACTION_CODES[action])
+
+    def outcome(self, outcome, hand):
+        self.buffer.append(OUTCOME | OUTCOME_LIST.index(outcome) << 2 | hand)
+
+    def bet(self, bet):
+        bet = _integral(bet)
+        self.buffer.append(BET)
+        _varint(bet, self.buffer)
+
+    def endRound(self, balance):
+        balance = _integral(balance)
+        self.buffer.append(ROUND_END)
+        _varint(_zigzag(balance), self.buffer)
+        if self.file is not None and len(self.buffer) >= self.flush_size:
+            self.flush()
+
+    def startSession(self, balance):
+        balance = _integral(balance)
+        self.buffer.append(SESSION)
+        _varint(_zigzag(balance), self.buffer)
+
+    def flush(self):
+        if self.file is not None:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.buffer = bytearray()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def getBytes(self):
+        return bytes(self.buffer)
+
+
+class LoggedRound(object):
+    def __init__(self, bet):
+        self.bet = bet
+        self.cards = []
+        self.actions = []
+        self.outcomes = []
+        self.balance = None
+
+
+class LoggedSession(object):
+    def __init__(self, balance):
+        self.balance = balance
+        self.rounds = []
+
+
+def readSessions(data):
+    # decodes the bytes of a log into a list of LoggedSession
+    sessions, session, current = [], None, None
+    pos, size = 0, len(data)
+    while pos < size:
+        code = data[pos]
+        pos += 1
+        if code >= BET:
+            value, shift = 0, 0
+            while True:
+                if pos >= size:
+                    raise LogFormatError("Log ends inside a value")
+                byte = data[pos]
+                pos += 1
+                value |= (byte & 0x7f) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            if code == SESSION:
+                session = LoggedSession(_unzigzag(value))
+                sessions.append(session)
+                current = None
+            elif session is None:
+                raise LogFormatError("Event before the start of a session")
+            elif code == BET:
+                current = LoggedRound(value)
+                session.rounds.append(current)
+            elif code == ROUND_END and current is not None:
+                current.balance = _unzigzag(value)
+                current = None
+            else:
+                raise LogFormatError(f"Unexpected event code {code:#x} at byte {pos - 1}")
+        elif current is None:
+            raise LogFormatError(f"Event outside of a round at byte {pos - 1}")
+        elif code <= CARD_MAX:
+            if code >= 52:
+                raise LogFormatError(f"Invalid card index {code} at byte {pos - 1}")
+            current.cards.append(code)
+        elif ACTION <= code < ACTION + len(ACTION_LIST):
+            current.actions.append(ACTION_LIST[code - ACTION])
+        elif OUTCOME <= code < OUTCOME + len(OUTCOME_LIST) * MAX_HANDS:
+            current.outcomes.append((OUTCOME_LIST[(code - OUTCOME) >> 2], code & 3))
+        else:
+            raise LogFormatError(f"Unexpected event code {code:#x} at byte {pos - 1}")
+    return sessions
+
+
+def readLogFile(path):
+    with open(path, 'rb') as f:
+        return readSessions(f.read())
+
+
+class _LoggingInterface(object):
+    # forwards everything to an interface, logging the actions it returns
+    def __init__(self, interface, log: EventLog):
+        self.__dict__['_interface'] = interface
+        self.__dict__['_log'] = log
+
+    def __getattr__(self, name):
+        return getattr(self._interface, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._interface, name, value)
+
+    def getAction(self, actions):
+        action = self._interface.getAction(actions)
+        if action in ACTION_CODES:
+            self._log.action(action)
+        return action
+
+
+class RecordingApp(BlackjackApp):
+    # BlackjackApp writing its rounds to an EventLog
+    def __init__(self, interface, log: EventLog, rng=random, shoe=None, timer=NULL_TIMER):
+        super().__init__(_LoggingInterface(interface, log), rng, shoe, timer)
+        self.log = log
+        self.session_started = False
+
+    def drawCard(self):
+        card = self.card_source.draw()
+        self.log.card(card)
+        return card
+
+    def adjustBalance(self, outcome, hand: int):
+        self.log.outcome(outcome, hand)
+        super().adjustBalance(outcome, hand)
+
+    def startRound(self):
+        if not self.session_started:
+            self.log.startSession(self.balance)
+            self.session_started = True
+        self.log.bet(self.bet)
+        super().startRound()
+        self.log.endRound(self.balance)
+
+
+class ReplayInterface(HeadlessInterface):
+    # plays the recorded actions of a round, in order
+    def __init__(self):
+        super().__init__()
+        self.name = "Replay Interface"
+        self.actions = iter(())
+
+    def getAction(self, actions):
+        action = next(self.actions, None)
+        if action is None:
+            self.alive = False
+            return Actions.STAND
+        return action
+
+
+class _ReplayApp(BlackjackApp):
+    def __init__(self, interface, rng):
+        super().__init__(interface, rng)
+        self.outcomes = []
+
+    def adjustBalance(self, outcome, hand: int):
+        self.outcomes.append((outcome, hand))
+        super().adjustBalance(outcome, hand)
+
+
+def replaySession(session: LoggedSession):
+    # re-plays every round of a session, raises ReplayError on the first round
+    # that does not end like the recorded one, returns the final balance
+    interface = ReplayInterface()
+    cards = RecordedCards(idx for r in session.rounds for idx in r.cards)
+    app = _ReplayApp(interface, cards)
+    app.balance = session.balance
+    drawn = 0
+    for i, logged in enumerate(session.rounds):
+        interface.actions = iter(logged.actions)
+        app.outcomes = []
+        app.setBet(logged.bet)
+        try:
+            app.startRound()
+        except IndexError:
+            raise ReplayError(f"Round {i} draws more cards than recorded")
+        app.resetCards()
+        drawn += len(logged.cards)
+        if cards.cursor != drawn:
+            raise ReplayError(f"Round {i} draws {cards.cursor - drawn + len(logged.cards)} cards, "
+                              f"{len(logged.cards)} recorded")
+        if app.outcomes != logged.outcomes:
+            raise ReplayError(f"Round {i} settles {app.outcomes}, recorded {logged.outcomes}")
+        if logged.balance is not None and app.balance != logged.balance:
+            raise ReplayError(f"Round {i} ends with balance {app.balance}, recorded {logged.balance}")
+        interface.alive = True
+    return app.balance
+
+
+def replayLog(data):
+    # replays every session of a log (bytes), returns their final balances
+    return [replaySession(session) for session in readSessions(data)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('log', help='log file to replay')
+    args = parser.parse_args()
+    sessions = readLogFile(args.log)
+    for i, session in enumerate(sessions):
+        balance = replaySession(session)
+        print(f"session {i}: {len(session.rounds)} rounds, balance {session.balance} -> {balance}, replayed OK")
@@ -0,0 +1,106 @@
+# Module for running BlackjackApp simulations across worker processes
+#
+# Rounds are split into fixed size chunks and every chunk gets its own random
+# stream spawned from the master seed, so the totals depend only on the seed
+# and the chunk size, not on the number of workers.
+import argparse
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from blackjack_game import BlackjackApp, STD_BET
+from blackjack_interface import HeadlessInterface, standOnSeventeen
+from blackjack_misc import Outcome
+from blackjack_stats import RoundStats, StatsApp
+
+CHUNK_ROUNDS = 10000
+BANKROLL = 10 ** 9
+
+
+class _CountingApp(BlackjackApp):
+    # counts the outcome of every settled hand
+    def __init__(self, interface, rng=random):
+        super().__init__(interface, rng)
+        self.counts = {o: 0 for o in Outcome}
+
+    def adjustBalance(self, outcome, hand: int):
+        self.counts[outcome] += 1
+        super().adjustBalance(outcome, hand)
+
+
+def playChunk(seed, rounds, strategy=standOnSeventeen, bet=STD_BET):
+    # play rounds with a bankroll that cannot run out, returns outcome counts and net win
+    app = _CountingApp(HeadlessInterface(strategy=strategy, bet=bet, rounds=rounds), rng=random.Random(seed))
+    app.balance = BANKROLL
+    app.runGame()
+    return app.counts, app.balance - BANKROLL
+
+
+def chunkSeeds(seed, chunks):
+    # independent seeds for every chunk, spawned from the master seed
+    children = np.random.SeedSequence(seed).spawn(chunks)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def playStatsChunk(seed, rounds, strategy=standOnSeventeen, bet=STD_BET):
+    # like playChunk, returns the RoundStats of the chunk
+    app = StatsApp(HeadlessInterface(strategy=strategy, bet=bet, rounds=rounds), rng=random.Random(seed))
+    app.balance = BANKROLL
+    app.runGame()
+    return app.stats
+
+
+def _runChunks(play, rounds, seed, workers, strategy, bet, chunk_rounds):
+    # strategy must be picklable (a module level function or a partial of one)
+    sizes = [chunk_rounds] * (rounds // chunk_rounds)
+    if rounds % chunk_rounds:
+        sizes.append(rounds % chunk_rounds)
+    seeds = chunkSeeds(seed, len(sizes))
+    args = (seeds, sizes, [strategy] * len(sizes), [bet] * len(sizes))
+
+    if workers == 1:
+        return list(map(play, *args))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(play, *args))
+
+
+def runSimulation(rounds, seed=None, workers=None, strategy=standOnSeventeen, bet=STD_BET,
+                  chunk_rounds=CHUNK_ROUNDS):
+    results = _runChunks(playChunk, rounds, seed, workers, strategy, bet, chunk_rounds)
+    counts = {o: 0 for o in Outcome}
+    net = 0
+    for chunk_counts, chunk_net in results:
+        for o in Outcome:
+            counts[o] += chunk_counts[o]
+        net += chunk_net
+    return counts, net
+
+
+def runStatsSimulation(rounds, seed=None, workers=None, strategy=standOnSeventeen, bet=STD_BET,
+                       chunk_rounds=CHUNK_ROUNDS):
+    # the RoundStats of all rounds, merged from the stats of every chunk
+    stats = RoundStats()
+    for chunk_stats in _runChunks(playStatsChunk, rounds, seed, workers, strategy, bet, chunk_rounds):
+        stats.merge(chunk_stats)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-rounds', type=int, default=10 ** 6)
+    parser.add_argument('-seed', type=int, default=None)
+    parser.add_argument('-workers', type=int, default=None)
+    parser.add_argument('-stats', action='store_true', help='report confidence intervals and bust rates')
+    args = parser.parse_args()
+    if args.stats:
+        stats = runStatsSimulation(args.rounds, seed=args.seed, workers=args.workers)
+        ev, low, high = stats.evInterval()
+        for o in Outcome:
+            print(f"{o.value}: {stats.counts[o]}")
+        print(f"net win per round: {ev:.4f} (95% CI {low:.4f} to {high:.4f}), variance {stats.variance():.2f}")
+        rates = stats.bustRates()
+        print(f"bust rate: player {rates['player']:.4f} per hand, dealer {rates['dealer']:.4f} per round")
+    else:
+        counts, net = runSimulation(args.rounds, seed=args.seed, workers=args.workers)
+        for o in Outcome:
+            print(f"{o.value}: {counts[o]}")
+        print(f"net win: {net} ({net / args.rounds:.4f} per round)")
@@ -0,0 +1,291 @@
+# Module for an asyncio game server, one BlackjackApp per connection
+#
+# Every connection (TCP or Unix socket) is a session playing its own
+# AsyncBlackjackApp on the server's event loop, whose decisions are awaited
+# from the client, so an idle session costs one pending read and no thread.
+#
+# The protocol is JSON lines, one object per line. The server sends events
+# {"event": name, ...}:
+#   hello (session, bets), balance (balance), cards (dealer, cards, score),
+#   outcome (message), split (action), set_aside (hand), settled (hand),
+#   count (counts), error (message) and bye (reason)
+# and asks for a decision with:
+#   play -> {"play": true | false}
+#   bet (balance, bets) -> {"bet": amount}, a JSON integer (not 10.0 or "10")
+#   action (actions) -> {"action": "hit" | "stand" | "double" | "split"}
+# A wrong answer gets an error event and the question again. A session ends
+# once the client declines to play, runs out of money, makes too many wrong
+# answers, does not answer (or read) within the timeout, or disconnects. An
+# error of the game itself ends the session with reason internal and is
+# reported to the event loop's exception handler.
+import argparse
+import asyncio
+import json
+import random
+from blackjack_async import AsyncBlackjackApp
+from blackjack_game import MIN_BALANCE
+from blackjack_interface import HeadlessInterface
+from blackjack_misc import Actions, ACCEPTED_BETS
+from cards import BlackjackCardSet, Shoe
+
+PROTOCOL_VERSION = 1
+DEFAULT_TIMEOUT = 60.0
+MAX_SESSIONS = 10000
+# pending connections the listening socket queues, for bursts of new players
+BACKLOG = 1024
+MAX_ERRORS = 3
+# longest accepted line from a client, and outgoing bytes buffered before writes wait for the client
+LINE_LIMIT = 1024
+WRITE_HIGH_WATER = 64 * 1024
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def cardsView(hand: BlackjackCardSet):
+    # cards of a set as text, None for hidden cards
+    return [None if hand.isHidden(i) else str(c) for i, c in enumerate(hand.getCards())]
+
+
+class SessionInterface(HeadlessInterface):
+    # async interface of a remote player: every display update is sent to the
+    # client, decisions are asked by the session
+    def __init__(self, session):
+        super().__init__(rounds=None)
+        self.name = "Session Interface"
+        self.session = session
+
+    async def getAction(self, actions):
+        return await self.session.getAction(actions)
+
+    async def getBet(self, balance):
+        return await self.session.getBet(balance)
+
+    async def wantsToPlay(self):
+        return await self.session.wantsToPlay()
+
+    def greet(self):
+        self.session.send('hello', session=self.session.id, version=PROTOCOL_VERSION, bets=ACCEPTED_BETS)
+
+    def moveSplitCard(self, action='hold'):
+        self.session.send('split', action=action)
+
+    def setAsideCardSet(self, idx, bust=None):
+        self.session.send('set_aside', hand=idx)
+
+    def showOutcomeMessage(self, outcome, button_text='back', no_button=False):
+        self.session.send('outcome', message=outcome.strip())
+
+    def showSettledCardView(self, hand, idx=-1):
+        self.session.send('settled', hand=idx)
+
+    def updateBalanceDisplay(self, balance):
+        self.session.send('balance', balance=balance)
+
+    def updateCountDisplay(self, tracker):
+        super().updateCountDisplay(tracker)
+        self.session.send('count', counts=tracker.snapshot())
+
+    def updateCardView(self, hand: BlackjackCardSet, is_dealer=False):
+        super().updateCardView(hand, is_dealer)
+        self.session.send('cards', dealer=is_dealer, cards=cardsView(hand), score=hand.getScore())
+
+
+class GameSession(object):
+    def __init__(self, session_id, reader, writer, rng=random, shoe: Shoe = None, timeout=DEFAULT_TIMEOUT):
+        self.id = session_id
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        self.errors = 0
+        self.interface = SessionInterface(self)
+        self.app = AsyncBlackjackApp(self.interface, rng=rng, shoe=shoe)
+
+    def send(self, event, **fields):
+        # buffered by the transport, flushed at the next decision
+        fields['event'] = event
+        self.writer.write(json.dumps(fields).encode() + b'\n')
+
+    async def flush(self):
+        # backpressure: waits while the client has not read past the high water mark
+        await asyncio.wait_for(self.writer.drain(), self.timeout)
+
+    async def ask(self, event, parse, **fields):
+        # sends a question and returns the first valid answer
+        while True:
+            self.send(event, **fields)
+            await self.flush()
+            try:
+                line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+            except (asyncio.LimitOverrunError, ValueError):
+                # readline raises ValueError for a line longer than LINE_LIMIT
+                raise ConnectionAbortedError(f"Client sent a line longer than {LINE_LIMIT} bytes")
+            if not line:
+                raise ConnectionResetError("Client closed the connection")
+            try:
+                return parse(json.loads(line))
+            except (ValueError, KeyError, TypeError) as error:
+                self.errors += 1
+                if self.errors >= MAX_ERRORS:
+                    raise ProtocolError(f"Too many invalid answers: {error}")
+                self.send('error', message=str(error))
+
+    @staticmethod
+    def _parsePlay(answer):
+        play = answer['play']
+        if not isinstance(play, bool):
+            raise ValueError("play must be true or false")
+        return play
+
+    async def wantsToPlay(self):
+        return await self.ask('play', self._parsePlay)
+
+    async def getBet(self, balance):
+        available = [b for b in ACCEPTED_BETS if b <= balance]
+
+        def parse(answer):
+            # JSON integers only, a float bet would reach the balance and the logs
+            bet = answer['bet']
+            if type(bet) is not int or bet not in available:
+                raise ValueError(f"bet must be one of {available}")
+            return bet
+        return await self.ask('bet', parse, balance=balance, bets=available)
+
+    async def getAction(self, actions):
+        names = [a.value for a in actions]
+
+        def parse(answer):
+            if answer['action'] not in names:
+                raise ValueError(f"action must be one of {names}")
+            return Actions(answer['action'])
+        return await self.ask('action', parse, actions=names)
+
+    async def run(self):
+        # plays the game of the session, returns why it ended
+        app, interface = self.app, self.interface
+        reason = 'done'
+        try:
+            await app.runGame()
+            if app.balance < MIN_BALANCE:
+                reason = 'balance'
+            self.send('bye', reason=reason)
+            await self.flush()
+        except asyncio.TimeoutError:
+            reason = 'timeout'
+            self.send('bye', reason=reason)
+        except ProtocolError as error:
+            reason = 'error'
+            self.send('bye', reason=reason, message=str(error))
+        except ConnectionError:
+            reason = 'disconnected'
+        except Exception:
+            # an error of the game, not of the client: the client is told and the error raised
+            reason = 'internal'
+            self.send('bye', reason=reason)
+            raise
+        finally:
+            interface.close()
+        return reason
+
+
+class GameServer(object):
+    def __init__(self, decks=0, timeout=DEFAULT_TIMEOUT, max_sessions=MAX_SESSIONS, seed=None):
+        # decks: decks in the shoe of every session, 0 for an infinite deck
+        self.decks = decks
+        self.timeout = timeout
+        self.max_sessions = max_sessions
+        self.rng = random.Random(seed)
+        self.server = None
+        self.sessions = {}
+        self.tasks = set()
+        self.next_id = 1
+        self.ended = {}
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        # listens on a Unix socket when a path is given, on TCP otherwise
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._serve, path, limit=LINE_LIMIT, backlog=BACKLOG)
+        else:
+            self.server = await asyncio.start_server(self._serve, host, port, limit=LINE_LIMIT, backlog=BACKLOG)
+        return self
+
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    def _newSession(self, reader, writer):
+        rng = random.Random(self.rng.getrandbits(64))
+        shoe = Shoe(self.decks, rng=rng) if self.decks > 0 else None
+        session = GameSession(self.next_id, reader, writer, rng=rng, shoe=shoe, timeout=self.timeout)
+        self.next_id += 1
+        return session
+
+    async def _serve(self, reader, writer):
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        try:
+            await self._play(reader, writer)
+        finally:
+            self.tasks.discard(task)
+
+    async def _play(self, reader, writer):
+        writer.transport.set_write_buffer_limits(high=WRITE_HIGH_WATER)
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(json.dumps({'event': 'bye', 'reason': 'full'}).encode() + b'\n')
+            await self._close(writer)
+            return
+        session = self._newSession(reader, writer)
+        self.sessions[session.id] = session
+        try:
+            reason = await session.run()
+        except Exception as error:
+            # reported by the event loop, the other sessions go on
+            reason = 'internal'
+            asyncio.get_running_loop().call_exception_handler({
+                'message': f"Session {session.id} failed", 'exception': error})
+        finally:
+            del self.sessions[session.id]
+            await self._close(writer)
+        self.ended[reason] = self.ended.get(reason, 0) + 1
+
+    async def _close(self, writer):
+        writer.close()
+        try:
+            await asyncio.wait_for(writer.wait_closed(), self.timeout)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+
+    async def close(self):
+        # stops listening, ends every open session and waits for them
+        self.server.close()
+        for session in list(self.sessions.values()):
+            session.writer.close()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def serveForever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+
+async def _main(args):
+    server = GameServer(args.decks, args.timeout, args.max_sessions, args.seed)
+    await server.start(args.host, args.port, args.unix)
+    print(f"Serving Blackjack on {args.unix or server.address()}")
+    await server.serveForever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-host', default='127.0.0.1')
+    parser.add_argument('-port', type=int, default=8765)
+    parser.add_argument('-unix', default=None, help='path of a Unix socket to listen on instead of TCP')
+    parser.add_argument('-decks', type=int, default=0, help='number of decks in the shoe, 0 for an infinite deck')
+    parser.add_argument('-timeout', type=float, default=DEFAULT_TIMEOUT, help='seconds to wait for a client')
+    parser.add_argument('-max_sessions', type=int, default=MAX_SESSIONS)
+    parser.add_argument('-seed', type=int, default=None)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
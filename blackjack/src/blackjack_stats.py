@@ -0,0 +1,158 @@
+# Module for streaming statistics of simulated rounds
+#
+# RoundStats keeps, in fixed memory, the running mean and variance of the net
+# win per round (Welford), the count of every Outcome, player and dealer bust
+# counts and per initial hand buckets. Buckets are indexed by
+# (kind, total, dealer up card value) with kind HARD, SOFT or PAIR; the total
+# of a pair is the value of one of its cards. Two RoundStats merge exactly, so
+# every worker process can keep its own and send it back.
+import random
+from math import sqrt
+from statistics import NormalDist
+import numpy as np
+from blackjack_game import BlackjackApp
+from blackjack_misc import Outcome
+from blackjack_timing import NULL_TIMER
+
+HARD, SOFT, PAIR = 0, 1, 2
+BUCKET_SHAPE = (3, 22, 11)
+
+
+def initialBucket(first, second, upcard):
+    # bucket index of the first two cards of the player against the dealer's up card
+    v1, v2 = first.getValue()[0], second.getValue()[0]
+    up = upcard.getValue()[0]
+    if v1 == v2:
+        return PAIR, v1, up
+    if v1 == 1 or v2 == 1:
+        return SOFT, v1 + v2 + 10, up
+    return HARD, v1 + v2, up
+
+
+def _interval(mean, variance, n, level):
+    if n < 2:
+        return mean, float('-inf'), float('inf')
+    half = NormalDist().inv_cdf((1 + level) / 2) * sqrt(variance / n)
+    return mean, mean - half, mean + half
+
+
+class RoundStats(object):
+    def __init__(self):
+        self.rounds = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.counts = {o: 0 for o in Outcome}
+        self.hands = 0
+        self.player_busts = 0
+        self.dealer_busts = 0
+        self.bucket_rounds = np.zeros(BUCKET_SHAPE, dtype=np.int64)
+        self.bucket_net = np.zeros(BUCKET_SHAPE, dtype=np.float64)
+        self.bucket_net_squares = np.zeros(BUCKET_SHAPE, dtype=np.float64)
+        self.bucket_busts = np.zeros(BUCKET_SHAPE, dtype=np.int64)
+
+    def addHand(self, outcome, busted=False):
+        # one settled hand, called after every adjustBalance
+        self.counts[outcome] += 1
+        self.hands += 1
+        if busted:
+            self.player_busts += 1
+
+    def addRound(self, net, bucket=None, player_busts=0, dealer_bust=False):
+        # one finished round, net is the balance change over the round
+        self.rounds += 1
+        delta = net - self.mean
+        self.mean += delta / self.rounds
+        self.m2 += delta * (net - self.mean)
+        if dealer_bust:
+            self.dealer_busts += 1
+        if bucket is not None:
+            self.bucket_rounds[bucket] += 1
+            self.bucket_net[bucket] += net
+            self.bucket_net_squares[bucket] += net * net
+            self.bucket_busts[bucket] += player_busts
+
+    def merge(self, other):
+        # adds the rounds of another RoundStats (Chan et al. pairwise update)
+        total = self.rounds + other.rounds
+        if total:
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta * delta * self.rounds * other.rounds / total
+            self.mean += delta * other.rounds / total
+        self.rounds = total
+        for o in Outcome:
+            self.counts[o] += other.counts[o]
+        self.hands += other.hands
+        self.player_busts += other.player_busts
+        self.dealer_busts += other.dealer_busts
+        self.bucket_rounds += other.bucket_rounds
+        self.bucket_net += other.bucket_net
+        self.bucket_net_squares += other.bucket_net_squares
+        self.bucket_busts += other.bucket_busts
+        return self
+
+    def variance(self):
+        return self.m2 / (self.rounds - 1) if self.rounds > 1 else 0.0
+
+    def evInterval(self, level=0.95):
+        # (mean, low, high) of the net win per round at the given confidence level
+        return _interval(self.mean, self.variance(), self.rounds, level)
+
+    def outcomeRates(self):
+        return {o: self.counts[o] / self.hands if self.hands else 0.0 for o in Outcome}
+
+    def bustRates(self):
+        # player busts per settled hand, dealer busts per round
+        return {
+            'player': self.player_busts / self.hands if self.hands else 0.0,
+            'dealer': self.dealer_busts / self.rounds if self.rounds else 0.0
+        }
+
+    def bucketInterval(self, bucket, level=0.95):
+        # (mean, low, high) of the net win per round of an initial hand bucket
+        n = int(self.bucket_rounds[bucket])
+        if n == 0:
+            return 0.0, float('-inf'), float('inf')
+        mean = self.bucket_net[bucket] / n
+        variance = max(self.bucket_net_squares[bucket] - n * mean * mean, 0.0) / (n - 1) if n > 1 else 0.0
+        return _interval(mean, variance, n, level)
+
+    def bucketEVs(self):
+        # mean net win per round of every bucket, NaN where no round was played
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.bucket_net / self.bucket_rounds
+
+    def summary(self, level=0.95):
+        ev, low, high = self.evInterval(level)
+        return {
+            'rounds': self.rounds,
+            'ev': ev,
+            'ev_interval': (low, high),
+            'variance': self.variance(),
+            'outcomes': {o.value: n for o, n in self.counts.items()},
+            'bust_rates': self.bustRates()
+        }
+
+
+class StatsApp(BlackjackApp):
+    # BlackjackApp feeding a RoundStats with every settled hand and round
+    def __init__(self, interface, stats: RoundStats = None, rng=random, shoe=None, timer=NULL_TIMER):
+        super().__init__(interface, rng, shoe, timer)
+        self.stats = stats if stats is not None else RoundStats()
+        self.round_busts = 0
+
+    def adjustBalance(self, outcome, hand: int):
+        super().adjustBalance(outcome, hand)
+        busted = outcome == Outcome.LOSS and self.player_hand[hand].getScore()[0] > 21
+        self.round_busts += busted
+        self.stats.addHand(outcome, busted)
+
+    def startRound(self):
+        before = self.balance
+        self.round_busts = 0
+        super().startRound()
+        player, dealer = self.player_hand, self.dealer_hand
+        bucket = None
+        if len(dealer.getCards()) >= 2 and len(player[0].getCards()) >= 2:
+            second = player[1].getCard(0) if len(player) > 1 else player[0].getCard(1)
+            bucket = initialBucket(player[0].getCard(0), second, dealer.getCard(1))
+        self.stats.addRound(self.balance - before, bucket, self.round_busts, dealer.getScore()[0] > 21)
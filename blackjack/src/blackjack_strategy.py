@@ -0,0 +1,207 @@
+# Module for the basic strategy of this game, built from exact expected values
+#
+# Expected values are per unit of the initial bet for the infinite deck drawn by
+# BlackjackApp.drawCard, with the rules of BlackjackApp.startRound:
+# - naturals are settled before any decision (blackjack pays 2:1, dealer's
+#   blackjack takes the bet), so decisions face a dealer without blackjack
+# - doubling only on the first decision of hand 0, one card is drawn
+# - up to MAX_HANDS hands, a hand at index i can be split only while
+#   i < MAX_HANDS - 1 and the hand that was split gets its next card right away
+#   and can only hit or stand
+# - split aces get one card each (BlackjackCardSet.isSplitFromAce)
+# A pair is split by comparing against the first decision's actions, DOUBLE
+# included, on hand 0, and against hitting or standing on a hand split off
+# (valued at index 1, where resplitting is allowed the longest).
+from functools import lru_cache
+import numpy as np
+from blackjack_misc import Actions
+from blackjack_batch import HIT, STAND, DOUBLE, TABLE_SHAPE, handKey
+from blackjack_dealer import dealerProbabilities, VALUE_PROBS
+from blackjack_game import BLACKJACK, MAX_HANDS
+
+
+def _high(low, has_ace):
+    return low + 10 if has_ace and low + 10 <= BLACKJACK else low
+
+
+@lru_cache(maxsize=None)
+def _dealerFinal(upcard):
+    probs = dealerProbabilities(upcard, no_blackjack=True)
+    return tuple((score, p) for score, p in probs.items() if p > 0 and score != 'blackjack')
+
+
+@lru_cache(maxsize=None)
+def standEV(score, upcard):
+    # expected value of standing on a score against a dealer without blackjack
+    if score > BLACKJACK:
+        return -1.0
+    ev = 0.0
+    for dealer_score, prob in _dealerFinal(upcard):
+        if dealer_score == 'bust' or score > dealer_score:
+            ev += prob
+        elif score < dealer_score:
+            ev -= prob
+    return ev
+
+
+@lru_cache(maxsize=None)
+def hitStandEV(low, has_ace, upcard):
+    # expected value of the best play when only hitting or standing is allowed,
+    # returns (ev, action)
+    high = _high(low, has_ace)
+    if low > BLACKJACK:
+        return -1.0, Actions.STAND
+    if low >= BLACKJACK or high == BLACKJACK:  # BlackjackApp.canPlay stops the hand
+        return standEV(high, upcard), Actions.STAND
+    stand = standEV(high, upcard)
+    hit = hitEV(low, has_ace, upcard)
+    return (hit, Actions.HIT) if hit > stand else (stand, Actions.STAND)
+
+
+@lru_cache(maxsize=None)
+def hitEV(low, has_ace, upcard):
+    return sum(prob * hitStandEV(low + value, has_ace or value == 1, upcard)[0] for value, prob in VALUE_PROBS)
+
+
+@lru_cache(maxsize=None)
+def doubleEV(low, has_ace, upcard):
+    return 2 * sum(prob * standEV(_high(low + value, has_ace or value == 1), upcard)
+                   for value, prob in VALUE_PROBS)
+
+
+@lru_cache(maxsize=None)
+def _splitRestEV(value, upcard):
+    # a hand that was split gets one more card, then hits or stands (aces stand)
+    ev = 0.0
+    for drawn, prob in VALUE_PROBS:
+        low, has_ace = value + drawn, value == 1 or drawn == 1
+        if value == 1:
+            ev += prob * standEV(_high(low, has_ace), upcard)
+        else:
+            ev += prob * hitStandEV(low, has_ace, upcard)[0]
+    return ev
+
+
+@lru_cache(maxsize=None)
+def _splitHandEV(value, upcard, idx):
+    # a hand at index idx made of one card of a split pair, gets its 2nd card
+    # when its turn comes and may be split again
+    ev = 0.0
+    for drawn, prob in VALUE_PROBS:
+        low, has_ace = value + drawn, value == 1 or drawn == 1
+        if value == 1:
+            ev += prob * standEV(_high(low, has_ace), upcard)
+        elif drawn == value and idx < MAX_HANDS - 1:
+            ev += prob * max(hitStandEV(low, has_ace, upcard)[0], splitEV(value, upcard, idx))
+        else:
+            ev += prob * hitStandEV(low, has_ace, upcard)[0]
+    return ev
+
+
+@lru_cache(maxsize=None)
+def splitEV(value, upcard, idx=0):
+    # expected value of splitting a pair of the given card value at hand index idx
+    return _splitRestEV(value, upcard) + _splitHandEV(value, upcard, idx + 1)
+
+
+def actionEVs(low, has_ace, upcard, pair=False):
+    # expected value of every action on the first decision of hand 0
+    evs = {
+        Actions.STAND: standEV(_high(low, has_ace), upcard),
+        Actions.HIT: hitEV(low, has_ace, upcard),
+        Actions.DOUBLE: doubleEV(low, has_ace, upcard),
+    }
+    if pair:
+        evs[Actions.SPLIT] = splitEV(low // 2, upcard)
+    return evs
+
+
+def _dealerBlackjack(upcard):
+    return dealerProbabilities(upcard)['blackjack']
+
+
+def optimalEV():
+    # expected value of a round played by the basic strategy, naturals included
+    ev = 0.0
+    for upcard, up_prob in VALUE_PROBS:
+        dealer_bj = _dealerBlackjack(upcard)
+        for first, first_prob in VALUE_PROBS:
+            for second, second_prob in VALUE_PROBS:
+                prob = up_prob * first_prob * second_prob
+                low, has_ace = first + second, first == 1 or second == 1
+                if has_ace and low == 11:
+                    ev += prob * (1 - dealer_bj) * 2
+                    continue
+                best = max(actionEVs(low, has_ace, upcard, pair=first == second).values())
+                ev += prob * (-dealer_bj + (1 - dealer_bj) * best)
+    return ev
+
+
+class BasicStrategy(object):
+    # lookup tables: 'first' for the first decision of hand 0 (double allowed),
+    # 'later' for every other decision, 'pairs' tells whether to split a pair,
+    # indexed by [double allowed, card value, up card value]
+    def __init__(self, first, later, pairs):
+        self.first = first
+        self.later = later
+        self.pairs = pairs
+
+    def getAction(self, hand, dealer_hand, actions):
+        return self.decide(hand, dealer_hand.getCard(1).getValue()[0], actions)
+
+    def decide(self, hand, upcard, actions):
+        # action for a card set against the dealer's up card value
+        total, soft = handKey(hand)
+        can_double = Actions.DOUBLE in actions
+        if Actions.SPLIT in actions and self.pairs[int(can_double), hand.getCard(0).getValue()[0], upcard]:
+            return Actions.SPLIT
+        table = self.first if can_double else self.later
+        action = table[int(soft), total, upcard]
+        if action == DOUBLE:
+            return Actions.DOUBLE
+        return Actions.STAND if action == STAND else Actions.HIT
+
+    def __call__(self, hand, dealer_hand, actions):
+        return self.getAction(hand, dealer_hand, actions)
+
+    def chart(self):
+        # printable chart of the first decision, one row per hand
+        letters = {HIT: 'H', STAND: 'S', DOUBLE: 'D'}
+        upcards = list(range(2, 11)) + [1]
+        lines = [f"{'hand':<8}" + "".join(f"{'A' if u == 1 else u:>3}" for u in upcards)]
+        for soft, totals in [(0, range(5, 21)), (1, range(13, 21))]:
+            for total in totals:
+                name = ("soft " if soft else "hard ") + str(total)
+                lines.append(f"{name:<8}" + "".join(f"{letters[self.first[soft, total, u]]:>3}" for u in upcards))
+        for value in upcards:
+            name = "pair " + ("A" if value == 1 else str(value))
+            lines.append(f"{name:<8}" + "".join(f"{'P' if self.pairs[1, value, u] else '-':>3}" for u in upcards))
+        return "\n".join(lines)
+
+
+def buildBasicStrategy():
+    first = np.full(TABLE_SHAPE, STAND, dtype=np.int8)
+    later = np.full(TABLE_SHAPE, STAND, dtype=np.int8)
+    pairs = np.zeros((2, TABLE_SHAPE[2], TABLE_SHAPE[2]), dtype=bool)
+    codes = {Actions.HIT: HIT, Actions.STAND: STAND, Actions.DOUBLE: DOUBLE}
+    for upcard in range(1, TABLE_SHAPE[2]):
+        for total in range(2, BLACKJACK + 1):
+            for soft in (False, True):
+                if soft and total < 12:
+                    continue
+                low = total - 10 if soft else total
+                evs = actionEVs(low, soft, upcard)
+                first[int(soft), total, upcard] = codes[max(evs, key=evs.get)]
+                later[int(soft), total, upcard] = codes[hitStandEV(low, soft, upcard)[1]]
+        for value in range(1, TABLE_SHAPE[2]):
+            low, has_ace = value * 2, value == 1
+            evs = actionEVs(low, has_ace, upcard, pair=True)
+            pairs[1, value, upcard] = max(evs, key=evs.get) == Actions.SPLIT
+            pairs[0, value, upcard] = splitEV(value, upcard, 1) > hitStandEV(low, has_ace, upcard)[0]
+    return BasicStrategy(first, later, pairs)
+
+
+if __name__ == "__main__":
+    strategy = buildBasicStrategy()
+    print(strategy.chart())
+    print(f"\nExpected value per round: {optimalEV():+.4f} bets")
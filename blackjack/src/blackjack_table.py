@@ -0,0 +1,199 @@
+# Module for a Blackjack table with several seats and one dealer
+#
+# Every seat is a BlackjackApp with its own interface, balance, bets and split
+# hands (up to MAX_HANDS), but all seats draw from the table's card source and
+# share the table's dealer hand. A round deals one card to every seat then to
+# the dealer, twice, plays the seats in order, draws the dealer's hand once and
+# settles every seat against the same final score. Rules are the ones of
+# BlackjackApp.startRound, so a table with a single seat plays the same rounds
+# as a BlackjackApp drawing the same cards. The hole card is only revealed to
+# the seats once they have all played, or when the dealer has a natural.
+import argparse
+import random
+from blackjack_game import BlackjackApp, MESSAGES, MIN_BALANCE
+from blackjack_misc import Outcome
+from blackjack_timing import NULL_TIMER, PhaseTimer
+from cards import BlackjackCardSet, Shoe
+from card_sources import cardSource
+
+MAX_SEATS = 7
+
+
+class BlackjackTable(object):
+    def __init__(self, interfaces, rng=random, shoe: Shoe = None, timer=NULL_TIMER):
+        # interfaces: one interface per seat, in playing order
+        if not 1 <= len(interfaces) <= MAX_SEATS:
+            raise ValueError(f"A table has between 1 and {MAX_SEATS} seats")
+        self.name = "Blackjack Table"
+        self.timer = timer
+        self.shoe = shoe
+        # card counts of a CountingShoe, shown to every seat before its bet
+        self.tracker = getattr(shoe, 'tracker', None)
+        self.card_source = shoe if shoe is not None else cardSource(rng)
+        self.seats = [BlackjackApp(interface, rng=self.card_source, timer=timer) for interface in interfaces]
+        self.seated = list(self.seats)
+        self.rounds = 0
+        self.resetCards()
+
+    def drawCard(self):
+        return self.card_source.draw()
+
+    def prepareShoe(self):
+        # reshuffle the shoe between rounds once the cut card is reached, the
+        # cards dealt before the round are its discards
+        if self.shoe is not None:
+            if self.shoe.needsShuffle():
+                self.shoe.shuffle()
+            self.shoe.newRound()
+
+    def resetCards(self):
+        # a hole card the round ended without revealing is shown with the discards
+        if self.tracker is not None:
+            self.tracker.reveal()
+        self.dealer_hand = BlackjackCardSet()
+        for seat in self.seats:
+            seat.player_hand = [BlackjackCardSet()]
+            seat.dealer_hand = self.dealer_hand
+
+    def revealHoleCard(self):
+        self.dealer_hand.revealCard(0)
+        if self.tracker is not None:
+            self.tracker.reveal()
+
+    def showDealerHand(self, seats):
+        for seat in seats:
+            seat.interface.updateCardView(self.dealer_hand, is_dealer=True)
+
+    def takeBets(self):
+        # seats leave the table once they decline to play or cannot cover a bet,
+        # as in BlackjackApp.runGame
+        playing = []
+        for seat in self.seated:
+            interface = seat.interface
+            if not (interface.isAlive() and seat.balance >= MIN_BALANCE and interface.wantsToPlay()):
+                if seat.balance < MIN_BALANCE:
+                    interface.close()
+                continue
+            if self.tracker is not None:
+                interface.updateCountDisplay(self.tracker)
+            seat.setBet(interface.getBet(seat.balance))
+            if not interface.isAlive():
+                continue
+            interface.initializeView()
+            seat.placeBet(0)
+            interface.updateBalanceDisplay(seat.balance)
+            playing.append(seat)
+        self.seated = list(playing)
+        return playing
+
+    def dealCards(self, playing):
+        # one card to every seat then to the dealer, twice, the dealer's first card hidden
+        for i in range(2):
+            for seat in playing:
+                seat.player_hand[0].addCard(self.drawCard())
+            self.dealer_hand.addCard(self.drawCard())
+        self.dealer_hand.hideCard(0)
+        if self.tracker is not None:
+            self.tracker.hide(self.dealer_hand.getCard(0))
+        for seat in playing:
+            seat.interface.updateCardView(seat.player_hand[0])
+        self.showDealerHand(playing)
+
+    def settleNaturals(self, playing):
+        # pays the natural blackjacks and returns the seats left to play
+        if self.dealer_hand.hasBlackjack():
+            self.revealHoleCard()
+            self.showDealerHand(playing)
+            for seat in playing:
+                if seat.player_hand[0].hasBlackjack():
+                    seat.interface.showOutcomeMessage(MESSAGES[Outcome.TIE.value])
+                    seat.adjustBalance(Outcome.TIE, 0)
+                else:
+                    seat.interface.showOutcomeMessage("Dealer's got Blackjack! " + MESSAGES[Outcome.LOSS.value])
+                    seat.adjustBalance(Outcome.LOSS, 0)
+            return []
+        to_play = []
+        for seat in playing:
+            if seat.player_hand[0].hasBlackjack():
+                seat.interface.showOutcomeMessage(MESSAGES[Outcome.BLACKJACK.value])
+                seat.adjustBalance(Outcome.BLACKJACK, 0)
+            else:
+                to_play.append(seat)
+        return to_play
+
+    def playDealer(self):
+        # same stopping rule as BlackjackApp.canPlay for the dealer
+        dealer = self.dealer_hand
+        while self.seats[0].canPlay(dealer, is_dealer=True):
+            dealer.addCard(self.drawCard())
+
+    def playRound(self):
+        # plays one round for every seat still at the table, returns the seats that played
+        timer = self.timer
+        self.prepareShoe()
+        playing = self.takeBets()
+        if not playing:
+            return playing
+        t = timer.now()
+        self.dealCards(playing)
+        t = timer.record('round.deal', t)
+
+        results = []
+        for seat in self.settleNaturals(playing):
+            not_bust_indices = seat.playPlayerHands()
+            if not_bust_indices is None:
+                self.seated.remove(seat)
+                continue
+            results.append((seat, not_bust_indices))
+        t = timer.record('round.player', t)
+
+        # one dealer hand for every seat, settled against the same final score
+        if results:
+            self.revealHoleCard()
+            self.playDealer()
+            self.showDealerHand(seat for seat, _ in results)
+            t = timer.record('round.dealer', t)
+            dealer_high = self.seats[0].getHighScore(self.dealer_hand)
+            for seat, not_bust_indices in results:
+                seat.settleHands(not_bust_indices, dealer_high)
+        timer.record('round.settle', t)
+
+        self.rounds += 1
+        self.resetCards()
+        for seat in playing:
+            seat.interface.clear()
+            seat.interface.updateBalanceDisplay(seat.balance)
+        return playing
+
+    def runTable(self):
+        # plays rounds until every seat has left the table
+        for seat in self.seats:
+            seat.interface.greet()
+            seat.interface.updateBalanceDisplay(seat.balance)
+        while self.playRound():
+            pass
+
+
+if __name__ == "__main__":
+    from blackjack_interface import StrategyInterface
+    from blackjack_tournament import STRATEGIES
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-strategies', nargs='+', default=['basic'] * MAX_SEATS, choices=list(STRATEGIES),
+                        help='strategy of every seat, in playing order')
+    parser.add_argument('-rounds', type=int, default=1000)
+    parser.add_argument('-decks', type=int, default=6, help='number of decks in the shoe, 0 for an infinite deck')
+    parser.add_argument('-seed', type=int, default=None)
+    parser.add_argument('-timing', action='store_true', help='print the time spent in each phase')
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    shoe = Shoe(args.decks, rng=rng) if args.decks > 0 else None
+    timer = PhaseTimer() if args.timing else NULL_TIMER
+    interfaces = [StrategyInterface(STRATEGIES[name](), rounds=args.rounds) for name in args.strategies]
+    table = BlackjackTable(interfaces, rng=rng, shoe=shoe, timer=timer)
+    table.runTable()
+    print(f"{'seat':<6}{'strategy':<20}{'rounds':>8}{'balance':>9}")
+    for i, (name, seat) in enumerate(zip(args.strategies, table.seats)):
+        print(f"{i + 1:<6}{name:<20}{seat.interface.rounds_played:>8}{seat.balance:>9}")
+    print(f"table rounds: {table.rounds}")
+    if args.timing:
+        print(timer.report())
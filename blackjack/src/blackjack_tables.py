@@ -0,0 +1,231 @@
+# Module for precomputed strategy and expected value tables stored in one file
+#
+# Building the tables is an offline step (python blackjack_tables.py build):
+#   first, later, pairs  the basic strategy tables of blackjack_strategy
+#   evs/<decks>          expected value of every action for the first decision of
+#                        every two-card hand, shape (11, 11, 11, 4) indexed by
+#                        [first card value, second card value, up card value,
+#                        index in list(Actions)], NaN for an action not allowed;
+#                        decks 0 is the infinite deck of BlackjackApp.drawCard,
+#                        n decks a full n-deck shoe (CompositionSolver);
+#                        a natural is settled before any decision, its only
+#                        entry is STAND with the NATURAL_EV it is paid
+#
+# The file is a small header (MAGIC, VERSION, length of the JSON index, the
+# index of every array's dtype, shape and offset and the rulesHash() it was
+# built with) followed by the raw arrays, each aligned to ALIGNMENT bytes.
+# StrategyTables maps the file read-only on first use and the arrays are
+# views of the mapping, so starting costs no computation and every process
+# using the file shares the page cache's copy.
+#
+# rulesHash() is a hash of the sources the tables are computed from, read on
+# first use only, a file built by other rules is stale: basicStrategy() then
+# rebuilds the file with the infinite deck tables (the finite deck ones take
+# minutes each and are left to the build command). The file lives in the user's cache directory,
+# BLACKJACK_CACHE or XDG_CACHE_HOME/blackjack (~/.cache/blackjack).
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+from functools import lru_cache
+from time import perf_counter
+import numpy as np
+from blackjack_batch import TABLE_SHAPE
+from blackjack_composition import CompositionSolver, DECK_COMPOSITION
+from blackjack_misc import Actions
+from blackjack_strategy import BasicStrategy, actionEVs, buildBasicStrategy
+from cards import handOf
+
+MAGIC = b'BJTABLES'
+VERSION = 2
+ALIGNMENT = 64
+CACHE_DIR = os.environ.get('BLACKJACK_CACHE') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'blackjack')
+TABLE_FILE = os.path.join(CACHE_DIR, 'strategy_tables.bin')
+# modules whose rules the tables are computed from
+RULES_SOURCES = ('blackjack_game.py', 'blackjack_dealer.py', 'blackjack_strategy.py', 'blackjack_composition.py',
+                 'blackjack_batch.py', 'cards.py', 'blackjack_tables.py')
+# net win of a natural against a dealer without blackjack, as in optimalEV
+NATURAL_EV = 2.0
+EV_SHAPE = (TABLE_SHAPE[2], TABLE_SHAPE[2], TABLE_SHAPE[2], len(Actions))
+ACTION_LIST = list(Actions)
+# cache entries of the composition solver while building a finite deck table, about 500 MB
+SOLVER_ENTRIES = 10 ** 6
+_HEADER = struct.Struct('<8sII')
+
+
+@lru_cache(maxsize=None)
+def rulesHash():
+    sha = hashlib.sha256()
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for name in RULES_SOURCES:
+        with open(os.path.join(folder, name), 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()[:16]
+
+
+def _handEVs(decks, solver, first, second, upcard):
+    if {first, second} == {1, 10}:
+        return {Actions.STAND: NATURAL_EV}
+    if decks == 0:
+        return actionEVs(first + second, 1 in (first, second), upcard, pair=first == second)
+    comp = [n * decks for n in DECK_COMPOSITION]
+    for value in (first, second, upcard):
+        comp[value - 1] -= 1
+    return solver.actionEVs(handOf([first, second]), upcard, comp)
+
+
+def buildEVTable(decks=0):
+    # action expected values of every two-card hand, for the infinite deck or a shoe of decks decks
+    evs = np.full(EV_SHAPE, np.nan)
+    solver = CompositionSolver(SOLVER_ENTRIES) if decks else None
+    for upcard in range(1, TABLE_SHAPE[2]):
+        for first in range(1, TABLE_SHAPE[2]):
+            for second in range(first, TABLE_SHAPE[2]):
+                for action, ev in _handEVs(decks, solver, first, second, upcard).items():
+                    i = ACTION_LIST.index(action)
+                    evs[first, second, upcard, i] = evs[second, first, upcard, i] = ev
+    return evs
+
+
+def buildTables(decks=(0,)):
+    # every array of a tables file, by name
+    strategy = buildBasicStrategy()
+    arrays = {'first': strategy.first, 'later': strategy.later, 'pairs': strategy.pairs}
+    for n in decks:
+        arrays[f'evs/{n}'] = buildEVTable(n)
+    return arrays
+
+
+def writeTables(path, arrays):
+    # writes the arrays to a temporary file then renames it, so a process never maps a partial file
+    index, offset = {}, 0
+    for name, array in arrays.items():
+        index[name] = {'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({'rules': rulesHash(), 'arrays': index}).encode()
+    start = -(-(_HEADER.size + len(header)) // ALIGNMENT) * ALIGNMENT
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(start + index[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp, path)
+
+
+class StrategyTables(object):
+    def __init__(self, path=TABLE_FILE):
+        self.path = path
+        self._map = None
+        self._arrays = {}
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, length = _HEADER.unpack_from(self._map) if len(self._map) >= _HEADER.size else (b'', 0, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} strategy tables file")
+        header = json.loads(self._map[_HEADER.size:_HEADER.size + length])
+        self.rules, self.index = header['rules'], header['arrays']
+        self.start = -(-(_HEADER.size + length) // ALIGNMENT) * ALIGNMENT
+
+    def array(self, name):
+        # read-only view of an array of the file, mapped on first use
+        array = self._arrays.get(name)
+        if array is None:
+            if self._map is None:
+                self._open()
+            if name not in self.index:
+                raise KeyError(f"No table {name} in {self.path}")
+            entry = self.index[name]
+            dtype = np.dtype(entry['dtype'])
+            count = int(np.prod(entry['shape']))
+            array = np.frombuffer(self._map, dtype, count, self.start + entry['offset']).reshape(entry['shape'])
+            self._arrays[name] = array
+        return array
+
+    def isCurrent(self):
+        # whether the file exists and was built by the rules of this code
+        try:
+            if self._map is None:
+                self._open()
+        except (OSError, ValueError):
+            return False
+        return self.rules == rulesHash()
+
+    def decks(self):
+        # deck counts of the expected value tables of the file
+        if self._map is None:
+            self._open()
+        return sorted(int(name.split('/')[1]) for name in self.index if name.startswith('evs/'))
+
+    def basicStrategy(self):
+        return BasicStrategy(self.array('first'), self.array('later'), self.array('pairs'))
+
+    def handEVs(self, first, second, upcard, decks=0):
+        # expected value of every action allowed for the first decision of a
+        # two-card hand against the up card, by card values
+        evs = self.array(f'evs/{decks}')[first, second, upcard]
+        return {action: float(ev) for action, ev in zip(ACTION_LIST, evs) if not np.isnan(ev)}
+
+    def close(self):
+        # views handed out keep the mapping alive until they are released
+        self._arrays = {}
+        self._map = None
+
+
+_loaded = {}
+
+
+def loadTables(path=TABLE_FILE):
+    # the tables of a file, shared by every caller of the process
+    tables = _loaded.get(path)
+    if tables is None:
+        tables = _loaded[path] = StrategyTables(path)
+    return tables
+
+
+def basicStrategy(path=TABLE_FILE):
+    # the basic strategy of the tables file, (re)built first if missing or stale,
+    # computed in memory if the file cannot be written
+    tables = loadTables(path)
+    if not tables.isCurrent():
+        tables.close()
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            writeTables(path, buildTables())
+        except OSError:
+            return buildBasicStrategy()
+    return tables.basicStrategy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', choices=['build', 'show'])
+    parser.add_argument('-path', default=TABLE_FILE)
+    parser.add_argument('-decks', type=int, nargs='*', default=[0, 1, 2, 6, 8],
+                        help='deck counts of the expected value tables, 0 for the infinite deck')
+    parser.add_argument('-hand', type=int, nargs=2, default=[10, 6], help='card values of the hand to show')
+    parser.add_argument('-upcard', type=int, default=10)
+    args = parser.parse_args()
+    if args.command == 'build':
+        start = perf_counter()
+        os.makedirs(os.path.dirname(os.path.abspath(args.path)), exist_ok=True)
+        writeTables(args.path, buildTables(args.decks))
+        print(f"{args.path}: {os.path.getsize(args.path)} bytes built in {perf_counter() - start:.1f} s")
+    else:
+        start = perf_counter()
+        tables = StrategyTables(args.path)
+        strategy = tables.basicStrategy()
+        if not tables.isCurrent():
+            print(f"{args.path} was built by other rules, rebuild it")
+        print(f"mapped in {(perf_counter() - start) * 1000:.2f} ms\n")
+        print(strategy.chart())
+        for decks in tables.decks():
+            evs = tables.handEVs(*args.hand, args.upcard, decks)
+            print(f"\n{args.hand} vs {args.upcard}, {decks or 'infinite'} decks: "
+                  + ", ".join(f"{a.value} {ev:+.4f}" for a, ev in evs.items()))
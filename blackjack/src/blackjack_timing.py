@@ -0,0 +1,150 @@
+# Module for timing the phases of a round and the interface calls
+#
+# BlackjackApp takes a timer: NULL_TIMER (default) does nothing, a PhaseTimer
+# records the wall time of every phase into a histogram with power of 2
+# buckets in nanoseconds. The interface is only wrapped by TimedInterface when
+# timing is enabled, so the disabled path keeps direct calls.
+from inspect import isawaitable
+from time import perf_counter_ns
+
+BUCKETS = 48  # up to 2**47 ns, about 39 hours
+
+
+class Histogram(object):
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, ns):
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if ns > self.max:
+            self.max = ns
+        self.buckets[min(ns.bit_length(), BUCKETS - 1)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def percentile(self, q):
+        # upper bound in ns of the bucket holding the q-th percentile (0 < q <= 100)
+        if not self.count:
+            return 0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min((1 << i) - 1, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total_ns': self.total,
+            'mean_ns': self.total / self.count if self.count else 0.0,
+            'min_ns': self.min or 0,
+            'max_ns': self.max,
+            'p50_ns': self.percentile(50),
+            'p99_ns': self.percentile(99),
+            'buckets': {(1 << i) - 1: n for i, n in enumerate(self.buckets) if n}
+        }
+
+
+class NullTimer(object):
+    # timer of the disabled path
+    enabled = False
+
+    def now(self):
+        return 0
+
+    def record(self, name, start):
+        return 0
+
+    def snapshot(self):
+        return {}
+
+
+NULL_TIMER = NullTimer()
+
+
+class PhaseTimer(object):
+    enabled = True
+
+    def __init__(self):
+        self.histograms = {}
+
+    def now(self):
+        return perf_counter_ns()
+
+    def record(self, name, start):
+        # adds the time since start to the histogram of name, returns the current time
+        end = perf_counter_ns()
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+        hist.add(end - start)
+        return end
+
+    def snapshot(self):
+        return {name: hist.snapshot() for name, hist in sorted(self.histograms.items())}
+
+    def reset(self):
+        self.histograms = {}
+
+    def report(self):
+        lines = [f"{'phase':<36}{'calls':>9}{'mean us':>11}{'p50 us':>10}{'p99 us':>10}{'max us':>10}"]
+        for name, stats in self.snapshot().items():
+            lines.append(f"{name:<36}{stats['count']:>9}{stats['mean_ns'] / 1e3:>11.2f}"
+                         f"{stats['p50_ns'] / 1e3:>10.2f}{stats['p99_ns'] / 1e3:>10.2f}"
+                         f"{stats['max_ns'] / 1e3:>10.2f}")
+        return "\n".join(lines)
+
+
+async def _timedAwait(awaitable, timer, key, start):
+    try:
+        return await awaitable
+    finally:
+        timer.record(key, start)
+
+
+class TimedInterface(object):
+    # forwards everything to an interface, timing its method calls as 'interface.<name>'
+    def __init__(self, interface, timer: PhaseTimer):
+        self.__dict__['_interface'] = interface
+        self.__dict__['_timer'] = timer
+        self.__dict__['_methods'] = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._interface, name)
+        if not callable(attr):
+            return attr
+        method = self._methods.get(name)
+        if method is None:
+            timer, key = self._timer, 'interface.' + name
+            def method(*args, **kwargs):
+                start = perf_counter_ns()
+                try:
+                    result = getattr(self._interface, name)(*args, **kwargs)
+                except BaseException:
+                    timer.record(key, start)
+                    raise
+                if isawaitable(result):
+                    # a coroutine of an async interface is timed until it returns
+                    return _timedAwait(result, timer, key, start)
+                timer.record(key, start)
+                return result
+            self._methods[name] = method
+        return method
+
+    def __setattr__(self, name, value):
+        setattr(self._interface, name, value)
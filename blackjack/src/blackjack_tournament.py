@@ -0,0 +1,123 @@
+# Module for comparing strategies on the same card sequences
+#
+# Every strategy plays the same sessions: session i draws its cards from a
+# generator seeded with the i-th seed spawned from the master seed (common
+# random numbers), through the real BlackjackApp.runGame loop, so differences
+# between strategies are not blurred by different luck.
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from blackjack_game import BlackjackApp, MIN_BALANCE
+from blackjack_interface import Strategy, StrategyInterface
+from blackjack_misc import Actions, ACCEPTED_BETS
+from blackjack_tables import basicStrategy
+from card_sources import BufferedCards
+
+
+class DealerMimic(Strategy):
+    name = "dealer"
+
+    def getAction(self, hand, upcard, actions, balance):
+        score = hand.getScore()[1] if 0 < hand.getScore()[1] <= 21 else hand.getScore()[0]
+        return Actions.HIT if score < 17 else Actions.STAND
+
+
+class AlwaysStand(Strategy):
+    name = "stand"
+
+    def getAction(self, hand, upcard, actions, balance):
+        return Actions.STAND
+
+
+class BasicPlayer(Strategy):
+    name = "basic"
+
+    # tables: a BasicStrategy, the one of the strategy tables file by default
+    def __init__(self, tables=None):
+        self.tables = tables if tables is not None else basicStrategy()
+
+    def getAction(self, hand, upcard, actions, balance):
+        return self.tables.decide(hand, upcard.getValue()[0], actions)
+
+
+class ProgressiveBasicPlayer(BasicPlayer):
+    # basic strategy play, bets the largest accepted bet while ahead of the start balance
+    name = "basic-progressive"
+
+    def __init__(self, start_balance=100, tables=None):
+        super().__init__(tables)
+        self.start_balance = start_balance
+
+    def getBet(self, balance):
+        if balance > self.start_balance:
+            return max(b for b in ACCEPTED_BETS if b <= balance)
+        return ACCEPTED_BETS[0]
+
+
+STRATEGIES = {s.name: s for s in (BasicPlayer, ProgressiveBasicPlayer, DealerMimic, AlwaysStand)}
+
+
+class _TournamentApp(BlackjackApp):
+    # keeps the sum and the sum of squares of the net win of every round
+    def __init__(self, interface, rng):
+        super().__init__(interface, rng)
+        self.rounds = 0
+        self.net = 0
+        self.net_squares = 0
+
+    def startRound(self):
+        before = self.balance
+        super().startRound()
+        net = self.balance - before
+        self.rounds += 1
+        self.net += net
+        self.net_squares += net * net
+
+
+def playSession(strategy: Strategy, seed, rounds):
+    # one session from the start balance, until rounds are played or the balance runs out
+    app = _TournamentApp(StrategyInterface(strategy, rounds=rounds), BufferedCards(np.random.default_rng(seed)))
+    app.runGame()
+    return app.rounds, app.net, app.net_squares, app.balance < MIN_BALANCE
+
+
+def runTournament(strategies, sessions=100, rounds=1000, seed=None, workers=None):
+    # returns, per strategy name: EV and variance of the net win per round,
+    # ruin rate and mean number of rounds per session
+    seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(sessions)]
+    tasks = [(strategy, s) for strategy in strategies for s in seeds]
+    args = ([t[0] for t in tasks], [t[1] for t in tasks], [rounds] * len(tasks))
+    if workers == 1:
+        results = list(map(playSession, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(playSession, *args, chunksize=max(1, len(tasks) // 64)))
+
+    report = {}
+    for i, strategy in enumerate(strategies):
+        played = results[i * sessions:(i + 1) * sessions]
+        total_rounds = sum(r[0] for r in played)
+        mean = sum(r[1] for r in played) / total_rounds if total_rounds else 0.0
+        mean_square = sum(r[2] for r in played) / total_rounds if total_rounds else 0.0
+        report[strategy.name] = {
+            'ev': mean,
+            'variance': mean_square - mean * mean,
+            'ruin_rate': sum(r[3] for r in played) / sessions,
+            'rounds': total_rounds / sessions
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-strategies', nargs='+', default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument('-sessions', type=int, default=200)
+    parser.add_argument('-rounds', type=int, default=1000)
+    parser.add_argument('-seed', type=int, default=None)
+    parser.add_argument('-workers', type=int, default=None)
+    args = parser.parse_args()
+    players = [STRATEGIES[name]() for name in args.strategies]
+    report = runTournament(players, args.sessions, args.rounds, args.seed, args.workers)
+    print(f"{'strategy':<20}{'EV/round':>10}{'variance':>10}{'ruin rate':>11}{'rounds':>9}")
+    for name, stats in report.items():
+        print(f"{name:<20}{stats['ev']:>10.3f}{stats['variance']:>10.1f}{stats['ruin_rate']:>11.3f}{stats['rounds']:>9.1f}")
@@ -0,0 +1,77 @@
+# Module for sources of cards drawn from an infinite deck
+#
+# A card source has a draw() method returning a Card; Shoe in cards.py is one
+# too. BlackjackApp accepts any of them, or a random number generator which
+# cardSource() wraps into the matching source.
+import random
+from cards import DECK, DECK_SIZE
+
+
+class RandomCards(object):
+    # one random() call per card, from the random module or a random.Random
+    def __init__(self, rng=random):
+        self.rng = rng
+
+    def draw(self):
+        return DECK[int(self.rng.random() * DECK_SIZE)]
+
+
+class BufferedCards(object):
+    # card indices are generated in blocks by one vectorised call, then read
+    # from the buffer; rng is a NumPy Generator (default) or a random.Random
+    def __init__(self, rng=None, size=4096):
+        if rng is None:
+            import numpy as np
+            rng = np.random.default_rng()
+        self.rng = rng
+        self.size = size
+        self._refill()
+
+    def _refill(self):
+        if hasattr(self.rng, 'integers'):
+            self.buffer = self.rng.integers(0, DECK_SIZE, size=self.size).tolist()
+        else:
+            self.buffer = self.rng.choices(range(DECK_SIZE), k=self.size)
+        self.cursor = 0
+
+    def draw(self):
+        if self.cursor >= self.size:
+            self._refill()
+        idx = self.buffer[self.cursor]
+        self.cursor += 1
+        return DECK[idx]
+
+
+class RecordedCards(object):
+    # replays a recorded sequence of card indices
+    def __init__(self, indices):
+        self.indices = list(indices)
+        self.cursor = 0
+
+    def draw(self):
+        if self.cursor >= len(self.indices):
+            raise IndexError("No more recorded cards to draw")
+        idx = self.indices[self.cursor]
+        self.cursor += 1
+        return DECK[idx]
+
+
+class RecordingCards(object):
+    # draws from another source and keeps the index of every card drawn
+    def __init__(self, source):
+        self.source = source
+        self.record = []
+
+    def draw(self):
+        card = self.source.draw()
+        self.record.append(card.index)
+        return card
+
+
+def cardSource(rng):
+    # card source for a random number generator or an existing card source
+    if hasattr(rng, 'draw'):
+        return rng
+    if hasattr(rng, 'integers'):
+        return BufferedCards(rng)
+    return RandomCards(rng)
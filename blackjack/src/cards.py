@@ -1,4 +1,6 @@
 # Module for cards class and methods
+import random
+from collections import Counter
 
 SUITS = ('hearts','spades','diamonds','clubs')
 RANKS = (
@@ -7,12 +9,74 @@ RANKS = (
         ('jack', [10]), ('queen', [10]), ('king', [10])
     )
 
+DECK_SIZE = len(SUITS) * len(RANKS)
+MAX_DECKS = 8
+
+
+def cardIndex(card):
+    # cards are numbered 0..51, rank first: index // 4 is the rank, index % 4 the suit
+    return card.index
+
+
+def cardFromIndex(idx):
+    return DECK[idx]
+
+
+# packed hand state: low total (6 bits), has an ace, card count (4 bits),
+# pair value (4 bits, 0 when not a pair), split disabled, split from ace
+STATE_TOTAL_BITS, STATE_COUNT_BITS, STATE_PAIR_BITS = 6, 4, 4
+_SOFT_SHIFT = STATE_TOTAL_BITS
+_COUNT_SHIFT = _SOFT_SHIFT + 1
+_PAIR_SHIFT = _COUNT_SHIFT + STATE_COUNT_BITS
+_NO_SPLIT_SHIFT = _PAIR_SHIFT + STATE_PAIR_BITS
+_FROM_ACE_SHIFT = _NO_SPLIT_SHIFT + 1
+
+
+def encodeState(total, soft, count, pair=0, no_split=False, from_ace=False):
+    # totals and counts over the field size are capped, such sets are bust anyway
+    return (min(total, (1 << STATE_TOTAL_BITS) - 1)
+            | soft << _SOFT_SHIFT
+            | min(count, (1 << STATE_COUNT_BITS) - 1) << _COUNT_SHIFT
+            | pair << _PAIR_SHIFT
+            | no_split << _NO_SPLIT_SHIFT
+            | from_ace << _FROM_ACE_SHIFT)
+
+
+def decodeState(state):
+    # (total, soft, count, pair, no_split, from_ace)
+    return (
+        state & ((1 << STATE_TOTAL_BITS) - 1),
+        bool(state >> _SOFT_SHIFT & 1),
+        state >> _COUNT_SHIFT & ((1 << STATE_COUNT_BITS) - 1),
+        state >> _PAIR_SHIFT & ((1 << STATE_PAIR_BITS) - 1),
+        bool(state >> _NO_SPLIT_SHIFT & 1),
+        bool(state >> _FROM_ACE_SHIFT & 1)
+    )
+
+
+def _rankForValue(value):
+    return RANKS[value - 1][0]
+
+
 class Card(object):
-    def __init__(self, suit, rank):
-        self.suit = suit
-        self.rank = rank
-        self._setValue(rank)
-        self.hidden = False
+    # Cards are immutable and shared: the 52 instances are built once at import
+    # and Card(suit, rank) returns the existing one
+    __slots__ = ('suit', 'rank', 'value', 'index')
+
+    def __new__(cls, suit, rank):
+        try:
+            return _INTERNED[(suit, rank)]
+        except KeyError:
+            raise ValueError(f"Unknown card: {rank} of {suit}") from None
+
+    @classmethod
+    def _build(cls, suit_idx, rank_idx):
+        card = object.__new__(cls)
+        object.__setattr__(card, 'suit', SUITS[suit_idx])
+        object.__setattr__(card, 'rank', RANKS[rank_idx][0])
+        object.__setattr__(card, 'value', RANKS[rank_idx][1])
+        object.__setattr__(card, 'index', rank_idx * len(SUITS) + suit_idx)
+        return card
 
     def getSuit(self):
         return self.suit
@@ -23,18 +87,15 @@ class Card(object):
     def getValue(self):
         return self.value
 
-    def isHidden(self):
-        return self.hidden
+    def __setattr__(self, name, value):
+        raise AttributeError("Card objects are immutable")
 
-    def _setValue(self, rank):
-        self.value = []
-        for rec in RANKS:
-            if rank == rec[0]:
-                self.value = rec[1]
-                break
+    def __delattr__(self, name):
+        raise AttributeError("Card objects are immutable")
 
-    def toggleVisibility(self):
-        self.hidden = not self.hidden
+    def __reduce__(self):
+        # copies and unpickled cards resolve to the shared instance
+        return (Card, (self.suit, self.rank))
 
     def __str__(self):
         return self.rank + " of " + self.suit
@@ -44,18 +105,39 @@ class Card(object):
             return NotImplemented
         return (self.rank == other.rank and self.suit == other.suit)
 
+    def __hash__(self):
+        return self.index
+
+
+DECK = tuple(Card._build(idx % len(SUITS), idx // len(SUITS)) for idx in range(DECK_SIZE))
+_INTERNED = {(c.suit, c.rank): c for c in DECK}
+
+
 class BlackjackCardSet(object):
     def __init__(self, no_split=False):
         self.cards = []
+        self.hidden = set()
         self.score = [0] * 2
         self.has_ace = False
         self.no_split = no_split
         self.blackjack = False
+        # running totals, kept up to date by every change to the set
+        self.low_total = 0
+        self.aces = 0
+        self.hidden_total = 0
+        self.hidden_aces = 0
 
-    def addCard(self, card: Card):
+    def addCard(self, card: Card, hidden=False):
         self.cards.append(card)
-        if card.getRank() == RANKS[0][0]:
+        value, is_ace = card.getValue()[0], card.getRank() == RANKS[0][0]
+        self.low_total += value
+        if is_ace:
+            self.aces += 1
             self.has_ace = True
+        if hidden:
+            self.hidden.add(len(self.cards) - 1)
+            self.hidden_total += value
+            self.hidden_aces += is_ace
         self._updateTotal()
 
     def canSplit(self):
@@ -65,7 +147,15 @@ class BlackjackCardSet(object):
 
     def doSplit(self):
         split_set = BlackjackCardSet(no_split=self.cards[0].getRank() == RANKS[0][0])
-        split_set.addCard(self.cards.pop())
+        card = self.cards.pop()
+        split_set.addCard(card)
+        value, is_ace = card.getValue()[0], card.getRank() == RANKS[0][0]
+        self.low_total -= value
+        self.aces -= is_ace
+        if len(self.cards) in self.hidden:
+            self.hidden.discard(len(self.cards))
+            self.hidden_total -= value
+            self.hidden_aces -= is_ace
         self._updateTotal()
         self.no_split = True
         return split_set
@@ -79,6 +169,45 @@ class BlackjackCardSet(object):
     def getScore(self):
         return self.score
 
+    def getState(self):
+        # packed integer of everything that matters for playing the set on
+        pair = 0
+        if len(self.cards) == 2 and self.cards[0].getValue() == self.cards[1].getValue():
+            pair = self.cards[0].getValue()[0]
+        return encodeState(self.low_total, self.aces > 0, len(self.cards), pair,
+                           self.no_split, self.isSplitFromAce())
+
+    @classmethod
+    def fromState(cls, state):
+        # a representative card set with the given packed state
+        total, soft, count, pair, no_split, from_ace = decodeState(state)
+        if pair > RANKS[-1][1][0]:
+            raise ValueError(f"No card set for state {state}")
+        if pair:
+            values = [pair, pair]
+        else:
+            # one ace when soft, the rest as high as possible (aces allowed in a soft set)
+            lowest = 1 if soft else 2
+            others = count - 1 if soft else count
+            remaining = total - 1 if soft else total
+            if others < 0 or not lowest * others <= remaining <= 10 * others:
+                raise ValueError(f"No card set for state {state}")
+            values = [lowest] * others
+            remaining -= lowest * others
+            for i in range(others):
+                added = min(10 - lowest, remaining)
+                values[i] += added
+                remaining -= added
+            if soft:
+                # the ace goes first only for a set split from aces
+                values = [1] + values if from_ace or not no_split else values + [1]
+        hand = cls(no_split=no_split)
+        for i in range(len(values)):
+            hand.addCard(Card(SUITS[i % len(SUITS)], _rankForValue(values[i])))
+        if hand.getState() != state:
+            raise ValueError(f"No card set for state {state}")
+        return hand
+
     def hasAce(self):
         return self.has_ace
 
@@ -86,10 +215,16 @@ class BlackjackCardSet(object):
         return self.blackjack
 
     def hideCard(self, idx):
-        if not self.cards[idx].isHidden():
-            self.cards[idx].toggleVisibility()
+        idx = range(len(self.cards))[idx]
+        if idx not in self.hidden:
+            self.hidden.add(idx)
+            self.hidden_total += self.cards[idx].getValue()[0]
+            self.hidden_aces += self.cards[idx].getRank() == RANKS[0][0]
         self._updateTotal()
 
+    def isHidden(self, idx):
+        return range(len(self.cards))[idx] in self.hidden
+
     def isSplitDisabled(self):
         return self.no_split
 
@@ -99,28 +234,20 @@ class BlackjackCardSet(object):
         return False
 
     def revealCard(self, idx):
-        if self.cards[idx].isHidden():
-            self.cards[idx].toggleVisibility()
+        idx = range(len(self.cards))[idx]
+        if idx in self.hidden:
+            self.hidden.discard(idx)
+            self.hidden_total -= self.cards[idx].getValue()[0]
+            self.hidden_aces -= self.cards[idx].getRank() == RANKS[0][0]
         self._updateTotal()
 
     def _updateTotal(self):
-        low, high = 0, 1
-        visible_ace = 0
-        full_score = [0] * 2
-        visible_score = [0] * 2
-        for c in self.cards:
-            if not c.isHidden():
-                visible_score[low] = visible_score[low] + c.getValue()[low]
-                if c.getRank() == RANKS[0][0]:  # count an ace
-                    visible_ace += 1
-            full_score[low] = full_score[low] + c.getValue()[low]
+        # constant time, derived from the running totals
+        visible = self.low_total - self.hidden_total
         # use alt value for 1 ACE only, if the set has many
-        if visible_ace > 0:
-            visible_score[high] = visible_score[low] + 10
-        if self.has_ace:
-            full_score[high] = full_score[low] + 10
-        self.score = visible_score
-        self.blackjack = 21 in full_score and len(self.cards) == 2
+        self.score = [visible, visible + 10 if self.aces > self.hidden_aces else 0]
+        self.blackjack = len(self.cards) == 2 and \
+                         (self.low_total == 21 or (self.has_ace and self.low_total == 11))
 
     def __str__(self):
         cards_str = ""
@@ -130,15 +257,78 @@ class BlackjackCardSet(object):
         return cards_str
 
     def __eq__(self, other):
+        # same cards in any order
         if not isinstance(other, BlackjackCardSet):
             return NotImplemented
         if len(self.cards) != len(other.cards):
             return False
-        
-        used_idx = []
-        for c in self.cards:
-            for i in range(len(other.cards)):
-                if (c == other.cards[i]) and (i not in used_idx):
-                    used_idx.append(i)
-                    break
-        return len(used_idx) == len(self.cards)
\ No newline at end of file
+        return Counter(self.cards) == Counter(other.cards)
+
+    def __hash__(self):
+        # follows __eq__, a set must not change while it is used as a key
+        return hash(frozenset(Counter(self.cards).items()))
+
+
+def handOf(values):
+    # card set of the given card values, 1 for an ace and 10 for a ten
+    hand = BlackjackCardSet()
+    for value in values:
+        hand.addCard(next(c for c in DECK if c.getValue()[0] == value))
+    return hand
+
+
+class Shoe(object):
+    # finite shoe of 1..8 decks, stored as card indices, a cut card placed at
+    # the penetration point tells when to reshuffle between rounds. newRound()
+    # marks the cards dealt so far as discards: a shoe running out in the
+    # middle of a round is rebuilt from the discards only, the cards of the
+    # round staying out of it
+    def __init__(self, decks=6, penetration=0.75, rng=random):
+        if not 1 <= decks <= MAX_DECKS:
+            raise ValueError(f"Number of decks must be between 1 and {MAX_DECKS}")
+        if not 0 < penetration <= 1:
+            raise ValueError("Penetration must be within (0, 1]")
+        self.decks = decks
+        self.rng = rng
+        self.cards = bytearray(range(DECK_SIZE)) * decks
+        self.cut = int(len(self.cards) * penetration)
+        self.cursor = 0
+        self.round_start = 0
+        self.shuffle()
+
+    def draw(self):
+        if self.cursor >= len(self.cards):
+            self._reshuffleDiscards()
+        idx = self.cards[self.cursor]
+        self.cursor += 1
+        return DECK[idx]
+
+    def newRound(self):
+        self.round_start = self.cursor
+
+    def _reshuffleDiscards(self):
+        # the cards of the round go first, already dealt, then the shuffled discards;
+        # without discards (no round marked) the whole shoe is reshuffled
+        if self.round_start == 0:
+            self.shuffle()
+            return
+        discards = self.cards[:self.round_start]
+        self.rng.shuffle(discards)
+        in_play = self.cards[self.round_start:]
+        self.cards = in_play + discards
+        self.cursor = len(in_play)
+        self.round_start = 0
+
+    def needsShuffle(self):
+        return self.cursor >= self.cut
+
+    def remaining(self):
+        return len(self.cards) - self.cursor
+
+    def shuffle(self):
+        self.rng.shuffle(self.cards)
+        self.cursor = 0
+        self.round_start = 0
+
+    def __len__(self):
+        return len(self.cards)
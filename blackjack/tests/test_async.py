@@ -0,0 +1,122 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import asyncio
+import random
+import unittest
+from blackjack_async import AsyncAdapter, AsyncBlackjackApp, playGames
+from blackjack_game import BlackjackApp
+from blackjack_interface import HeadlessInterface, StrategyInterface
+from blackjack_misc import Actions
+from blackjack_strategy import buildBasicStrategy
+from blackjack_timing import PhaseTimer
+from blackjack_tournament import BasicPlayer
+from card_sources import RecordedCards
+from cards import Card, Shoe
+
+
+def cards_of(*ranks):
+    return RecordedCards([Card('hearts', rank).index for rank in ranks])
+
+
+class _WaitingPlayer(HeadlessInterface):
+    # async interface whose decisions come from a queue, like a remote player
+    def __init__(self, rounds):
+        super().__init__(rounds=rounds)
+        self.asked = asyncio.Queue()
+        self.answers = asyncio.Queue()
+
+    async def getAction(self, actions):
+        await self.asked.put(actions)
+        return await self.answers.get()
+
+    async def getBet(self, balance):
+        return self.bet
+
+    async def wantsToPlay(self):
+        return super().wantsToPlay()
+
+
+class TestAsyncBlackjackApp(unittest.TestCase):
+
+    def test_same_game_as_sync(self):
+        """
+        Test that an async app plays the same game as a BlackjackApp with the same cards
+        """
+        tables = buildBasicStrategy()
+        for seed in range(10):
+            app = BlackjackApp(StrategyInterface(BasicPlayer(tables), rounds=100), shoe=Shoe(2, rng=random.Random(seed)))
+            app.runGame()
+            async_app = AsyncBlackjackApp(AsyncAdapter(StrategyInterface(BasicPlayer(tables), rounds=100)),
+                                          shoe=Shoe(2, rng=random.Random(seed)))
+            asyncio.run(async_app.runGame())
+            self.assertEqual(async_app.balance, app.balance)
+            self.assertEqual(async_app.interface.rounds_played, app.interface.rounds_played)
+
+    def test_games_interleave(self):
+        """
+        Test that bots keep playing while another game waits for its player's decision
+        """
+        async def main():
+            waiting = _WaitingPlayer(rounds=1)
+            bots = [AsyncBlackjackApp(AsyncAdapter(HeadlessInterface(rounds=50)), rng=random.Random(i))
+                    for i in range(20)]
+            for bot in bots:
+                bot.balance = 10 ** 4
+            # the player has 12 against a 7, the dealer busts with a ten
+            human = AsyncBlackjackApp(waiting, rng=cards_of('ten', 'nine', 'two', 'seven', 'ten'))
+            waiting_game = asyncio.ensure_future(human.runGame())
+            actions = await waiting.asked.get()
+            # every bot game ends while the player is still thinking
+            await playGames(bots)
+            self.assertFalse(waiting_game.done())
+            self.assertIn(Actions.STAND, actions)
+            await waiting.answers.put(Actions.STAND)
+            await waiting_game
+            return bots, human
+
+        bots, human = asyncio.run(main())
+        for bot in bots:
+            self.assertEqual(bot.interface.rounds_played, 50)
+        self.assertEqual(human.interface.rounds_played, 1)
+        self.assertEqual(human.balance, 110)
+
+    def test_async_round(self):
+        """
+        Test that a single round can be awaited and the hand is played with the awaited actions
+        """
+        async def main():
+            # the player has 11 against a 7, hits a nine and stands on 20, the dealer stands on 17
+            player = _WaitingPlayer(rounds=1)
+            app = AsyncBlackjackApp(player, rng=cards_of('five', 'ten', 'six', 'seven', 'nine'))
+            round_ = asyncio.ensure_future(app.startRound())
+            asked = [await player.asked.get()]
+            await player.answers.put(Actions.HIT)
+            asked.append(await player.asked.get())
+            await player.answers.put(Actions.STAND)
+            await round_
+            return app, asked
+
+        app, asked = asyncio.run(main())
+        self.assertIn(Actions.DOUBLE, asked[0])
+        self.assertListEqual(asked[1], [Actions.HIT, Actions.STAND])
+        self.assertEqual(app.getHighScore(app.player_hand[0]), 20)
+        self.assertEqual(app.balance, 110)
+
+    def test_timed_async_interface(self):
+        """
+        Test that the timer of an async app times the awaited decisions
+        """
+        timer = PhaseTimer()
+        app = AsyncBlackjackApp(AsyncAdapter(HeadlessInterface(rounds=30)), rng=random.Random(6), timer=timer)
+        app.balance = 10 ** 4
+        asyncio.run(app.runGame())
+        stats = timer.snapshot()
+        self.assertEqual(stats['interface.wantsToPlay']['count'], 31)
+        self.assertEqual(stats['interface.getBet']['count'], 30)
+        self.assertEqual(stats['round.deal']['count'], 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
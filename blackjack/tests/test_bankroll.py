@@ -0,0 +1,101 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import random
+import unittest
+import numpy as np
+from blackjack_bankroll import BankrollSimulator, FlatBet, ProportionalBet, ProgressiveBet, acceptedBets, \
+    unitDistribution, report, ruinCurve, UNIT_RESULTS
+from blackjack_batch import strategyTable
+from blackjack_game import BlackjackApp
+from blackjack_interface import HeadlessInterface
+from blackjack_misc import Actions
+from test_batch import basic_decide
+
+
+def stand_decide(total, soft, upcard):
+    return Actions.STAND if total >= 17 else Actions.HIT
+
+
+class _RoundByRound(FlatBet):
+    # flat bet that never lets the simulator jump rounds
+    def __init__(self, bet=10):
+        super().__init__(bet)
+        self.constant_from = float('inf')
+
+
+class TestBetPolicies(unittest.TestCase):
+
+    def test_accepted_bets(self):
+        """
+        Test that amounts are rounded down to accepted bets
+        """
+        self.assertListEqual(acceptedBets(np.array([5, 10, 24, 25, 99, 100, 5000])).tolist(),
+                             [10, 10, 10, 25, 50, 100, 100])
+
+    def test_policies(self):
+        """
+        Test the bets of every policy, never above the balance
+        """
+        balance = np.array([10, 30, 120, 260, 2000])
+        self.assertListEqual(FlatBet(25).bets(balance).tolist(), [10, 25, 25, 25, 25])
+        self.assertListEqual(ProportionalBet(0.2).bets(balance).tolist(), [10, 10, 10, 50, 100])
+        self.assertListEqual(ProgressiveBet(100).bets(balance).tolist(), [10, 10, 100, 100, 100])
+
+
+class TestBankrollSimulator(unittest.TestCase):
+
+    def test_unit_distribution(self):
+        """
+        Test that the distribution of results sums to 1 and doubling only helps basic strategy
+        """
+        with_double, no_double = unitDistribution(strategyTable(basic_decide), rounds=200000, seed=1)
+        self.assertAlmostEqual(with_double.sum(), 1.0)
+        self.assertAlmostEqual(no_double.sum(), 1.0)
+        self.assertEqual(no_double[0], 0.0)
+        self.assertGreater(with_double @ UNIT_RESULTS, no_double @ UNIT_RESULTS)
+
+    def test_stopping_rules(self):
+        """
+        Test that ruined players end below the minimum balance and the others play the horizon
+        """
+        probs = unitDistribution(strategyTable(stand_decide), rounds=100000, seed=2)
+        balance, ruined_at = BankrollSimulator(*probs, players=2000, seed=3).run(300)
+        ruined = ruined_at >= 0
+        self.assertTrue((balance[ruined] < 10).all())
+        self.assertTrue((balance[~ruined] >= 10).all())
+        self.assertTrue((ruined_at[ruined] <= 300).all())
+        self.assertTrue((balance % 10 == 0).all())
+        stats = report(balance, ruined_at, 300)
+        self.assertAlmostEqual(stats['ruin_probability'], ruined.mean())
+        self.assertAlmostEqual(ruinCurve(ruined_at, [300])[0], ruined.mean())
+
+    def test_jumps_match_round_by_round(self):
+        """
+        Test that jumping over safe rounds gives the same statistics as playing every round, without warnings
+        """
+        probs = unitDistribution(strategyTable(basic_decide), rounds=200000, seed=4)
+        with np.errstate(all='raise'):
+            jumped = BankrollSimulator(*probs, policy=FlatBet(10), players=20000, seed=5).run(400)
+            stepped = BankrollSimulator(*probs, policy=_RoundByRound(10), players=20000, seed=6).run(400)
+        self.assertAlmostEqual((jumped[1] >= 0).mean(), (stepped[1] >= 0).mean(), delta=0.02)
+        self.assertAlmostEqual(jumped[0].mean(), stepped[0].mean(), delta=3)
+
+    def test_matches_run_game(self):
+        """
+        Test that the ruin rate matches the one of sessions played by runGame
+        """
+        sessions, horizon = 300, 100
+        ruined = 0
+        for seed in range(sessions):
+            app = BlackjackApp(HeadlessInterface(rounds=horizon), rng=random.Random(seed))
+            app.runGame()
+            ruined += app.balance < 10
+        probs = unitDistribution(strategyTable(stand_decide), rounds=400000, seed=7)
+        balance, ruined_at = BankrollSimulator(*probs, players=20000, seed=8).run(horizon)
+        self.assertAlmostEqual((ruined_at >= 0).mean(), ruined / sessions, delta=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import random
+import unittest
+import numpy as np
+from blackjack_misc import Actions, Outcome
+from blackjack_batch import BatchEngine, strategyTable, tableStrategy, handKey, \
+                            OUTCOMES, WIN, BLACKJACK, LOSS, TIE, HIT, STAND, DOUBLE
+from blackjack_game import BlackjackApp
+from blackjack_interface import HeadlessInterface
+from cards import Card, BlackjackCardSet
+
+
+def basic_decide(total, soft, upcard):
+    if total in (10, 11) and not soft:
+        return Actions.DOUBLE
+    if soft:
+        return Actions.HIT if total < 18 else Actions.STAND
+    if total >= 17 or (total >= 13 and 2 <= upcard <= 6):
+        return Actions.STAND
+    return Actions.HIT
+
+
+class TestStrategyTable(unittest.TestCase):
+
+    def test_table_built_from_rule(self):
+        """
+        Test that a strategy table stores the decision for each total, softness and up card
+        """
+        table = strategyTable(basic_decide)
+        self.assertEqual(table[0, 11, 10], DOUBLE)
+        self.assertEqual(table[0, 16, 10], HIT)
+        self.assertEqual(table[0, 16, 5], STAND)
+        self.assertEqual(table[1, 17, 5], HIT)
+        self.assertEqual(table[1, 19, 1], STAND)
+
+    def test_hand_key(self):
+        """
+        Test that a card set is keyed by its high score when an ace can count as 11
+        """
+        hand = BlackjackCardSet()
+        hand.addCard(Card('hearts', 'ace'))
+        hand.addCard(Card('clubs', 'six'))
+        self.assertEqual(handKey(hand), (17, True))
+        hand.addCard(Card('clubs', 'nine'))
+        self.assertEqual(handKey(hand), (16, False))
+
+    def test_table_strategy_no_double_after_first_card(self):
+        """
+        Test that the table strategy hits instead of doubling when doubling is not allowed
+        """
+        strategy = tableStrategy(strategyTable(basic_decide))
+        hand, dealer = BlackjackCardSet(), BlackjackCardSet()
+        for c in [Card('hearts', 'five'), Card('clubs', 'six')]: hand.addCard(c)
+        for c in [Card('hearts', 'two'), Card('clubs', 'ten')]: dealer.addCard(c)
+        self.assertEqual(strategy(hand, dealer, [Actions.HIT, Actions.STAND, Actions.DOUBLE]), Actions.DOUBLE)
+        self.assertEqual(strategy(hand, dealer, [Actions.HIT, Actions.STAND]), Actions.HIT)
+
+
+class TestBatchEngine(unittest.TestCase):
+
+    def test_results_shape_and_values(self):
+        """
+        Test that every round is settled with a net win allowed by its outcome
+        """
+        engine = BatchEngine(strategyTable(basic_decide), seed=1)
+        outcome, net = engine.playRounds(50000)
+        self.assertEqual(outcome.shape, (50000,))
+        self.assertTrue(set(np.unique(net)) <= {-20, -10, 0, 10, 20})
+        self.assertTrue(np.all(net[outcome == BLACKJACK] == 20))
+        self.assertTrue(np.all(net[outcome == TIE] == 0))
+        self.assertTrue(np.all(net[outcome == WIN] > 0))
+        self.assertTrue(np.all(net[outcome == LOSS] < 0))
+
+    def test_same_seed_same_results(self):
+        """
+        Test that two engines with the same seed play identical rounds
+        """
+        table = strategyTable(basic_decide)
+        first = BatchEngine(table, seed=7).simulate(30000, chunk_size=7000)
+        second = BatchEngine(table, seed=7).simulate(30000, chunk_size=7000)
+        self.assertEqual(first, second)
+        self.assertEqual(sum(first[0].values()), 30000)
+
+    def test_always_stand(self):
+        """
+        Test that a hand is never doubled and the player never busts when always standing
+        """
+        engine = BatchEngine(strategyTable(lambda total, soft, upcard: Actions.STAND), seed=3)
+        outcome, net = engine.playRounds(20000)
+        self.assertTrue(set(np.unique(net)) <= {-10, 0, 10, 20})
+
+    def test_matches_object_engine(self):
+        """
+        Test that the batch engine agrees with BlackjackApp on outcome rates and mean net win
+        """
+        table = strategyTable(basic_decide)
+        rounds = 20000
+        random.seed(11)
+        app = BlackjackApp(HeadlessInterface(strategy=tableStrategy(table), rounds=rounds))
+        app.balance = 10 ** 7
+        counts = {o: 0 for o in OUTCOMES}
+        adjust = app.adjustBalance
+        def count_outcome(outcome, hand):
+            counts[outcome] += 1
+            adjust(outcome, hand)
+        app.adjustBalance = count_outcome
+        app.runGame()
+        object_mean = (app.balance - 10 ** 7) / rounds
+
+        batch_rounds = 400000
+        batch_counts, batch_net = BatchEngine(table, seed=11).simulate(batch_rounds)
+        batch_mean = batch_net / batch_rounds
+        # standard deviation of a round is a little over one bet
+        tolerance = 4 * 12 * (1 / rounds + 1 / batch_rounds) ** 0.5
+        self.assertAlmostEqual(object_mean, batch_mean, delta=tolerance)
+        for outcome in (Outcome.WIN, Outcome.BLACKJACK, Outcome.TIE):
+            self.assertAlmostEqual(counts[outcome] / rounds, batch_counts[outcome] / batch_rounds, delta=0.015)
+
+
+if __name__ == '__main__':
+    unittest.main()
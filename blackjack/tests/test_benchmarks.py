@@ -0,0 +1,64 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+from run_benchmarks import compareResults, summarize, MAX_NOISE
+
+
+def compare(results, baseline, threshold=0.15):
+    with redirect_stdout(io.StringIO()):
+        return compareResults(results, baseline, threshold)
+
+
+class TestBenchmarkComparison(unittest.TestCase):
+
+    def test_summary(self):
+        """
+        Test that the median of the runs' best times is kept with their interquartile range as noise
+        """
+        # best times 2.0, 2.1, 2.0, 2.2 and 5.0, an outlier run
+        runs = [[2.0, 2.3], [2.1, 2.5], [2.4, 2.0], [2.2, 2.2], [5.0, 6.0]]
+        summary = summarize(runs)
+        self.assertEqual(summary['time'], 2.1)
+        self.assertAlmostEqual(summary['noise'], 0.2 / 2.1)
+        # a single run has no margin, its repeats say nothing of the spread between runs
+        summary = summarize([[2.0, 2.4, 2.2, 9.0, 2.1]])
+        self.assertEqual(summary['time'], 2.0)
+        self.assertEqual(summary['noise'], 0.0)
+
+    def test_noise_capped(self):
+        """
+        Test that the noise margin of very noisy runs is capped at MAX_NOISE
+        """
+        summary = summarize([[1.0], [2.0], [3.0], [4.0]])
+        self.assertEqual(summary['noise'], MAX_NOISE)
+
+    def test_noise_margin(self):
+        """
+        Test that a slowdown within the threshold plus the baseline's noise is not a regression
+        """
+        baseline = {'a': {'time': 1.0, 'noise': 0.1}, 'b': {'time': 1.0, 'noise': 0.0}}
+        results = {'a': {'time': 1.2, 'noise': 0.0}, 'b': {'time': 1.2, 'noise': 0.0}}
+        self.assertListEqual(compare(results, baseline), ['b'])
+        results['a']['time'] = 1.3
+        self.assertListEqual(compare(results, baseline), ['a', 'b'])
+        self.assertListEqual(compare(results, baseline, threshold=0.6), [])
+
+    def test_old_and_new_entries(self):
+        """
+        Test that bare baseline times have no margin and benchmarks missing from the baseline are not flagged
+        """
+        baseline = {'a': 1.0}
+        results = {'a': {'time': 1.1, 'noise': 0.1}, 'new': {'time': 9.0, 'noise': 0.0}}
+        self.assertListEqual(compare(results, baseline), [])
+        results['a']['time'] = 1.2
+        self.assertListEqual(compare(results, baseline), ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,12 +5,18 @@ sys.path.append(dev_path)
 import unittest
 from copy import deepcopy
 from unittest.mock import Mock, call, patch
+from random import Random
+from numpy.random import default_rng
+from card_sources import RecordedCards, RecordingCards, BufferedCards
 from unittest.case import skip
-import test_cards, test_interface
+import test_cards, test_interface, test_card_sources, test_batch, test_parallel, test_dealer, \
+    test_strategy, test_tournament, test_timing, test_log, test_stats, test_bankroll, \
+    test_counting, test_composition, test_table, test_server, test_async, test_history, \
+    test_columns, test_tables, test_benchmarks
 from blackjack_misc import Outcome, Actions
 from blackjack_game import BlackjackApp as BlackjackAppClass
-from blackjack_interface import GraphicInterface, TextInterface
-from cards import Card as CardClass, BlackjackCardSet as CardSetClass, RANKS, SUITS
+from blackjack_interface import GraphicInterface, TextInterface, HeadlessInterface
+from cards import Card as CardClass, BlackjackCardSet as CardSetClass, Shoe, RANKS, SUITS
 
 
 # from ..src.blackjack_misc import Outcome, Actions
@@ -1542,6 +1548,117 @@ class TestBlackjackAppPlayFullRound(TestBlackjackBaseClass):
         self.assertEqual(self.app.balance, 100)
 
 
+class TestBlackjackAppHeadlessGame(unittest.TestCase):
+
+    def test_plays_requested_rounds(self):
+        """
+        Test that a headless game plays the requested number of rounds through the engine
+        """
+        inter = HeadlessInterface(rounds=500)
+        app = BlackjackAppClass(inter)
+        app.balance = 10 ** 6
+        with patch('builtins.print') as print_patch:
+            app.runGame()
+            print_patch.assert_not_called()
+        self.assertEqual(inter.rounds_played, 500)
+        self.assertNotEqual(app.balance, 10 ** 6)
+
+    def test_stops_on_low_balance(self):
+        """
+        Test that a headless game stops and closes once the balance runs out
+        """
+        inter = HeadlessInterface(strategy=lambda hand, dealer, actions: Actions.HIT)
+        app = BlackjackAppClass(inter)
+        app.runGame()
+        self.assertLess(app.balance, 10)
+        self.assertFalse(inter.isAlive())
+
+    def test_seeded_rng_repeats_game(self):
+        """
+        Test that two games with identically seeded random sources end with the same balance
+        """
+        balances = []
+        for i in range(2):
+            app = BlackjackAppClass(HeadlessInterface(rounds=300), rng=Random(99))
+            app.balance = 10 ** 6
+            app.runGame()
+            balances.append(app.balance)
+        self.assertEqual(balances[0], balances[1])
+
+    def test_numpy_generator_game(self):
+        """
+        Test that a game can draw from a NumPy generator and repeats with the same seed
+        """
+        balances = []
+        for i in range(2):
+            app = BlackjackAppClass(HeadlessInterface(rounds=300), rng=default_rng(99))
+            self.assertIsInstance(app.card_source, BufferedCards)
+            app.balance = 10 ** 6
+            app.runGame()
+            balances.append(app.balance)
+        self.assertEqual(balances[0], balances[1])
+
+    def test_replay_recorded_game(self):
+        """
+        Test that a game replayed from recorded cards ends with the same balance
+        """
+        recorder = RecordingCards(BufferedCards(Random(5)))
+        app = BlackjackAppClass(HeadlessInterface(rounds=300), rng=recorder)
+        app.balance = 10 ** 6
+        app.runGame()
+        replay = BlackjackAppClass(HeadlessInterface(rounds=300), rng=RecordedCards(recorder.record))
+        replay.balance = 10 ** 6
+        replay.runGame()
+        self.assertEqual(app.balance, replay.balance)
+
+    def test_every_hand_settled(self):
+        """
+        Test that losses on bust and on dealer's blackjack are settled through adjustBalance
+        """
+        drawn_cards = [
+            CardClass('hearts', 'eight'), CardClass('clubs', 'ace'),
+            CardClass('spades', 'nine'), CardClass('clubs', 'king')
+        ]
+        app = BlackjackAppClass(HeadlessInterface())
+        with patch('blackjack_game.BlackjackApp.drawCard', side_effect=drawn_cards):
+            with patch('blackjack_game.BlackjackApp.adjustBalance') as adjust:
+                app.startRound()
+                adjust.assert_called_once_with(Outcome.LOSS, 0)
+
+    def test_draw_from_shoe(self):
+        """
+        Test that cards are drawn from the shoe and the shoe is reshuffled between rounds
+        """
+        shoe = Shoe(decks=1, penetration=0.5, rng=Random(8))
+        app = BlackjackAppClass(HeadlessInterface(rounds=50), shoe=shoe)
+        app.balance = 10 ** 6
+        with patch.object(shoe, 'shuffle', wraps=shoe.shuffle) as shuffle:
+            app.runGame()
+            shuffle.assert_called()
+        self.assertLessEqual(shoe.cursor, len(shoe))
+
+    def test_split_round(self):
+        """
+        Test that a headless game can split a hand and settle both card sets
+        """
+        drawn_cards = [
+            CardClass('hearts', 'eight'), CardClass('clubs', 'ten'),
+            CardClass('spades', 'eight'), CardClass('clubs', 'nine'),
+            CardClass('hearts', 'ten'), CardClass('hearts', 'king')
+        ]
+
+        def strategy(hand, dealer, actions):
+            return Actions.SPLIT if Actions.SPLIT in actions else Actions.STAND
+
+        app = BlackjackAppClass(HeadlessInterface(strategy=strategy))
+        with patch('blackjack_game.BlackjackApp.drawCard', side_effect=drawn_cards):
+            app.startRound()
+        # both hands score 18 against dealer's 19
+        self.assertEqual(len(app.player_hand), 2)
+        self.assertListEqual(app.bets, [10, 10])
+        self.assertEqual(app.balance, 80)
+
+
 class TestBlackjackAppRunGame(unittest.TestCase):
 
     def get_patch(self, target, **kwargs):
@@ -1678,19 +1795,102 @@ if __name__ == '__main__':
             test_suite.append(loaded_tests)
         return test_suite
 
-    card_class_tests = [test_cards.TestCardClassMethods, test_cards.TestCardSetClassMethods]
+    card_class_tests = [
+        test_cards.TestCardClassMethods, test_cards.TestCardSetClassMethods,
+        test_cards.TestCardSetEquality, test_cards.TestCardSetState,
+        test_cards.TestShoeClassMethods
+    ]
     test_suite_cards = create_suite(card_class_tests)
     unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_cards))
 
-    interface_tests = [test_interface.TestTextInterface, test_interface.TestGraphicInterface]
+    source_tests = [test_card_sources.TestCardSources]
+    test_suite_sources = create_suite(source_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_sources))
+
+    interface_tests = [
+        test_interface.TestTextInterface, test_interface.TestHeadlessInterface,
+        test_interface.TestGraphicInterface
+    ]
     test_suite_inter = create_suite(interface_tests)
     unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_inter))
 
+    batch_tests = [test_batch.TestStrategyTable, test_batch.TestBatchEngine]
+    test_suite_batch = create_suite(batch_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_batch))
+
+    parallel_tests = [test_parallel.TestParallelRunner]
+    test_suite_parallel = create_suite(parallel_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_parallel))
+
+    dealer_tests = [test_dealer.TestDealerProbabilities]
+    test_suite_dealer = create_suite(dealer_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_dealer))
+
+    strategy_tests = [test_strategy.TestExpectedValues, test_strategy.TestBasicStrategy]
+    test_suite_strategy = create_suite(strategy_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_strategy))
+
+    tournament_tests = [test_tournament.TestStrategyInterface, test_tournament.TestTournament]
+    test_suite_tournament = create_suite(tournament_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_tournament))
+
+    timing_tests = [test_timing.TestHistogram, test_timing.TestPhaseTimer]
+    test_suite_timing = create_suite(timing_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_timing))
+
+    log_tests = [test_log.TestEventLog, test_log.TestReplay]
+    test_suite_log = create_suite(log_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_log))
+
+    stats_tests = [test_stats.TestRoundStats, test_stats.TestStatsApp]
+    test_suite_stats = create_suite(stats_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_stats))
+
+    bankroll_tests = [test_bankroll.TestBetPolicies, test_bankroll.TestBankrollSimulator]
+    test_suite_bankroll = create_suite(bankroll_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_bankroll))
+
+    counting_tests = [test_counting.TestCountTracker, test_counting.TestCountingShoe, test_counting.TestCountAnalysis]
+    test_suite_counting = create_suite(counting_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_counting))
+
+    composition_tests = [test_composition.TestCompositionSolver]
+    test_suite_composition = create_suite(composition_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_composition))
+
+    table_tests = [test_table.TestBlackjackTable]
+    test_suite_table = create_suite(table_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_table))
+
+    server_tests = [test_server.TestGameServer]
+    test_suite_server = create_suite(server_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_server))
+
+    async_tests = [test_async.TestAsyncBlackjackApp]
+    test_suite_async = create_suite(async_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_async))
+
+    history_tests = [test_history.TestHandHistory]
+    test_suite_history = create_suite(history_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_history))
+
+    columns_tests = [test_columns.TestColumnExport]
+    test_suite_columns = create_suite(columns_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_columns))
+
+    tables_tests = [test_tables.TestStrategyTables]
+    test_suite_tables = create_suite(tables_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_tables))
+
+    benchmarks_tests = [test_benchmarks.TestBenchmarkComparison]
+    test_suite_benchmarks = create_suite(benchmarks_tests)
+    unittest.TextTestRunner(verbosity=2).run(unittest.TestSuite(test_suite_benchmarks))
+
     app_class_tests = [
         TestBlackjackAppBets, TestBlackjackAppGetCard, TestBlackjackAppCanPlayValidation,
         TestBlackjackAppScoreValidation, TestBlackjackAppScoreCalc,
         TestBlackjackAppPlaySingleHand, TestBlackjackAppPlayFullRound,
-        TestBlackjackAppRunGame
+        TestBlackjackAppRunGame, TestBlackjackAppHeadlessGame
     ]
 
     # test with text interface
@@ -0,0 +1,66 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import random
+import unittest
+import numpy as np
+from card_sources import RandomCards, BufferedCards, RecordedCards, RecordingCards, cardSource
+from cards import Card, Shoe, DECK_SIZE
+
+
+class TestCardSources(unittest.TestCase):
+
+    def test_random_cards_seeded(self):
+        """
+        Test that identically seeded random sources draw the same cards
+        """
+        first, second = RandomCards(random.Random(1)), RandomCards(random.Random(1))
+        self.assertListEqual([first.draw() for i in range(200)], [second.draw() for i in range(200)])
+
+    def test_buffered_cards_refill(self):
+        """
+        Test that a buffered source keeps drawing past the end of its buffer
+        """
+        source = BufferedCards(np.random.default_rng(2), size=16)
+        cards = [source.draw() for i in range(100)]
+        self.assertTrue(all(isinstance(c, Card) for c in cards))
+        self.assertEqual(source.cursor, 100 % 16)
+
+    def test_buffered_cards_uniform(self):
+        """
+        Test that a buffered source draws every card about equally often
+        """
+        for rng in [np.random.default_rng(3), random.Random(3)]:
+            source = BufferedCards(rng)
+            counts = [0] * DECK_SIZE
+            times = DECK_SIZE * 1000
+            for i in range(times):
+                counts[source.draw().index] += 1
+            self.assertGreater(min(counts), 850)
+            self.assertLess(max(counts), 1150)
+
+    def test_record_and_replay(self):
+        """
+        Test that recorded draws are replayed in the same order and the replay ends with the record
+        """
+        recorder = RecordingCards(RandomCards(random.Random(4)))
+        drawn = [recorder.draw() for i in range(50)]
+        replay = RecordedCards(recorder.record)
+        self.assertListEqual([replay.draw() for i in range(50)], drawn)
+        with self.assertRaises(IndexError):
+            replay.draw()
+
+    def test_card_source_for_rng(self):
+        """
+        Test that a matching card source is chosen for every kind of generator
+        """
+        self.assertIsInstance(cardSource(random), RandomCards)
+        self.assertIsInstance(cardSource(random.Random(5)), RandomCards)
+        self.assertIsInstance(cardSource(np.random.default_rng(5)), BufferedCards)
+        shoe = Shoe(decks=1)
+        self.assertIs(cardSource(shoe), shoe)
+
+
+if __name__ == '__main__':
+    unittest.main()
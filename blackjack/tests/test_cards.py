@@ -3,8 +3,12 @@ from unittest.case import skip
 from env import dev_path
 sys.path.append(dev_path)
 
+import pickle
 import unittest
-from cards import Card, BlackjackCardSet, RANKS, SUITS
+from copy import deepcopy
+from random import Random
+from cards import Card, BlackjackCardSet, Shoe, cardIndex, cardFromIndex, encodeState, decodeState, handOf, \
+                  RANKS, SUITS, DECK, DECK_SIZE
 
 class TestCardClassMethods(unittest.TestCase):
 
@@ -16,24 +20,33 @@ class TestCardClassMethods(unittest.TestCase):
             card = Card(SUITS[0], RANKS[rank][0])
             self.assertCountEqual(card.getValue(), RANKS[rank][1])
 
-    def test_not_hidden_on_init(self):
+    def test_card_is_interned(self):
         """
-        Test that a card objects initialises as visible
+        Test that a card object is shared between all requests for the same card
         """
-        suit, rank = SUITS[0], RANKS[2][0]
-        card = Card(suit, rank)
-        self.assertFalse(card.isHidden())
+        card = Card(SUITS[0], RANKS[2][0])
+        self.assertIs(card, Card(SUITS[0], RANKS[2][0]))
+        self.assertIs(card, deepcopy(card))
+        self.assertIs(card, pickle.loads(pickle.dumps(card)))
+        self.assertEqual(len({Card(s, r[0]) for s in SUITS for r in RANKS}), DECK_SIZE)
 
-    def test_toggle_visibility(self):
+    def test_card_is_immutable(self):
         """
-        Test that a card object switches visibility
+        Test that a card object cannot be changed
         """
-        suit, rank = SUITS[0], RANKS[2][0]
-        card = Card(suit, rank)
-        card.toggleVisibility()
-        self.assertTrue(card.isHidden())
-        card.toggleVisibility()
-        self.assertFalse(card.isHidden())
+        card = Card(SUITS[0], RANKS[2][0])
+        with self.assertRaises(AttributeError):
+            card.rank = 'king'
+        with self.assertRaises(AttributeError):
+            card.hidden = True
+        self.assertEqual(card.getRank(), RANKS[2][0])
+
+    def test_unknown_card(self):
+        """
+        Test that a card that is not in the deck cannot be created
+        """
+        with self.assertRaises(ValueError):
+            Card('stars', 'ace')
 
 
 class TestCardSetClassMethods(unittest.TestCase):
@@ -261,8 +274,8 @@ class TestCardSetClassMethods(unittest.TestCase):
         for tc in test_cards: cardset.addCard(tc)
         cardset.hideCard(0)
         cardset.hideCard(2)
-        cards = cardset.getCards()
-        self.assertTrue(all([cards[0].isHidden(), cards[2].isHidden()]))
+        self.assertTrue(all([cardset.isHidden(0), cardset.isHidden(2)]))
+        self.assertFalse(any([cardset.isHidden(1), cardset.isHidden(3)]))
         self.assertEqual(cardset.getScore()[0], expected_score)
 
     def test_reveal_card_score_updates(self):
@@ -275,16 +288,13 @@ class TestCardSetClassMethods(unittest.TestCase):
             Card(SUITS[3], 'three'),      # will be revealed
             Card(SUITS[0], 'eight')
         ]
-        test_cards[0].toggleVisibility()
-        test_cards[2].toggleVisibility()
-        
         expected_score = 20
         cardset = BlackjackCardSet()
-        for tc in test_cards: cardset.addCard(tc)
+        for i in range(len(test_cards)): cardset.addCard(test_cards[i], hidden=i in (0, 2))
+        self.assertEqual(cardset.getScore()[0], 12)
         cardset.revealCard(0)
         cardset.revealCard(2)
-        cards = cardset.getCards()
-        self.assertFalse(any([cards[0].isHidden(), cards[2].isHidden()]))
+        self.assertFalse(any([cardset.isHidden(0), cardset.isHidden(2)]))
         self.assertEqual(cardset.getScore()[0], expected_score)
 
     def test_do_split_ace(self):
@@ -309,7 +319,7 @@ class TestCardSetClassMethods(unittest.TestCase):
             self.assertFalse(card_sets[i].canSplit())
             card = card_sets[i].getCard(0)
             self.assertEqual(card, test_cards[i])
-            self.assertFalse(card.isHidden())
+            self.assertFalse(card_sets[i].isHidden(0))
 
     def test_do_split_regular(self):
         """
@@ -332,5 +342,216 @@ class TestCardSetClassMethods(unittest.TestCase):
             self.assertEqual(card_sets[i].getScore()[0], expected_score)
             card = card_sets[i].getCard(0)
             self.assertEqual(card, test_cards[i])
-            self.assertFalse(card.isHidden())
+            self.assertFalse(card_sets[i].isHidden(0))
         
+
+
+    def test_running_totals_match_full_count(self):
+        """
+        Test that scores kept up to date on every change match a full count of the cards
+        """
+        rng = Random(12)
+        ace = RANKS[0][0]
+        for i in range(300):
+            cardset = BlackjackCardSet()
+            for j in range(rng.randint(1, 6)):
+                cardset.addCard(Card(rng.choice(SUITS), rng.choice(RANKS)[0]), hidden=rng.random() < 0.2)
+                if rng.random() < 0.3:
+                    cardset.hideCard(rng.randrange(len(cardset.getCards())))
+                if rng.random() < 0.3:
+                    cardset.revealCard(rng.randrange(len(cardset.getCards())))
+            if cardset.canSplit():
+                cardset.doSplit()
+            cards = cardset.getCards()
+            visible = [c for k, c in enumerate(cards) if not cardset.isHidden(k)]
+            low = sum(c.getValue()[0] for c in visible)
+            high = low + 10 if any(c.getRank() == ace for c in visible) else 0
+            self.assertListEqual(cardset.getScore(), [low, high])
+            full = sum(c.getValue()[0] for c in cards)
+            full_scores = [full, full + 10 if cardset.hasAce() else 0]
+            self.assertEqual(cardset.hasBlackjack(), 21 in full_scores and len(cards) == 2)
+
+
+class TestCardSetEquality(unittest.TestCase):
+
+    def card_set(self, *cards):
+        cardset = BlackjackCardSet()
+        for c in cards: cardset.addCard(c)
+        return cardset
+
+    def test_equal_in_any_order(self):
+        """
+        Test that card sets with the same cards in a different order are equal and hash the same
+        """
+        first = self.card_set(DECK[0], DECK[10], DECK[33])
+        second = self.card_set(DECK[33], DECK[0], DECK[10])
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+
+    def test_repeated_cards_counted(self):
+        """
+        Test that card sets are not equal when a card repeats a different number of times
+        """
+        first = self.card_set(DECK[5], DECK[5], DECK[7])
+        second = self.card_set(DECK[5], DECK[7], DECK[7])
+        self.assertNotEqual(first, second)
+        self.assertNotEqual(self.card_set(DECK[5]), self.card_set(DECK[5], DECK[5]))
+
+    def test_same_rank_other_suit_not_equal(self):
+        """
+        Test that cards of the same rank but another suit make a different card set
+        """
+        self.assertNotEqual(self.card_set(Card('hearts', 'ten')), self.card_set(Card('clubs', 'ten')))
+
+    def test_group_in_dict(self):
+        """
+        Test that card sets can be counted in a dictionary
+        """
+        rng = Random(9)
+        counts = {}
+        for i in range(1000):
+            cardset = self.card_set(*rng.sample(DECK[:8], 2))
+            counts[cardset] = counts.get(cardset, 0) + 1
+        self.assertEqual(len(counts), 28)
+        self.assertEqual(sum(counts.values()), 1000)
+
+    def test_hand_of_values(self):
+        """
+        Test that handOf builds a card set of the given card values
+        """
+        hand = handOf([1, 10, 6])
+        self.assertListEqual([c.getValue()[0] for c in hand.getCards()], [1, 10, 6])
+        self.assertEqual(hand.getScore(), [17, 27])
+        self.assertEqual(handOf([]), BlackjackCardSet())
+
+
+class TestCardSetState(unittest.TestCase):
+
+    def test_encode_decode(self):
+        """
+        Test that a packed state decodes to the values it was made of
+        """
+        fields = (17, True, 3, 0, True, False)
+        self.assertEqual(decodeState(encodeState(*fields)), fields)
+        self.assertEqual(decodeState(encodeState(90, False, 20))[:3], (63, False, 15))
+
+    def test_state_of_card_set(self):
+        """
+        Test that a card set state reflects its total, ace, size and pair
+        """
+        cardset = BlackjackCardSet()
+        cardset.addCard(Card(SUITS[0], 'jack'))
+        cardset.addCard(Card(SUITS[1], 'king'))
+        self.assertEqual(decodeState(cardset.getState()), (20, False, 2, 10, False, False))
+        cardset = BlackjackCardSet()
+        cardset.addCard(Card(SUITS[0], 'ace'))
+        cardset.addCard(Card(SUITS[1], 'ace'))
+        split_set = cardset.doSplit()
+        self.assertEqual(decodeState(split_set.getState()), (1, True, 1, 0, True, True))
+        self.assertEqual(cardset.getState(), split_set.getState())
+
+    def test_same_state_same_play(self):
+        """
+        Test that card sets with different cards but same play share a state
+        """
+        first, second = BlackjackCardSet(), BlackjackCardSet()
+        for rank in ['two', 'nine', 'five']: first.addCard(Card(SUITS[0], rank))
+        for rank in ['four', 'seven', 'five']: second.addCard(Card(SUITS[2], rank))
+        self.assertEqual(first.getState(), second.getState())
+        self.assertEqual(len({first.getState(), second.getState()}), 1)
+
+    def test_round_trip(self):
+        """
+        Test that a representative card set is built back from the state of any card set
+        """
+        rng = Random(21)
+        for i in range(2000):
+            cardset = BlackjackCardSet(no_split=rng.random() < 0.3)
+            for j in range(rng.randint(0, 6)): cardset.addCard(rng.choice(DECK))
+            state = cardset.getState()
+            rebuilt = BlackjackCardSet.fromState(state)
+            self.assertEqual(rebuilt.getState(), state)
+            self.assertListEqual(rebuilt.getScore(), cardset.getScore())
+
+    def test_invalid_state(self):
+        """
+        Test that a state no card set can have is rejected
+        """
+        with self.assertRaises(ValueError):
+            BlackjackCardSet.fromState(encodeState(30, False, 2))
+
+
+class TestShoeClassMethods(unittest.TestCase):
+
+    def test_card_index_round_trip(self):
+        """
+        Test that every card has a unique index that converts back to the same card
+        """
+        indices = set()
+        for suit in SUITS:
+            for rank in RANKS:
+                card = Card(suit, rank[0])
+                idx = cardIndex(card)
+                self.assertEqual(cardFromIndex(idx), card)
+                indices.add(idx)
+        self.assertSetEqual(indices, set(range(DECK_SIZE)))
+
+    def test_init_contains_all_decks(self):
+        """
+        Test that a shoe holds every card once per deck
+        """
+        shoe = Shoe(decks=2, rng=Random(1))
+        self.assertEqual(len(shoe), 2 * DECK_SIZE)
+        drawn = [cardIndex(shoe.draw()) for i in range(2 * DECK_SIZE)]
+        self.assertListEqual(sorted(drawn), sorted(list(range(DECK_SIZE)) * 2))
+        self.assertEqual(shoe.remaining(), 0)
+
+    def test_invalid_init(self):
+        """
+        Test that a shoe cannot have too many decks or an invalid penetration
+        """
+        for kwargs in [{'decks': 0}, {'decks': 9}, {'penetration': 0}, {'penetration': 1.5}]:
+            with self.assertRaises(ValueError):
+                Shoe(**kwargs)
+
+    def test_cut_card(self):
+        """
+        Test that a shoe asks for a reshuffle once the cut card is reached
+        """
+        shoe = Shoe(decks=1, penetration=0.5, rng=Random(2))
+        for i in range(DECK_SIZE // 2 - 1): shoe.draw()
+        self.assertFalse(shoe.needsShuffle())
+        shoe.draw()
+        self.assertTrue(shoe.needsShuffle())
+        shoe.shuffle()
+        self.assertFalse(shoe.needsShuffle())
+        self.assertEqual(shoe.remaining(), DECK_SIZE)
+
+    def test_reshuffle_when_empty(self):
+        """
+        Test that drawing from an empty shoe reshuffles it
+        """
+        shoe = Shoe(decks=1, rng=Random(3))
+        for i in range(DECK_SIZE): shoe.draw()
+        self.assertIsInstance(shoe.draw(), Card)
+        self.assertEqual(shoe.remaining(), DECK_SIZE - 1)
+
+    def test_round_cards_not_reshuffled(self):
+        """
+        Test that a shoe running out in a round is rebuilt from the discards, without the cards of the round
+        """
+        shoe = Shoe(decks=1, penetration=1, rng=Random(5))
+        for i in range(DECK_SIZE - 10): shoe.draw()
+        shoe.newRound()
+        drawn = [cardIndex(shoe.draw()) for i in range(20)]
+        self.assertEqual(len(set(drawn)), 20)
+        self.assertEqual(shoe.remaining(), DECK_SIZE - 20)
+        self.assertListEqual(sorted(shoe.cards), list(range(DECK_SIZE)))
+
+    def test_same_seed_same_order(self):
+        """
+        Test that shoes shuffled by identically seeded sources deal the same cards
+        """
+        first, second = Shoe(rng=Random(4)), Shoe(rng=Random(4))
+        self.assertListEqual([first.draw() for i in range(100)], [second.draw() for i in range(100)])
+
@@ -0,0 +1,117 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import os
+import random
+import tempfile
+import unittest
+import numpy as np
+from blackjack_columns import ArrowColumnWriter, ColumnsApp, NpyColumnWriter, exportSimulation, pa, \
+    readArrow, readColumns
+from blackjack_interface import HeadlessInterface
+from blackjack_misc import Actions, Outcome
+from card_sources import RecordedCards
+from cards import Card
+
+
+def cards_of(*ranks):
+    return RecordedCards([Card('hearts', rank).index for rank in ranks])
+
+
+def split_eights(hand, dealer_hand, actions):
+    if Actions.SPLIT in actions:
+        return Actions.SPLIT
+    return Actions.STAND
+
+
+class TestColumnExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, 'columns')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rounds_exported(self):
+        """
+        Test that every round is a row of the memory-mapped columns, net wins adding up to the balance change
+        """
+        writer = NpyColumnWriter(self.directory, chunk_rows=128)
+        app = ColumnsApp(HeadlessInterface(rounds=1000), writer, rng=random.Random(1))
+        app.balance = 10 ** 5
+        app.runGame()
+        writer.close()
+        columns = readColumns(self.directory)
+        self.assertIsInstance(columns['net'], np.memmap)
+        for name, array in columns.items():
+            self.assertEqual(len(array), 1000, name)
+        self.assertEqual(int(columns['net'].sum()), app.balance - 10 ** 5)
+        self.assertTrue(np.all(columns['outcome'] >= 0))
+        self.assertTrue(np.all((columns['first_card'] >= 0) & (columns['first_card'] < 52)))
+        self.assertTrue(np.all(columns['actions'] < 16))
+
+    def test_split_round(self):
+        """
+        Test that a split round keeps the initial cards, the actions taken and the first hand's result
+        """
+        writer = NpyColumnWriter(self.directory)
+        # eights against a 7, the split hands get a ten (win) and a nine (tie), the dealer stands on 17
+        cards = cards_of('eight', 'ten', 'eight', 'seven', 'ten', 'nine')
+        app = ColumnsApp(HeadlessInterface(strategy=split_eights, rounds=1), writer, rng=cards)
+        app.runGame()
+        writer.close()
+        row = {name: int(array[0]) for name, array in readColumns(self.directory).items()}
+        eight = Card('hearts', 'eight').index
+        self.assertEqual((row['first_card'], row['second_card']), (eight, eight))
+        self.assertEqual(row['upcard'], Card('hearts', 'seven').index)
+        bits = [1 << list(Actions).index(a) for a in (Actions.SPLIT, Actions.STAND)]
+        self.assertEqual(row['actions'], bits[0] | bits[1])
+        self.assertEqual((row['hands'], row['player_total'], row['dealer_total']), (2, 18, 17))
+        self.assertEqual(row['outcome'], list(Outcome).index(Outcome.WIN))
+        self.assertEqual(row['net'], 10)
+
+    def test_readable_during_run(self):
+        """
+        Test that the files hold every full chunk and can be memory-mapped before the writer is closed
+        """
+        writer = NpyColumnWriter(self.directory, chunk_rows=100)
+        app = ColumnsApp(HeadlessInterface(rounds=250), writer, rng=random.Random(2))
+        app.balance = 10 ** 5
+        app.runGame()
+        self.assertEqual(len(readColumns(self.directory)['net']), 200)
+        self.assertEqual(writer.pending, 50)
+        # the buffers never grow past a chunk
+        self.assertTrue(all(len(buffer) == 100 for buffer in writer.buffers))
+        writer.close()
+        self.assertEqual(len(readColumns(self.directory)['net']), 250)
+
+    def test_export_simulation(self):
+        """
+        Test that a simulation export gives the same rows for the same seed
+        """
+        rows = exportSimulation(NpyColumnWriter(self.directory, chunk_rows=64), 300, seed=3)
+        self.assertEqual(rows, 300)
+        first = {name: np.array(array) for name, array in readColumns(self.directory).items()}
+        exportSimulation(NpyColumnWriter(self.directory, chunk_rows=1000), 300, seed=3)
+        for name, array in readColumns(self.directory).items():
+            np.testing.assert_array_equal(array, first[name])
+
+    @unittest.skipUnless(pa, 'needs pyarrow')
+    def test_arrow_export(self):
+        """
+        Test that an Arrow export has a record batch per chunk and the same rows as the .npy export
+        """
+        path = os.path.join(self.tmp.name, 'rounds.arrow')
+        exportSimulation(ArrowColumnWriter(path, chunk_rows=100), 250, seed=4)
+        exportSimulation(NpyColumnWriter(self.directory), 250, seed=4)
+        table = readArrow(path)
+        self.assertEqual(table.num_rows, 250)
+        self.assertEqual(len(table.column('net').chunks), 3)
+        for name, array in readColumns(self.directory).items():
+            np.testing.assert_array_equal(table.column(name).to_numpy(), array)
+
+
+if __name__ == '__main__':
+    unittest.main()
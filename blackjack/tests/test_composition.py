@@ -0,0 +1,109 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import random
+import unittest
+from blackjack_composition import CompositionSolver, DECK_COMPOSITION, shoeComposition
+from blackjack_misc import Actions
+from blackjack_strategy import actionEVs
+from cards import Shoe, handOf
+
+
+def shoe_left(decks, *dealt):
+    comp = [n * decks for n in DECK_COMPOSITION]
+    for value in dealt:
+        comp[value - 1] -= 1
+    return comp
+
+
+class TestCompositionSolver(unittest.TestCase):
+
+    def test_close_to_infinite_deck(self):
+        """
+        Test that a full 8 deck shoe gives about the infinite deck expected values
+        """
+        solver = CompositionSolver()
+        for values, upcard in [((10, 6), 10), ((9, 2), 5), ((1, 7), 9)]:
+            evs = solver.actionEVs(handOf(values), upcard, shoe_left(8, upcard, *values))
+            infinite = actionEVs(sum(values), 1 in values, upcard)
+            for action, ev in infinite.items():
+                self.assertAlmostEqual(evs[action], ev, delta=0.02)
+
+    def test_dealer_outcome(self):
+        """
+        Test that the dealer's final score probabilities sum to 1 and never give a natural
+        """
+        solver = CompositionSolver()
+        final = solver.dealerOutcome(shoe_left(1, 10), 10)
+        self.assertAlmostEqual(sum(final), 1.0)
+        # a single ten left with an ace up: the hole card is never the ten
+        final = solver.dealerOutcome((3, 0, 0, 0, 0, 0, 0, 0, 0, 1), 1)
+        self.assertAlmostEqual(sum(final), 1.0)
+        self.assertEqual(final[21], 0.0)
+
+    def test_composition_changes_play(self):
+        """
+        Test that the best play of 16 against 10 depends on the tens left
+        """
+        solver = CompositionSolver()
+        hand = handOf([10, 6])
+        rich = shoe_left(1, 10, 6, 10)
+        rich[1:6] = [2, 2, 2, 2, 2]  # half of the small cards gone, hitting busts more often
+        poor = shoe_left(1, 10, 6, 10)
+        poor[9] = 2  # tens gone
+        self.assertEqual(solver.bestAction(hand, 10, rich, [Actions.HIT, Actions.STAND]), Actions.STAND)
+        self.assertEqual(solver.bestAction(hand, 10, poor, [Actions.HIT, Actions.STAND]), Actions.HIT)
+
+    def test_actions_and_split(self):
+        """
+        Test that only the allowed actions are valued and pairs can be split
+        """
+        solver = CompositionSolver()
+        comp = shoe_left(6, 8, 8, 10)
+        evs = solver.actionEVs(handOf([8, 8]), 10, comp)
+        self.assertSetEqual(set(evs), {Actions.HIT, Actions.STAND, Actions.DOUBLE, Actions.SPLIT})
+        self.assertEqual(max(evs, key=evs.get), Actions.SPLIT)
+        evs = solver.actionEVs(handOf([8, 8]), 10, comp, [Actions.HIT, Actions.STAND])
+        self.assertSetEqual(set(evs), {Actions.HIT, Actions.STAND})
+        self.assertRaises(ValueError, solver.actionEVs, handOf([8, 8]), 10, comp[:9])
+
+    def test_repeated_queries_hit_cache(self):
+        """
+        Test that a repeated query is answered from the cache
+        """
+        solver = CompositionSolver()
+        hand, comp = handOf([5, 3]), shoe_left(2, 5, 3, 6)
+        first = solver.actionEVs(hand, 6, comp)
+        misses = solver.cacheInfo()['misses']
+        self.assertEqual(solver.actionEVs(hand, 6, tuple(comp)), first)
+        self.assertEqual(solver.cacheInfo()['misses'], misses)
+        self.assertGreater(solver.cacheInfo()['hits'], 0)
+
+    def test_entry_limit(self):
+        """
+        Test that the cache never holds more entries than its limit and results do not change
+        """
+        small = CompositionSolver(max_entries=200)
+        large = CompositionSolver()
+        for values, upcard in [((10, 2), 4), ((7, 4), 10), ((1, 6), 2)]:
+            comp = shoe_left(1, upcard, *values)
+            small_evs = small.actionEVs(handOf(values), upcard, comp)
+            large_evs = large.actionEVs(handOf(values), upcard, comp)
+            for action in large_evs:
+                self.assertAlmostEqual(small_evs[action], large_evs[action])
+            self.assertLessEqual(small.cacheInfo()['entries'], 200)
+        self.assertEqual(small.cacheInfo()['max_entries'], 200)
+
+    def test_shoe_composition(self):
+        """
+        Test that the composition of a shoe counts the cards not dealt yet
+        """
+        shoe = Shoe(2, rng=random.Random(1))
+        self.assertEqual(shoeComposition(shoe), tuple(n * 2 for n in DECK_COMPOSITION))
+        dealt = [shoe.draw().getValue()[0] for i in range(30)]
+        self.assertEqual(shoeComposition(shoe), tuple(shoe_left(2, *dealt)))
+
+
+if __name__ == '__main__':
+    unittest.main()
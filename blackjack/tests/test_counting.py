@@ -0,0 +1,212 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import random
+import unittest
+import numpy as np
+from blackjack_batch import strategyTable
+from blackjack_counting import COUNT_SYSTEMS, CountTracker, CountingShoe, analyseSystems, deckImbalance, \
+    sampleCompositions, trueCounts, VALUE_COUNTS
+from blackjack_game import BlackjackApp
+from blackjack_interface import HeadlessInterface, Strategy, StrategyInterface
+from blackjack_misc import Actions
+from cards import Card, DECK, DECK_SIZE
+from test_batch import basic_decide
+
+
+class _CountWatcher(Strategy):
+    name = "count watcher"
+
+    def __init__(self):
+        self.seen = []
+
+    def getAction(self, hand, upcard, actions, balance):
+        return Actions.STAND if hand.getScore()[0] >= 17 else Actions.HIT
+
+    def getBet(self, balance):
+        self.seen.append(self.tracker.trueCount('hi-lo'))
+        return 25 if self.tracker.trueCount('hi-lo') >= 2 else 10
+
+
+class _HoleCardWatcher(Strategy):
+    # records what the count holds while the player decides
+    name = "hole card watcher"
+
+    def __init__(self):
+        self.app = None
+        self.checks = []
+
+    def getAction(self, hand, upcard, actions, balance):
+        hole = self.app.dealer_hand.getCard(0)
+        self.checks.append((self.tracker.seen, self.app.shoe.cursor - 1, self.tracker.hidden == [hole]))
+        return Actions.STAND if hand.getScore()[0] >= 17 else Actions.HIT
+
+
+class TestCountTracker(unittest.TestCase):
+
+    def test_tags(self):
+        """
+        Test the running count of a few cards for every system
+        """
+        tracker = CountTracker(1)
+        for rank in ['two', 'five', 'king', 'ace', 'seven', 'nine']:
+            tracker.see(Card('hearts', rank))
+        self.assertEqual(tracker.runningCount('hi-lo'), 0)
+        self.assertEqual(tracker.runningCount('ko'), 1)
+        self.assertEqual(tracker.runningCount('omega-ii'), 1)
+        self.assertEqual(tracker.runningCount('zen'), 1)
+
+    def test_whole_shoe(self):
+        """
+        Test that every true count is back to 0 once a whole shoe is seen
+        """
+        self.assertEqual(deckImbalance('hi-lo'), 0)
+        self.assertEqual(deckImbalance('ko'), 4)
+        tracker = CountTracker(2)
+        for card in DECK * 2:
+            tracker.see(card)
+        for system in COUNT_SYSTEMS:
+            self.assertAlmostEqual(tracker.trueCount(system), 0.0)
+        self.assertEqual(tracker.runningCount('ko'), 8)
+        tracker.reset()
+        self.assertEqual(tracker.seen, 0)
+        self.assertEqual(tracker.decksRemaining(), 2)
+
+    def test_hidden_cards(self):
+        """
+        Test that a hidden card is taken out of the count and counted again when revealed
+        """
+        tracker = CountTracker(1)
+        for rank in ['two', 'ten']:
+            tracker.see(Card('hearts', rank))
+        tracker.hide(Card('hearts', 'two'))
+        self.assertEqual(tracker.runningCount('hi-lo'), -1)
+        self.assertEqual(tracker.seen, 1)
+        tracker.reveal()
+        self.assertEqual(tracker.runningCount('hi-lo'), 0)
+        self.assertEqual(tracker.seen, 2)
+        self.assertListEqual(tracker.hidden, [])
+
+    def test_true_count(self):
+        """
+        Test that the true count divides the running count by the decks left
+        """
+        tracker = CountTracker(6)
+        for i in range(26):
+            tracker.see(Card('clubs', 'five'))
+        self.assertAlmostEqual(tracker.trueCount('hi-lo'), 26 / 5.5)
+        self.assertAlmostEqual(tracker.trueCount('ko'), (26 - 26 * 4 / 52) / 5.5)
+
+    def test_vectorised_counts(self):
+        """
+        Test that vectorised true counts match the tracker's
+        """
+        dealt = sampleCompositions(4, 50, rng=np.random.default_rng(1))
+        for row in dealt[:5]:
+            tracker = CountTracker(4)
+            for value, n in enumerate(row):
+                card = Card('spades', 'ace') if value == 0 else next(c for c in DECK if c.getValue()[0] == value + 1)
+                for i in range(n):
+                    tracker.see(card)
+            for system in COUNT_SYSTEMS:
+                self.assertAlmostEqual(trueCounts(row[None, :], 4, system)[0], tracker.trueCount(system))
+        self.assertTrue((dealt <= VALUE_COUNTS * 4).all())
+
+
+class TestCountingShoe(unittest.TestCase):
+
+    def test_counts_follow_shoe(self):
+        """
+        Test that the tracker sees every card dealt and is reset on reshuffle
+        """
+        shoe = CountingShoe(1, penetration=0.5, rng=random.Random(2))
+        for i in range(40):
+            shoe.draw()
+        self.assertEqual(shoe.tracker.seen, 40)
+        shoe.shuffle()
+        self.assertEqual(shoe.tracker.seen, 0)
+        self.assertListEqual(shoe.tracker.running, [0] * len(COUNT_SYSTEMS))
+
+    def test_counts_after_mid_round_reshuffle(self):
+        """
+        Test that a shoe rebuilt from its discards in a round counts the cards of the round, hidden ones left out
+        """
+        shoe = CountingShoe(1, penetration=1, rng=random.Random(6), systems=('hi-lo',))
+        for i in range(DECK_SIZE - 4):
+            shoe.draw()
+        shoe.newRound()
+        round_cards = [shoe.draw() for i in range(4)]
+        shoe.tracker.hide(round_cards[1])
+        round_cards.append(shoe.draw())
+        counted = sum(shoe.tracker.tags[c.index][0] for c in round_cards)
+        self.assertEqual(shoe.tracker.seen, 4)
+        self.assertEqual(shoe.tracker.runningCount(), counted - shoe.tracker.tags[round_cards[1].index][0])
+        shoe.tracker.reveal()
+        self.assertEqual(shoe.tracker.runningCount(), counted)
+
+    def test_game_with_counting_shoe(self):
+        """
+        Test that a game keeps the tracker in step with the shoe and shows it to the interface
+        """
+        interface = HeadlessInterface(rounds=200)
+        app = BlackjackApp(interface, shoe=CountingShoe(2, rng=random.Random(3)))
+        app.balance = 10 ** 5
+        app.runGame()
+        self.assertIs(interface.tracker, app.shoe.tracker)
+        self.assertEqual(app.tracker.seen, app.shoe.cursor)
+
+    def test_hole_card_not_counted(self):
+        """
+        Test that a strategy deciding its hand does not count the dealer's hole card
+        """
+        strategy = _HoleCardWatcher()
+        app = BlackjackApp(StrategyInterface(strategy, rounds=200), shoe=CountingShoe(2, rng=random.Random(5)))
+        strategy.app = app
+        app.balance = 10 ** 5
+        app.runGame()
+        self.assertGreater(len(strategy.checks), 100)
+        for seen, visible, hole_hidden in strategy.checks:
+            self.assertEqual(seen, visible)
+            self.assertTrue(hole_hidden)
+        self.assertEqual(app.tracker.seen, app.shoe.cursor)
+
+    def test_strategy_sees_counts(self):
+        """
+        Test that a strategy can bet by the true count before every round
+        """
+        strategy = _CountWatcher()
+        app = BlackjackApp(StrategyInterface(strategy, rounds=300), shoe=CountingShoe(1, rng=random.Random(4)))
+        app.balance = 10 ** 5
+        app.runGame()
+        self.assertEqual(len(strategy.seen), 300)
+        self.assertGreater(max(strategy.seen), 2)
+
+    def test_no_tracker_without_counting_shoe(self):
+        """
+        Test that apps without a counting shoe do not show counts
+        """
+        interface = HeadlessInterface(rounds=20)
+        app = BlackjackApp(interface, rng=random.Random(5))
+        app.runGame()
+        self.assertIsNone(app.tracker)
+        self.assertIsNone(interface.tracker)
+
+
+class TestCountAnalysis(unittest.TestCase):
+
+    def test_analysis(self):
+        """
+        Test that every system's correlations are computed and Hi-Lo tracks the round result
+        """
+        report = analyseSystems(strategyTable(basic_decide), decks=2, samples=200000, seed=6)
+        self.assertSetEqual(set(report), set(COUNT_SYSTEMS))
+        for stats in report.values():
+            self.assertTrue(-1 <= stats['betting_correlation'] <= 1)
+            self.assertTrue(-1 <= stats['playing_efficiency'] <= 1)
+        self.assertGreater(report['hi-lo']['betting_correlation'], 0.3)
+        self.assertGreater(report['hi-lo']['result_correlation'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import random
+import unittest
+from blackjack_dealer import dealerProbabilities, cardSetProbabilities, dealerFinal, OUTCOME_SIZE
+from blackjack_game import BlackjackApp
+from blackjack_interface import HeadlessInterface
+from cards import Card, BlackjackCardSet, RANKS, SUITS
+
+
+class TestDealerProbabilities(unittest.TestCase):
+
+    def test_probabilities_sum_to_one(self):
+        """
+        Test that final score probabilities add up to 1 for every up card
+        """
+        for upcard in range(1, 11):
+            probs = dealerProbabilities(upcard)
+            self.assertAlmostEqual(sum(probs.values()), 1.0)
+            self.assertAlmostEqual(sum(dealerProbabilities(upcard, no_blackjack=True).values()), 1.0)
+
+    def test_blackjack_probability(self):
+        """
+        Test that a natural blackjack is only possible with an ace or a ten valued up card
+        """
+        self.assertAlmostEqual(dealerProbabilities(1)['blackjack'], 4 / 13)
+        self.assertAlmostEqual(dealerProbabilities(10)['blackjack'], 1 / 13)
+        for upcard in range(2, 10):
+            self.assertEqual(dealerProbabilities(upcard)['blackjack'], 0.0)
+
+    def test_dealer_stands_on_set_with_ace(self):
+        """
+        Test that the dealer stands when counting an ace as 11 reaches 17, even over 21
+        """
+        cards = BlackjackCardSet()
+        for rank in ['ace', 'five', 'six']: cards.addCard(Card(SUITS[0], rank))
+        probs = cardSetProbabilities(cards)
+        self.assertEqual(probs, {12: 1.0, 'bust': 0.0, 'blackjack': 0.0})
+
+    def test_memoized(self):
+        """
+        Test that repeated queries are served from the cache
+        """
+        dealerProbabilities(6)
+        hits = dealerFinal.cache_info().hits
+        dealerProbabilities(6)
+        self.assertGreater(dealerFinal.cache_info().hits, hits)
+        self.assertEqual(len(dealerFinal(6, False, 1)), OUTCOME_SIZE)
+
+    def test_matches_dealer_play(self):
+        """
+        Test that the exact probabilities agree with the dealer played by BlackjackApp
+        """
+        random.seed(17)
+        app = BlackjackApp(HeadlessInterface())
+        times = 20000
+        for upcard in ['six', 'ace']:
+            expected = dealerProbabilities(RANKS[[r[0] for r in RANKS].index(upcard)][1][0])
+            scores = {}
+            for i in range(times):
+                app.dealer_hand = BlackjackCardSet()
+                app.dealer_hand.addCard(Card(SUITS[0], upcard))
+                app.playHand(None, is_dealer=True)
+                hand = app.dealer_hand
+                score = app.getHighScore(hand)
+                if hand.hasBlackjack():
+                    score = 'blackjack'
+                elif score > 21:
+                    score = 'bust'
+                scores[score] = scores.get(score, 0) + 1
+            for score, prob in expected.items():
+                self.assertAlmostEqual(scores.get(score, 0) / times, prob, delta=0.015,
+                                       msg=f"{upcard} up card, final score {score}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from blackjack_history import HandHistory, HistoryApp
+from blackjack_interface import HeadlessInterface
+from blackjack_misc import Actions, Outcome
+from card_sources import RecordedCards
+from cards import Card
+
+
+def cards_of(*ranks):
+    return RecordedCards([Card('hearts', rank).index for rank in ranks])
+
+
+def split_eights(hand, dealer_hand, actions):
+    if Actions.SPLIT in actions:
+        return Actions.SPLIT
+    return Actions.STAND
+
+
+class TestHandHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'history.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rounds_stored(self):
+        """
+        Test that every round is stored with net wins adding up to the balance change
+        """
+        history = HandHistory(self.path)
+        app = HistoryApp(HeadlessInterface(rounds=300), history, rng=random.Random(1))
+        app.balance = 10 ** 5
+        app.runGame()
+        self.assertEqual(history.roundCount(), 300)
+        conn = history.conn
+        self.assertEqual(conn.execute('SELECT SUM(net) FROM rounds').fetchone()[0], app.balance - 10 ** 5)
+        self.assertEqual(conn.execute('SELECT SUM(net) FROM hands').fetchone()[0], app.balance - 10 ** 5)
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        history.close()
+
+    def test_batched_inserts(self):
+        """
+        Test that rounds are written per batch and the rest on close, ids going on when reopened
+        """
+        history = HandHistory(self.path, batch_rounds=100)
+        app = HistoryApp(HeadlessInterface(rounds=250), history, rng=random.Random(2))
+        app.balance = 10 ** 5
+        app.runGame()
+        reader = sqlite3.connect(self.path)
+        self.assertEqual(reader.execute('SELECT COUNT(*) FROM rounds').fetchone()[0], 200)
+        history.close()
+        self.assertEqual(reader.execute('SELECT COUNT(*) FROM rounds').fetchone()[0], 250)
+        reader.close()
+        history = HandHistory(self.path)
+        self.assertEqual(history.next_id, 251)
+        history.close()
+
+    def test_split_hands(self):
+        """
+        Test that split hands are stored with their cards, decisions and outcomes
+        """
+        history = HandHistory()
+        # eights against a 7, the split hands get a ten (win) and a six (loss), the dealer stands on 17
+        cards = cards_of('eight', 'ten', 'eight', 'seven', 'ten', 'six')
+        app = HistoryApp(HeadlessInterface(strategy=split_eights, rounds=1), history, rng=cards)
+        app.runGame()
+        history.flush()
+        hands = history.conn.execute('SELECT hand, cards, bet, outcome, net FROM hands ORDER BY hand').fetchall()
+        self.assertEqual(len(hands), 2)
+        self.assertListEqual([Card('hearts', r).index for r in ('eight', 'ten')], list(hands[0][1]))
+        self.assertListEqual([Card('hearts', r).index for r in ('eight', 'six')], list(hands[1][1]))
+        self.assertListEqual([h[4] for h in hands], [10, -10])
+        self.assertListEqual([h[3] for h in hands],
+                             [list(Outcome).index(Outcome.WIN), list(Outcome).index(Outcome.LOSS)])
+        decisions = history.conn.execute('SELECT hand, total, soft, upcard, action, net FROM decisions '
+                                         'ORDER BY step').fetchall()
+        # the split is credited with both hands, the later decisions with their own
+        self.assertEqual(decisions[0], (0, 16, 0, 7, list(Actions).index(Actions.SPLIT), 0))
+        self.assertListEqual([d[5] for d in decisions[1:]], [10, -10])
+        self.assertEqual(history.playResults(16, 7)[Actions.SPLIT], {'count': 1, 'net': 0, 'mean': 0.0})
+
+    def test_resplit_hands(self):
+        """
+        Test that a split is credited with the hands split again from the hands it made
+        """
+        history = HandHistory()
+        # eights against a 7: the first hand gets a ten (win), the second an eight and is split
+        # again, getting a ten (win), the third a six (loss), the dealer stands on 17
+        cards = cards_of('eight', 'ten', 'eight', 'seven', 'ten', 'eight', 'ten', 'six')
+        app = HistoryApp(HeadlessInterface(strategy=split_eights, rounds=1), history, rng=cards)
+        app.runGame()
+        history.flush()
+        nets = history.conn.execute('SELECT net FROM hands ORDER BY hand').fetchall()
+        self.assertListEqual([n for n, in nets], [10, 10, -10])
+        splits = history.conn.execute('SELECT hand, net FROM decisions WHERE action = ? ORDER BY step',
+                                      (list(Actions).index(Actions.SPLIT),)).fetchall()
+        self.assertListEqual(splits, [(0, 10), (1, 0)])
+
+    def test_play_results(self):
+        """
+        Test that the results of a play are the ones of the decisions stored and the index covers the query
+        """
+        history = HandHistory(batch_rounds=50)
+        app = HistoryApp(HeadlessInterface(rounds=2000), history, rng=random.Random(3))
+        app.balance = 10 ** 5
+        app.runGame()
+        results = history.playResults(16, 10)
+        rows = history.conn.execute('SELECT action, net FROM decisions WHERE total = 16 AND soft = 0 '
+                                    'AND upcard = 10 AND net IS NOT NULL').fetchall()
+        self.assertEqual(sum(r['count'] for r in results.values()), len(rows))
+        self.assertEqual(sum(r['net'] for r in results.values()), sum(net for _, net in rows))
+        plan = history.conn.execute('EXPLAIN QUERY PLAN SELECT action, COUNT(*), SUM(net) FROM decisions '
+                                    'WHERE total = 16 AND soft = 0 AND upcard = 10 GROUP BY action').fetchall()
+        self.assertIn('COVERING INDEX decisions_by_play', plan[0][3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,7 @@ import unittest
 from copy import deepcopy
 from unittest.mock import Mock, patch
 from unittest.case import skip
-from blackjack_interface import TextInterface, GraphicInterface
+from blackjack_interface import TextInterface, GraphicInterface, HeadlessInterface
 from cards import Card, BlackjackCardSet
 from blackjack_misc import Outcome, Actions
 
@@ -134,10 +134,7 @@ class TestTextInterface(unittest.TestCase):
         """
         card_hand = BlackjackCardSet()
         for i in range(len(self.PREDEFINED_CARDS)):
-            card = self.PREDEFINED_CARDS[i]
-            if i == 0:
-                card.toggleVisibility()
-            card_hand.addCard(deepcopy(card))
+            card_hand.addCard(self.PREDEFINED_CARDS[i], hidden=i == 0)
 
         ownership = "Your cards: "
         card_names = []
@@ -376,6 +373,79 @@ class TestTextInterface(unittest.TestCase):
             self.inter.updateBalanceDisplay(1000)
             print_patch.assert_called_with('Your balance: ', 1000)
 
+class TestHeadlessInterface(unittest.TestCase):
+
+    def setUp(self):
+        self.inter = HeadlessInterface()
+
+    def test_display_methods_do_nothing(self):
+        """
+        Test that display methods neither print nor return anything
+        """
+        hand = BlackjackCardSet()
+        hand.addCard(Card('hearts', 'ten'))
+        with patch('builtins.print') as print_patch:
+            self.assertIsNone(self.inter.greet())
+            self.assertIsNone(self.inter.initializeView())
+            self.assertIsNone(self.inter.updateBalanceDisplay(100))
+            self.assertIsNone(self.inter.updateCardView(hand))
+            self.assertIsNone(self.inter.moveSplitCard(action='hold'))
+            self.assertIsNone(self.inter.setAsideCardSet(0))
+            self.assertIsNone(self.inter.showSettledCardView(hand, 0))
+            self.assertIsNone(self.inter.showOutcomeMessage("You won!\n"))
+            print_patch.assert_not_called()
+
+    def test_get_action_uses_strategy(self):
+        """
+        Test that an action is chosen by the strategy based on the hands in play
+        """
+        strategy = Mock(return_value=Actions.DOUBLE)
+        inter = HeadlessInterface(strategy=strategy)
+        player, dealer = BlackjackCardSet(), BlackjackCardSet()
+        inter.updateCardView(player)
+        inter.updateCardView(dealer, is_dealer=True)
+        actions = [Actions.HIT, Actions.STAND, Actions.DOUBLE]
+        self.assertEqual(inter.getAction(actions), Actions.DOUBLE)
+        strategy.assert_called_once_with(player, dealer, actions)
+
+    def test_default_strategy(self):
+        """
+        Test that the default strategy hits below 17 and stands otherwise
+        """
+        hand = BlackjackCardSet()
+        hand.addCard(Card('hearts', 'ten'))
+        hand.addCard(Card('clubs', 'six'))
+        self.inter.updateCardView(hand)
+        self.assertEqual(self.inter.getAction([Actions.HIT, Actions.STAND]), Actions.HIT)
+        hand.addCard(Card('clubs', 'ace'))
+        self.assertEqual(self.inter.getAction([Actions.HIT, Actions.STAND]), Actions.STAND)
+
+    def test_get_bet(self):
+        """
+        Test that a bet is either fixed or calculated from the balance
+        """
+        self.assertEqual(self.inter.getBet(100), 10)
+        inter = HeadlessInterface(bet=lambda balance: 50 if balance >= 200 else 25)
+        self.assertEqual(inter.getBet(300), 50)
+        self.assertEqual(inter.getBet(100), 25)
+
+    def test_wants_to_play_limited_rounds(self):
+        """
+        Test that the interface stops playing after the number of rounds requested
+        """
+        inter = HeadlessInterface(rounds=3)
+        self.assertListEqual([inter.wantsToPlay() for i in range(5)], [True] * 3 + [False] * 2)
+        self.assertEqual(inter.rounds_played, 3)
+
+    def test_close(self):
+        """
+        Test that the interface is not alive after closing
+        """
+        self.assertTrue(self.inter.isAlive())
+        self.inter.close()
+        self.assertFalse(self.inter.isAlive())
+
+
 class TestGraphicInterface(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,160 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+from blackjack_interface import HeadlessInterface, TextInterface
+from blackjack_log import EventLog, RecordingApp, LogFormatError, ReplayError, readSessions, \
+    readLogFile, replayLog
+from blackjack_misc import Actions, Outcome
+from blackjack_strategy import buildBasicStrategy
+from card_sources import RecordedCards
+from cards import Card
+
+
+def recordGame(rounds, seed, log=None, balance=10 ** 6):
+    log = log if log is not None else EventLog()
+    interface = HeadlessInterface(strategy=buildBasicStrategy(), rounds=rounds)
+    app = RecordingApp(interface, log, rng=random.Random(seed))
+    app.balance = balance
+    app.runGame()
+    return log, app
+
+
+class TestEventLog(unittest.TestCase):
+
+    def test_event_encoding(self):
+        """
+        Test that cards, actions and outcomes take one byte and values are varints
+        """
+        log = EventLog()
+        log.startSession(300)
+        log.bet(10)
+        log.card(Card('spades', 'ace'))
+        log.action(Actions.DOUBLE)
+        log.outcome(Outcome.WIN, 2)
+        log.endRound(290)
+        data = log.getBytes()
+        self.assertEqual(len(data), 3 + 2 + 1 + 1 + 1 + 3)
+        session = readSessions(data)[0]
+        self.assertEqual(session.balance, 300)
+        logged = session.rounds[0]
+        self.assertEqual(logged.bet, 10)
+        self.assertListEqual(logged.cards, [Card('spades', 'ace').index])
+        self.assertListEqual(logged.actions, [Actions.DOUBLE])
+        self.assertListEqual(logged.outcomes, [(Outcome.WIN, 2)])
+        self.assertEqual(logged.balance, 290)
+
+    def test_negative_balance(self):
+        """
+        Test that balances below zero and bets and balances given as floats are logged as integers
+        """
+        log = EventLog()
+        log.startSession(5.0)
+        log.bet(10.0)
+        log.endRound(-5)
+        session = readSessions(log.getBytes())[0]
+        self.assertEqual(session.balance, 5)
+        self.assertEqual(session.rounds[0].bet, 10)
+        self.assertIsInstance(session.rounds[0].bet, int)
+        self.assertEqual(session.rounds[0].balance, -5)
+
+    def test_fractional_amounts_rejected(self):
+        """
+        Test that a bet or balance with a fraction is refused rather than logged truncated
+        """
+        log = EventLog()
+        self.assertRaises(ValueError, log.bet, 12.5)
+        self.assertRaises(ValueError, log.endRound, 97.5)
+        self.assertRaises(ValueError, log.startSession, -0.5)
+        self.assertEqual(log.getBytes(), b'')
+
+    def test_text_interface_game(self):
+        """
+        Test that a game typed in a TextInterface, which returns the bet as a float, is recorded
+        """
+        answers = iter(['start', '10', 'stand', 'exit'])
+        log = EventLog()
+        # the player stands on 19 against a dealer's 17
+        cards = RecordedCards([Card('hearts', rank).index for rank in ('ten', 'ten', 'nine', 'seven')])
+        app = RecordingApp(TextInterface(), log, rng=cards)
+        with patch('builtins.input', side_effect=lambda prompt: next(answers)), patch('builtins.print'):
+            app.runGame()
+        session = readSessions(log.getBytes())[0]
+        self.assertEqual(session.balance, 100)
+        self.assertEqual(session.rounds[0].bet, 10)
+        self.assertListEqual(session.rounds[0].actions, [Actions.STAND])
+        self.assertEqual(session.rounds[0].balance, 110)
+
+    def test_invalid_logs(self):
+        """
+        Test that malformed logs raise LogFormatError
+        """
+        for data in [bytes([0x80, 10]), bytes([0x82, 100, 0x05]), bytes([0x82, 100, 0x80, 0x8a]),
+                     bytes([0x82, 100, 0x80, 10, 0x34]), bytes([0x82, 100, 0x80, 10, 0x60])]:
+            self.assertRaises(LogFormatError, readSessions, data)
+
+    def test_recorded_game(self):
+        """
+        Test that a recorded game logs every round with a few bytes per round
+        """
+        log, app = recordGame(500, 1)
+        session = readSessions(log.getBytes())[0]
+        self.assertEqual(len(session.rounds), 500)
+        self.assertEqual(session.rounds[-1].balance, app.balance)
+        self.assertTrue(all(len(r.outcomes) >= 1 and len(r.cards) >= 4 for r in session.rounds))
+        self.assertLess(len(log.getBytes()), 500 * 20)
+
+    def test_append_to_file(self):
+        """
+        Test that sessions are appended to the log file
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'rounds.bjl')
+            balances = []
+            for seed in [2, 3]:
+                log = EventLog(path, flush_size=64)
+                balances.append(recordGame(200, seed, log)[1].balance)
+                log.close()
+            sessions = readLogFile(path)
+            self.assertEqual(len(sessions), 2)
+            self.assertListEqual([s.rounds[-1].balance for s in sessions], balances)
+
+
+class TestReplay(unittest.TestCase):
+
+    def test_replay_balances(self):
+        """
+        Test that replaying a log reaches the recorded final balances
+        """
+        log = EventLog()
+        balances = [recordGame(300, seed, log, balance=1000)[1].balance for seed in [4, 5]]
+        self.assertListEqual(replayLog(log.getBytes()), balances)
+
+    def test_replay_until_ruin(self):
+        """
+        Test that a session ending with a low balance is replayed
+        """
+        log, app = recordGame(None, 6, balance=100)
+        self.assertLess(app.balance, 10)
+        self.assertListEqual(replayLog(log.getBytes()), [app.balance])
+
+    def test_replay_detects_changes(self):
+        """
+        Test that a log with a changed card does not replay
+        """
+        log, app = recordGame(300, 7)
+        data = bytearray(log.getBytes())
+        for i in range(len(data) - 1, 0, -1):
+            if data[i] < 52 and data[i - 1] < 52:
+                data[i] = (data[i] + 4 * 5) % 52
+                break
+        self.assertRaises(ReplayError, replayLog, bytes(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import unittest
+from blackjack_misc import Outcome
+from blackjack_batch import strategyTable, tableStrategy
+from blackjack_interface import standOnSeventeen
+from blackjack_parallel import runSimulation, playChunk, chunkSeeds
+from test_batch import basic_decide
+
+
+class TestParallelRunner(unittest.TestCase):
+
+    def test_chunk_seeds_reproducible(self):
+        """
+        Test that chunk seeds depend only on the master seed
+        """
+        self.assertListEqual(chunkSeeds(5, 4), chunkSeeds(5, 4))
+        self.assertEqual(len(set(chunkSeeds(5, 4))), 4)
+        self.assertNotEqual(chunkSeeds(5, 4), chunkSeeds(6, 4))
+
+    def test_chunk_reproducible(self):
+        """
+        Test that a chunk played twice with the same seed gives the same result
+        """
+        self.assertEqual(playChunk(42, 2000), playChunk(42, 2000))
+
+    def test_same_totals_any_worker_count(self):
+        """
+        Test that totals are identical no matter how many workers are used
+        """
+        single = runSimulation(9000, seed=2024, workers=1, chunk_rounds=2000)
+        pooled = runSimulation(9000, seed=2024, workers=3, chunk_rounds=2000)
+        self.assertEqual(single, pooled)
+
+    def test_counts_cover_all_rounds(self):
+        """
+        Test that every round settles at least one hand
+        """
+        counts, net = runSimulation(5000, seed=1, workers=1, strategy=standOnSeventeen, chunk_rounds=1500)
+        self.assertGreaterEqual(sum(counts.values()), 5000)
+        self.assertGreater(counts[Outcome.LOSS], 0)
+
+    def test_table_strategy_in_workers(self):
+        """
+        Test that a strategy table can be played by worker processes
+        """
+        strategy = tableStrategy(strategyTable(basic_decide))
+        single = runSimulation(4000, seed=3, workers=1, strategy=strategy, chunk_rounds=1000)
+        pooled = runSimulation(4000, seed=3, workers=2, strategy=strategy, chunk_rounds=1000)
+        self.assertEqual(single, pooled)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import asyncio
+import json
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+from blackjack_game import BlackjackApp
+from blackjack_interface import HeadlessInterface
+from blackjack_server import GameServer, LINE_LIMIT, MAX_ERRORS
+
+
+async def play_client(reader, writer, rounds, answers=None):
+    # plays like standOnSeventeen, returns the events received
+    events, played, score = [], 0, 0
+    answers = list(answers or [])
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        event = json.loads(line)
+        events.append(event)
+        name = event['event']
+        if name == 'cards' and not event['dealer']:
+            low, high = event['score']
+            score = high if 0 < high <= 21 else low
+        elif name in ('play', 'bet', 'action'):
+            if answers:
+                writer.write(answers.pop(0))
+                continue
+            if name == 'play':
+                answer = {'play': played < rounds}
+                played += 1
+            elif name == 'bet':
+                answer = {'bet': event['bets'][0]}
+            else:
+                answer = {'action': 'hit' if score < 17 else 'stand'}
+            writer.write(json.dumps(answer).encode() + b'\n')
+        elif name == 'bye':
+            break
+    writer.close()
+    return events
+
+
+def balances(events):
+    return [e['balance'] for e in events if e['event'] == 'balance']
+
+
+class TestGameServer(unittest.TestCase):
+
+    def run_server(self, client, path=None, **kwargs):
+        async def main():
+            server = await GameServer(**kwargs).start(path=path)
+            try:
+                return await client(server), server
+            finally:
+                await server.close()
+        return asyncio.run(main())
+
+    def test_session_over_tcp(self):
+        """
+        Test that a client plays rounds over TCP and gets the same balance as a BlackjackApp with the same cards
+        """
+        async def client(server):
+            reader, writer = await asyncio.open_connection(*server.address())
+            return await play_client(reader, writer, rounds=30)
+
+        events, server = self.run_server(client, seed=1)
+        self.assertEqual(events[0]['event'], 'hello')
+        self.assertDictEqual(events[-1], {'event': 'bye', 'reason': 'done'} if balances(events)[-1] >= 10 else
+                             {'event': 'bye', 'reason': 'balance'})
+        app = BlackjackApp(HeadlessInterface(rounds=30), rng=random.Random(random.Random(1).getrandbits(64)))
+        app.runGame()
+        self.assertEqual(balances(events)[-1], app.balance)
+        self.assertDictEqual(server.sessions, {})
+
+    def test_unix_socket(self):
+        """
+        Test that sessions are served over a Unix socket
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'blackjack.sock')
+
+            async def client(server):
+                reader, writer = await asyncio.open_unix_connection(path)
+                return await play_client(reader, writer, rounds=3)
+
+            events = self.run_server(client, path=path)[0]
+        self.assertEqual(events[0]['event'], 'hello')
+        self.assertEqual(events[-1]['event'], 'bye')
+        self.assertTrue(any(e['event'] == 'cards' for e in events))
+
+    def test_concurrent_sessions(self):
+        """
+        Test that hundreds of sessions play at the same time on one event loop
+        """
+        async def client(server):
+            async def one():
+                reader, writer = await asyncio.open_connection(*server.address())
+                return await play_client(reader, writer, rounds=5)
+            return await asyncio.gather(*[one() for i in range(300)])
+
+        results, server = self.run_server(client, decks=6)
+        self.assertEqual(len(results), 300)
+        self.assertEqual(len({r[0]['session'] for r in results}), 300)
+        for events in results:
+            self.assertEqual(events[-1]['event'], 'bye')
+        self.assertEqual(sum(server.ended.values()), 300)
+
+    def test_timeout(self):
+        """
+        Test that a client who does not answer is told so and disconnected, without stopping other sessions
+        """
+        async def client(server):
+            reader, writer = await asyncio.open_connection(*server.address())
+            idle = [json.loads(await reader.readline()) for i in range(3)]
+            other = await play_client(*await asyncio.open_connection(*server.address()), rounds=2)
+            idle.append(json.loads(await reader.readline()))
+            self.assertEqual(await reader.readline(), b'')
+            writer.close()
+            return idle, other
+
+        (idle, other), server = self.run_server(client, timeout=0.3)
+        self.assertEqual(idle[2]['event'], 'play')
+        self.assertDictEqual(idle[3], {'event': 'bye', 'reason': 'timeout'})
+        self.assertEqual(other[-1]['event'], 'bye')
+        self.assertEqual(server.ended['timeout'], 1)
+
+    def test_invalid_answers(self):
+        """
+        Test that a wrong answer is asked again and too many wrong answers end the session
+        """
+        async def retry(server):
+            reader, writer = await asyncio.open_connection(*server.address())
+            return await play_client(reader, writer, rounds=0, answers=[b'{"play": true}\n', b'{"bet": 30}\n'])
+
+        events = self.run_server(retry)[0]
+        errors = [e for e in events if e['event'] == 'error']
+        self.assertEqual(len(errors), 1)
+        self.assertIn('bet', errors[0]['message'])
+        self.assertEqual(sum(e['event'] == 'bet' for e in events), 2)
+
+        async def garbage(server):
+            reader, writer = await asyncio.open_connection(*server.address())
+            return await play_client(reader, writer, rounds=1, answers=[b'not json\n'] * MAX_ERRORS)
+
+        events = self.run_server(garbage)[0]
+        self.assertEqual(events[-1]['event'], 'bye')
+        self.assertEqual(events[-1]['reason'], 'error')
+
+    def test_integer_bets(self):
+        """
+        Test that a float or string bet is asked again and the game only gets integer bets
+        """
+        async def client(server):
+            reader, writer = await asyncio.open_connection(*server.address())
+            answers = [b'{"play": true}\n', b'{"bet": 10.0}\n', b'{"bet": "10"}\n', b'{"bet": 10}\n']
+            return await play_client(reader, writer, rounds=0, answers=answers)
+
+        events = self.run_server(client)[0]
+        errors = [e for e in events if e['event'] == 'error']
+        self.assertEqual(len(errors), 2)
+        self.assertIn('bet', errors[0]['message'])
+        self.assertTrue(all(isinstance(b, int) for b in balances(events)))
+
+    def test_long_line(self):
+        """
+        Test that a client sending a line over the limit is disconnected
+        """
+        async def client(server):
+            reader, writer = await asyncio.open_connection(*server.address())
+            await reader.readline()
+            writer.write(b'x' * (LINE_LIMIT * 2) + b'\n')
+            while await reader.readline():
+                pass
+            writer.close()
+
+        server = self.run_server(client)[1]
+        self.assertDictEqual(server.ended, {'disconnected': 1})
+
+    def test_game_error_reported(self):
+        """
+        Test that an error of the game is reported and not taken for a disconnection
+        """
+        errors = []
+
+        async def client(server):
+            asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+            reader, writer = await asyncio.open_connection(*server.address())
+            return await play_client(reader, writer, rounds=1)
+
+        with patch('blackjack_server.AsyncBlackjackApp.startRound', side_effect=ValueError('engine bug')):
+            events, server = self.run_server(client)
+        self.assertDictEqual(events[-1], {'event': 'bye', 'reason': 'internal'})
+        self.assertDictEqual(server.ended, {'internal': 1})
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0]['exception'], ValueError)
+
+    def test_full_server(self):
+        """
+        Test that connections over the session limit are turned away
+        """
+        async def client(server):
+            first = await asyncio.open_connection(*server.address())
+            await first[0].readline()
+            reader, writer = await asyncio.open_connection(*server.address())
+            refused = json.loads(await reader.readline())
+            first[1].close()
+            writer.close()
+            return refused
+
+        refused = self.run_server(client, max_sessions=1)[0]
+        self.assertDictEqual(refused, {'event': 'bye', 'reason': 'full'})
+
+
+if __name__ == '__main__':
+    unittest.main()
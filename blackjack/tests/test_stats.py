@@ -0,0 +1,115 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import random
+import unittest
+import numpy as np
+from blackjack_interface import HeadlessInterface
+from blackjack_misc import Outcome
+from blackjack_parallel import playChunk, playStatsChunk, runStatsSimulation
+from blackjack_stats import RoundStats, StatsApp, initialBucket, HARD, SOFT, PAIR
+from cards import Card
+
+
+class TestRoundStats(unittest.TestCase):
+
+    def test_welford_mean_variance(self):
+        """
+        Test that the running mean and variance match the ones of all values
+        """
+        values = np.random.default_rng(1).normal(-0.5, 10, size=5000).round()
+        stats = RoundStats()
+        for v in values:
+            stats.addRound(float(v))
+        self.assertAlmostEqual(stats.mean, values.mean(), places=9)
+        self.assertAlmostEqual(stats.variance(), values.var(ddof=1), places=6)
+
+    def test_merge(self):
+        """
+        Test that merged stats equal the stats of all rounds added to one
+        """
+        values = np.random.default_rng(2).integers(-20, 30, size=900).tolist()
+        parts = [RoundStats() for i in range(3)]
+        whole = RoundStats()
+        for i, v in enumerate(values):
+            bucket = (HARD, 10 + i % 8, 1 + i % 10)
+            parts[i % 3].addRound(v, bucket, player_busts=i % 2, dealer_bust=i % 5 == 0)
+            parts[i % 3].addHand(Outcome.WIN if v > 0 else Outcome.LOSS, busted=i % 2 == 1)
+            whole.addRound(v, bucket, player_busts=i % 2, dealer_bust=i % 5 == 0)
+            whole.addHand(Outcome.WIN if v > 0 else Outcome.LOSS, busted=i % 2 == 1)
+        merged = RoundStats().merge(parts[0]).merge(parts[1]).merge(parts[2])
+        self.assertEqual(merged.rounds, whole.rounds)
+        self.assertAlmostEqual(merged.mean, whole.mean, places=9)
+        self.assertAlmostEqual(merged.variance(), whole.variance(), places=6)
+        self.assertDictEqual(merged.counts, whole.counts)
+        self.assertDictEqual(merged.bustRates(), whole.bustRates())
+        self.assertTrue(np.array_equal(merged.bucket_rounds, whole.bucket_rounds))
+        self.assertTrue(np.allclose(merged.bucket_net_squares, whole.bucket_net_squares))
+
+    def test_confidence_interval(self):
+        """
+        Test that the confidence interval is centred on the mean and narrows with the level
+        """
+        stats = RoundStats()
+        for v in [10, -10, 20, -10, 0, 10, -10]:
+            stats.addRound(v)
+        ev, low, high = stats.evInterval(0.95)
+        self.assertAlmostEqual(ev - low, high - ev)
+        narrow = stats.evInterval(0.5)
+        self.assertGreater(narrow[1], low)
+        self.assertLess(narrow[2], high)
+        self.assertEqual(RoundStats().evInterval()[1], float('-inf'))
+
+    def test_initial_bucket(self):
+        """
+        Test the bucket of hard, soft and pair initial hands
+        """
+        up = Card('clubs', 'six')
+        self.assertEqual(initialBucket(Card('hearts', 'ten'), Card('spades', 'seven'), up), (HARD, 17, 6))
+        self.assertEqual(initialBucket(Card('hearts', 'ace'), Card('spades', 'seven'), up), (SOFT, 18, 6))
+        self.assertEqual(initialBucket(Card('hearts', 'king'), Card('spades', 'jack'), up), (PAIR, 10, 6))
+        self.assertEqual(initialBucket(Card('hearts', 'ace'), Card('spades', 'ace'), up), (PAIR, 1, 6))
+
+
+class TestStatsApp(unittest.TestCase):
+
+    def test_stats_of_game(self):
+        """
+        Test that the stats of a game match its balance and outcome counts
+        """
+        app = StatsApp(HeadlessInterface(rounds=3000), rng=random.Random(3))
+        app.balance = 10 ** 6
+        app.runGame()
+        stats = app.stats
+        self.assertEqual(stats.rounds, 3000)
+        self.assertAlmostEqual(stats.mean * stats.rounds, app.balance - 10 ** 6, places=6)
+        self.assertEqual(int(stats.bucket_rounds.sum()), 3000)
+        self.assertAlmostEqual(float(stats.bucket_net.sum()), app.balance - 10 ** 6, places=6)
+        self.assertEqual(int(stats.bucket_busts.sum()), stats.player_busts)
+        self.assertGreater(stats.player_busts, 0)
+        self.assertGreater(stats.dealer_busts, 0)
+
+    def test_same_counts_as_chunk(self):
+        """
+        Test that a stats chunk counts the same outcomes as a counting chunk
+        """
+        counts, net = playChunk(11, 2000)
+        stats = playStatsChunk(11, 2000)
+        self.assertDictEqual(stats.counts, counts)
+        self.assertAlmostEqual(stats.mean * stats.rounds, net, places=6)
+
+    def test_stats_any_worker_count(self):
+        """
+        Test that merged stats do not depend on the number of workers
+        """
+        single = runStatsSimulation(6000, seed=4, workers=1, chunk_rounds=1500)
+        pooled = runStatsSimulation(6000, seed=4, workers=2, chunk_rounds=1500)
+        self.assertEqual(single.rounds, 6000)
+        self.assertDictEqual(single.counts, pooled.counts)
+        self.assertAlmostEqual(single.mean, pooled.mean, places=9)
+        self.assertTrue(np.array_equal(single.bucket_rounds, pooled.bucket_rounds))
+
+
+if __name__ == '__main__':
+    unittest.main()
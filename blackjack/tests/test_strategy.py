@@ -0,0 +1,103 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import unittest
+from blackjack_misc import Actions
+from blackjack_batch import HIT, STAND, DOUBLE
+from blackjack_strategy import buildBasicStrategy, standEV, hitStandEV, splitEV, actionEVs, optimalEV
+from blackjack_parallel import runSimulation
+from cards import Card, BlackjackCardSet
+
+
+def card_set(*ranks):
+    cards = BlackjackCardSet()
+    for rank in ranks: cards.addCard(Card('hearts', rank))
+    return cards
+
+
+class TestExpectedValues(unittest.TestCase):
+
+    def test_stand_ev_bounds(self):
+        """
+        Test that standing on a higher score never does worse and bust always loses
+        """
+        for upcard in range(1, 11):
+            evs = [standEV(score, upcard) for score in range(4, 22)]
+            self.assertListEqual(evs, sorted(evs))
+            self.assertEqual(standEV(22, upcard), -1.0)
+
+    def test_no_play_at_21(self):
+        """
+        Test that a hand of 21 is stood on, as BlackjackApp.canPlay does not allow to hit
+        """
+        ev, action = hitStandEV(11, True, 10)
+        self.assertEqual(action, Actions.STAND)
+        self.assertEqual(ev, standEV(21, 10))
+
+    def test_split_aces_better_than_playing(self):
+        """
+        Test that splitting aces is worth more than playing soft 12
+        """
+        evs = actionEVs(2, True, 6, pair=True)
+        self.assertEqual(max(evs, key=evs.get), Actions.SPLIT)
+        self.assertGreater(splitEV(1, 6), 0)
+
+
+class TestBasicStrategy(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.strategy = buildBasicStrategy()
+
+    def test_table_entries(self):
+        """
+        Test that well known decisions are in the tables
+        """
+        self.assertEqual(self.strategy.first[0, 11, 6], DOUBLE)
+        self.assertEqual(self.strategy.later[0, 11, 6], HIT)
+        self.assertEqual(self.strategy.first[0, 20, 10], STAND)
+        self.assertEqual(self.strategy.first[0, 5, 10], HIT)
+        self.assertTrue(self.strategy.pairs[1, 8, 6])
+        self.assertFalse(self.strategy.pairs[1, 10, 6])
+
+    def test_pairs_after_split(self):
+        """
+        Test that a pair reached after a split, where doubling is not allowed, is split only when it beats hit or stand
+        """
+        for upcard in range(1, 11):
+            for value in range(2, 11):
+                best = hitStandEV(value * 2, False, upcard)[0]
+                self.assertEqual(self.strategy.pairs[0, value, upcard], splitEV(value, upcard, 1) > best)
+        self.assertTrue(self.strategy.pairs[0, 8, 10])
+        self.assertFalse(self.strategy.pairs[0, 5, 6])
+
+    def test_get_action(self):
+        """
+        Test that an action is looked up for the hand and only among available actions
+        """
+        dealer = card_set('ten', 'six')
+        all_actions = [Actions.HIT, Actions.STAND, Actions.DOUBLE, Actions.SPLIT]
+        self.assertEqual(self.strategy(card_set('eight', 'eight'), dealer, all_actions), Actions.SPLIT)
+        self.assertEqual(self.strategy(card_set('five', 'six'), dealer, all_actions[:3]), Actions.DOUBLE)
+        self.assertEqual(self.strategy(card_set('five', 'six'), dealer, all_actions[:2]), Actions.HIT)
+        self.assertEqual(self.strategy(card_set('king', 'queen'), dealer, all_actions), Actions.STAND)
+
+    def test_chart(self):
+        """
+        Test that the chart has a row for every hand
+        """
+        chart = self.strategy.chart().split("\n")
+        self.assertEqual(len(chart), 1 + 16 + 8 + 10)
+
+    def test_matches_played_rounds(self):
+        """
+        Test that the real game played by the basic strategy wins the expected value per round
+        """
+        rounds = 40000
+        counts, net = runSimulation(rounds, seed=5, workers=1, strategy=self.strategy)
+        self.assertAlmostEqual(net / rounds / 10, optimalEV(), delta=4 * 1.3 / rounds ** 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
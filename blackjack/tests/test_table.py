@@ -0,0 +1,100 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import random
+import unittest
+from blackjack_counting import CountingShoe
+from blackjack_game import BlackjackApp
+from blackjack_interface import HeadlessInterface, StrategyInterface
+from blackjack_strategy import buildBasicStrategy
+from blackjack_table import BlackjackTable, MAX_SEATS
+from blackjack_tournament import BasicPlayer
+from card_sources import RecordedCards
+from cards import Card, Shoe
+
+
+def cards_of(*ranks):
+    return RecordedCards([Card('hearts', rank).index for rank in ranks])
+
+
+class TestBlackjackTable(unittest.TestCase):
+
+    def test_single_seat_matches_app(self):
+        """
+        Test that a table with one seat plays the same game as a BlackjackApp drawing the same cards
+        """
+        for seed in range(10):
+            app = BlackjackApp(HeadlessInterface(rounds=200), shoe=Shoe(2, rng=random.Random(seed)))
+            app.runGame()
+            table = BlackjackTable([HeadlessInterface(rounds=200)], shoe=Shoe(2, rng=random.Random(seed)))
+            table.runTable()
+            self.assertEqual(table.seats[0].balance, app.balance)
+            self.assertEqual(table.seats[0].interface.rounds_played, app.interface.rounds_played)
+
+    def test_deal_order_and_shared_dealer(self):
+        """
+        Test that cards go round the seats before the dealer and every seat is settled against one dealer hand
+        """
+        # seat 1: ten, seven; seat 2: nine, two; dealer: six (hidden), ten; dealer then draws a king
+        source = cards_of('ten', 'nine', 'six', 'seven', 'two', 'ten', 'king')
+        interfaces = [HeadlessInterface(rounds=1, strategy=lambda h, d, a: a[1]) for i in range(2)]
+        table = BlackjackTable(interfaces, rng=source)
+        played = table.playRound()
+        self.assertEqual(len(played), 2)
+        self.assertEqual(table.seats[0].balance, 110)
+        self.assertEqual(table.seats[1].balance, 110)
+        self.assertEqual(table.rounds, 1)
+
+    def test_dealer_natural(self):
+        """
+        Test that a dealer's natural beats every seat but a natural, which ties
+        """
+        source = cards_of('ace', 'nine', 'ace', 'king', 'five', 'king')
+        table = BlackjackTable([HeadlessInterface(rounds=1) for i in range(2)], rng=source)
+        table.playRound()
+        self.assertEqual(table.seats[0].balance, 100)
+        self.assertEqual(table.seats[1].balance, 90)
+
+    def test_seats_leave(self):
+        """
+        Test that seats leave the table after their rounds or once ruined, and the others keep playing
+        """
+        interfaces = [HeadlessInterface(rounds=5), HeadlessInterface(rounds=50), HeadlessInterface(rounds=20)]
+        table = BlackjackTable(interfaces, rng=random.Random(3))
+        table.seats[1].balance = 10 ** 5
+        table.runTable()
+        self.assertEqual(interfaces[0].rounds_played, 5)
+        self.assertEqual(table.rounds, 50)
+        self.assertTrue(interfaces[2].rounds_played <= 20)
+        self.assertTrue(interfaces[2].rounds_played == 20 or table.seats[2].balance < 10)
+        self.assertListEqual(table.seated, [])
+
+    def test_shared_shoe(self):
+        """
+        Test that all seats draw from one counting shoe and see the same counts
+        """
+        tables = buildBasicStrategy()
+        strategies = [BasicPlayer(tables) for i in range(MAX_SEATS)]
+        shoe = CountingShoe(6, rng=random.Random(4))
+        table = BlackjackTable([StrategyInterface(s, rounds=100) for s in strategies], shoe=shoe)
+        for seat in table.seats:
+            seat.balance = 10 ** 5
+        table.runTable()
+        self.assertEqual(table.rounds, 100)
+        for strategy in strategies:
+            self.assertIs(strategy.tracker, shoe.tracker)
+        self.assertEqual(shoe.tracker.seen, shoe.cursor)
+        for seat in table.seats:
+            self.assertIs(seat.card_source, shoe)
+
+    def test_seat_count(self):
+        """
+        Test that a table has between 1 and 7 seats
+        """
+        self.assertRaises(ValueError, BlackjackTable, [])
+        self.assertRaises(ValueError, BlackjackTable, [HeadlessInterface() for i in range(MAX_SEATS + 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+from blackjack_composition import CompositionSolver
+from blackjack_misc import Actions
+from blackjack_strategy import actionEVs, buildBasicStrategy
+from blackjack_tables import StrategyTables, basicStrategy, buildTables, loadTables, writeTables, _handEVs, \
+    ALIGNMENT, NATURAL_EV
+from cards import BlackjackCardSet, Card
+
+
+def make_hand(*ranks):
+    hand = BlackjackCardSet()
+    for rank in ranks:
+        hand.addCard(Card('spades', rank))
+    return hand
+
+
+class TestStrategyTables(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmp.name, 'tables.bin')
+        cls.arrays = buildTables(decks=(0,))
+        writeTables(cls.path, cls.arrays)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_arrays_mapped(self):
+        """
+        Test that the arrays read back are aligned read-only views of the file equal to the ones written
+        """
+        tables = StrategyTables(self.path)
+        for name, array in self.arrays.items():
+            mapped = tables.array(name)
+            np.testing.assert_array_equal(mapped, array)
+            self.assertEqual(mapped.dtype, array.dtype)
+            self.assertFalse(mapped.flags.writeable)
+            self.assertEqual(mapped.ctypes.data % ALIGNMENT, 0)
+        self.assertListEqual(tables.decks(), [0])
+        self.assertRaises(KeyError, tables.array, 'evs/6')
+        tables.close()
+
+    def test_lazy_mapping(self):
+        """
+        Test that the file is only mapped on first use and loadTables shares one mapping per file
+        """
+        tables = loadTables(self.path)
+        self.assertIs(loadTables(self.path), tables)
+        self.assertIsNone(StrategyTables(self.path)._map)
+        tables.array('first')
+        self.assertIsNotNone(tables._map)
+
+    def test_basic_strategy(self):
+        """
+        Test that the basic strategy of the file decides like the computed one
+        """
+        strategy = basicStrategy(self.path)
+        built = buildBasicStrategy()
+        dealer = make_hand('ace', 'six')
+        for ranks in [('ten', 'six'), ('five', 'six'), ('eight', 'eight'), ('ace', 'seven'), ('two', 'three', 'ten')]:
+            hand = make_hand(*ranks)
+            for actions in [list(Actions), [Actions.HIT, Actions.STAND]]:
+                self.assertEqual(strategy(hand, dealer, actions), built(hand, dealer, actions))
+        # without a tables file, the file is built first
+        path = os.path.join(self.tmp.name, 'cache', 'missing.bin')
+        missing = basicStrategy(path)
+        np.testing.assert_array_equal(missing.first, built.first)
+        self.assertTrue(StrategyTables(path).isCurrent())
+
+    def test_stale_file_rebuilt(self):
+        """
+        Test that a file built by other rules is rebuilt before its strategy is used
+        """
+        path = os.path.join(self.tmp.name, 'stale.bin')
+        stale = buildTables(decks=())
+        stale['first'] = stale['first'].copy()
+        stale['first'][0, 16, 10] = 2
+        with patch('blackjack_tables.rulesHash', return_value='other rules'):
+            writeTables(path, stale)
+        self.assertFalse(StrategyTables(path).isCurrent())
+        strategy = basicStrategy(path)
+        np.testing.assert_array_equal(strategy.first, buildBasicStrategy().first)
+        self.assertTrue(StrategyTables(path).isCurrent())
+
+    def test_hand_evs(self):
+        """
+        Test that the expected values of a two-card hand are the infinite deck ones, split only for pairs
+        """
+        tables = StrategyTables(self.path)
+        self.assertEqual(tables.handEVs(10, 6, 10), actionEVs(16, False, 10))
+        self.assertEqual(tables.handEVs(6, 10, 10), actionEVs(16, False, 10))
+        self.assertEqual(tables.handEVs(8, 8, 6), actionEVs(16, False, 6, pair=True))
+        self.assertEqual(tables.handEVs(1, 7, 9), actionEVs(8, True, 9))
+        self.assertNotIn(Actions.SPLIT, tables.handEVs(10, 6, 10))
+
+    def test_naturals(self):
+        """
+        Test that a natural is only stood on and paid the same in the infinite deck and shoe tables
+        """
+        tables = StrategyTables(self.path)
+        for upcard in range(1, 11):
+            self.assertEqual(tables.handEVs(1, 10, upcard), {Actions.STAND: NATURAL_EV})
+            self.assertEqual(tables.handEVs(10, 1, upcard), {Actions.STAND: NATURAL_EV})
+        self.assertEqual(_handEVs(6, CompositionSolver(), 10, 1, 6), {Actions.STAND: NATURAL_EV})
+
+    def test_invalid_file(self):
+        """
+        Test that a file that is not a tables file is rejected
+        """
+        path = os.path.join(self.tmp.name, 'other.bin')
+        with open(path, 'wb') as f:
+            f.write(b'\x00' * 256)
+        self.assertRaises(ValueError, StrategyTables(path).array, 'first')
+
+
+if __name__ == '__main__':
+    unittest.main()
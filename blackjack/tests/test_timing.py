@@ -0,0 +1,99 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import random
+import unittest
+from blackjack_game import BlackjackApp
+from blackjack_interface import HeadlessInterface
+from blackjack_timing import Histogram, PhaseTimer, NULL_TIMER, TimedInterface
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_add_values(self):
+        """
+        Test that a histogram keeps count, total, min, max and power of 2 buckets
+        """
+        hist = Histogram()
+        for ns in [3, 5, 1000, 6]:
+            hist.add(ns)
+        stats = hist.snapshot()
+        self.assertEqual(stats['count'], 4)
+        self.assertEqual(stats['total_ns'], 1014)
+        self.assertEqual(stats['min_ns'], 3)
+        self.assertEqual(stats['max_ns'], 1000)
+        self.assertDictEqual(stats['buckets'], {3: 1, 7: 2, 1023: 1})
+        self.assertEqual(stats['p50_ns'], 7)
+        self.assertEqual(stats['p99_ns'], 1000)
+
+    def test_merge(self):
+        """
+        Test that merging histograms gives the histogram of all values
+        """
+        first, second, both = Histogram(), Histogram(), Histogram()
+        for i, ns in enumerate([10, 200, 3000, 40, 5]):
+            (first if i % 2 else second).add(ns)
+            both.add(ns)
+        first.merge(second)
+        self.assertDictEqual(first.snapshot(), both.snapshot())
+
+
+class TestPhaseTimer(unittest.TestCase):
+
+    def test_null_timer(self):
+        """
+        Test that the default timer records nothing and keeps the interface unwrapped
+        """
+        interface = HeadlessInterface(rounds=5)
+        app = BlackjackApp(interface, rng=random.Random(1))
+        app.runGame()
+        self.assertIs(app.timer, NULL_TIMER)
+        self.assertIs(app.interface, interface)
+        self.assertDictEqual(app.timer.snapshot(), {})
+
+    def test_round_phases(self):
+        """
+        Test that every round records its deal and settle phases and the interface calls
+        """
+        timer = PhaseTimer()
+        app = BlackjackApp(HeadlessInterface(rounds=200), rng=random.Random(2), timer=timer)
+        app.balance = 10 ** 6
+        app.runGame()
+        stats = timer.snapshot()
+        self.assertEqual(stats['round.deal']['count'], 200)
+        self.assertEqual(stats['round.settle']['count'], 200)
+        self.assertEqual(stats['round.dealer']['count'], stats['round.player']['count'])
+        self.assertEqual(stats['playHand.dealer']['count'], stats['round.dealer']['count'])
+        self.assertEqual(stats['interface.getBet']['count'], 200)
+        self.assertGreater(stats['interface.updateCardView']['count'], 400)
+        self.assertEqual(app.interface.rounds_played, 200)
+
+    def test_same_game_with_timer(self):
+        """
+        Test that timing does not change the game played
+        """
+        balances = []
+        for timer in [NULL_TIMER, PhaseTimer()]:
+            app = BlackjackApp(HeadlessInterface(rounds=300), rng=random.Random(3), timer=timer)
+            app.runGame()
+            balances.append(app.balance)
+        self.assertEqual(balances[0], balances[1])
+
+    def test_timed_interface_forwarding(self):
+        """
+        Test that a timed interface forwards attributes, assignments and exceptions
+        """
+        timer = PhaseTimer()
+        interface = HeadlessInterface()
+        timed = TimedInterface(interface, timer)
+        timed.bet = 25
+        self.assertEqual(interface.bet, 25)
+        self.assertEqual(timed.getBet(100), 25)
+        interface.strategy = lambda *args: 1 / 0
+        self.assertRaises(ZeroDivisionError, timed.getAction, [])
+        self.assertEqual(timer.snapshot()['interface.getAction']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys
+from env import dev_path
+sys.path.append(dev_path)
+
+import unittest
+from unittest.mock import Mock
+from blackjack_misc import Actions
+from blackjack_strategy import buildBasicStrategy
+from blackjack_interface import Strategy, StrategyInterface
+from blackjack_tournament import runTournament, playSession, AlwaysStand, BasicPlayer, DealerMimic, \
+                                 ProgressiveBasicPlayer, STRATEGIES
+from cards import Card, BlackjackCardSet
+
+
+class TestStrategyInterface(unittest.TestCase):
+
+    def test_strategy_told_upcard_and_balance(self):
+        """
+        Test that a strategy decides with the player's hand, dealer's up card and balance
+        """
+        strategy = AlwaysStand()
+        strategy.getAction = Mock(return_value=Actions.STAND)
+        inter = StrategyInterface(strategy)
+        hand, dealer = BlackjackCardSet(), BlackjackCardSet()
+        dealer.addCard(Card('hearts', 'two'), hidden=True)
+        dealer.addCard(Card('clubs', 'nine'))
+        inter.updateCardView(hand)
+        inter.updateCardView(dealer, is_dealer=True)
+        inter.updateBalanceDisplay(70)
+        self.assertEqual(inter.getAction([Actions.HIT, Actions.STAND]), Actions.STAND)
+        strategy.getAction.assert_called_once_with(hand, Card('clubs', 'nine'), [Actions.HIT, Actions.STAND], 70)
+        self.assertEqual(inter.getBet(70), 10)
+
+    def test_base_strategy_has_no_play(self):
+        """
+        Test that the base strategy must be subclassed to play
+        """
+        with self.assertRaises(TypeError):
+            Strategy()
+
+        class NoPlay(Strategy):
+            name = "no play"
+
+        with self.assertRaises(TypeError):
+            NoPlay()
+
+
+class TestTournament(unittest.TestCase):
+
+    def test_session_stops_on_ruin(self):
+        """
+        Test that a session ends once the balance is too low to bet
+        """
+        rounds, net, net_squares, ruined = playSession(AlwaysStand(), seed=1, rounds=10000)
+        self.assertTrue(ruined)
+        self.assertLess(rounds, 10000)
+        self.assertLessEqual(net, -91)
+
+    def test_same_report_any_worker_count(self):
+        """
+        Test that a tournament report does not depend on the number of workers
+        """
+        players = [DealerMimic(), AlwaysStand()]
+        single = runTournament(players, sessions=6, rounds=200, seed=3, workers=1)
+        pooled = runTournament(players, sessions=6, rounds=200, seed=3, workers=2)
+        self.assertEqual(single, pooled)
+        self.assertSetEqual(set(single), {'dealer', 'stand'})
+
+    def test_common_random_numbers(self):
+        """
+        Test that two copies of a strategy see the same cards and get the same results
+        """
+        copy = DealerMimic()
+        copy.name = "dealer copy"
+        report = runTournament([DealerMimic(), copy], sessions=4, rounds=100, seed=8, workers=1)
+        self.assertEqual(report['dealer'], report['dealer copy'])
+
+    def test_report_values(self):
+        """
+        Test that the report holds sensible statistics for every strategy
+        """
+        tables = buildBasicStrategy()
+        report = runTournament([BasicPlayer(tables), ProgressiveBasicPlayer(tables=tables)], sessions=5, rounds=100,
+                               seed=2, workers=1)
+        for stats in report.values():
+            self.assertGreater(stats['variance'], 0)
+            self.assertTrue(0 <= stats['ruin_rate'] <= 1)
+            self.assertTrue(0 < stats['rounds'] <= 100)
+        self.assertEqual(len(STRATEGIES), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()